@@ -0,0 +1,67 @@
+"""add post tags
+
+Revision ID: 2f6a8c1d9e54
+Revises: 9c4d2e7a1b36
+Create Date: 2026-10-19 17:00:00.000000
+
+The '{}' default is a constant, so Postgres adds the column without
+rewriting posts. The GIN index is built concurrently, per partition when
+posts is partitioned. Every existing post starts without tags, so
+tag_counts starts empty and needs no backfill.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.models.online_migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6a8c1d9e54'
+down_revision: Union[str, Sequence[str], None] = '9c4d2e7a1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_posts_tags"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tag_counts',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'tag')
+    )
+
+    if op.get_bind().dialect.name != "postgresql":
+        # a JSON array; '{}' would read back as an object
+        op.add_column(
+            'posts',
+            sa.Column('tags', sa.JSON(), server_default='[]', nullable=False),
+        )
+        return
+
+    op.add_column(
+        'posts',
+        sa.Column(
+            'tags',
+            sa.ARRAY(sa.String()),
+            server_default=sa.text("'{}'"),
+            nullable=False,
+        ),
+    )
+    create_index_concurrently(INDEX, 'posts', ['tags'], using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        drop_index_concurrently(INDEX, 'posts')
+    op.drop_column('posts', 'tags')
+    op.drop_table('tag_counts')
@@ -0,0 +1,42 @@
+"""add post revisions
+
+Revision ID: 6d3b1e8f2a47
+Revises: 2f6a8c1d9e54
+Create Date: 2026-10-19 18:00:00.000000
+
+History starts at a post's first edit, so existing posts need no backfill.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d3b1e8f2a47'
+down_revision: Union[str, Sequence[str], None] = '2f6a8c1d9e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('post_revisions',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('snapshot', sa.Boolean(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'version')
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        # already zlib compressed, TOAST would only try again
+        op.execute("ALTER TABLE post_revisions ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('post_revisions')
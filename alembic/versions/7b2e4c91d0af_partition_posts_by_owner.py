@@ -0,0 +1,159 @@
+"""partition posts by owner
+
+Revision ID: 7b2e4c91d0af
+Revises: 3340d4981fd3
+Create Date: 2026-10-19 12:00:00.000000
+
+Adds the (owner_id, id) index every post lookup uses. With POSTS_PARTITIONS
+set to a positive number on Postgres, posts is also rebuilt as a table hash
+partitioned on owner_id while the application keeps running:
+
+1. posts_partitioned and its partitions are created and a trigger mirrors
+   every write on posts into it.
+2. Existing rows are copied in id ranges of POSTS_MIGRATION_BATCH_SIZE, each
+   batch in its own short transaction.
+3. The tables are swapped under a brief exclusive lock.
+
+The downgrade copies the rows back in a single statement and is not online.
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c91d0af'
+down_revision: Union[str, Sequence[str], None] = '3340d4981fd3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSTS_PARTITIONS = int(os.getenv("POSTS_PARTITIONS", "0"))
+BATCH_SIZE = int(os.getenv("POSTS_MIGRATION_BATCH_SIZE", "10000"))
+
+SYNC_FUNCTION = """
+CREATE FUNCTION posts_sync_partitioned() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM posts_partitioned
+        WHERE id = OLD.id AND owner_id = OLD.owner_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO posts_partitioned (id, title, content, owner_id)
+        VALUES (NEW.id, NEW.title, NEW.content, NEW.owner_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# FOR SHARE makes a batch wait for in-flight writes to its rows, so the
+# trigger's copy always wins over a stale one
+COPY_BATCH = sa.text(
+    """
+    INSERT INTO posts_partitioned (id, title, content, owner_id)
+    SELECT id, title, content, owner_id FROM posts
+    WHERE id >= :low AND id < :high
+    FOR SHARE
+    ON CONFLICT DO NOTHING
+    """
+)
+
+
+def is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def is_partitioned() -> bool:
+    relkind = op.get_bind().scalar(
+        sa.text("SELECT relkind FROM pg_class WHERE relname = 'posts'")
+    )
+    return relkind == "p"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not is_postgres() or POSTS_PARTITIONS <= 0:
+        if is_postgres():
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    'ix_posts_owner_id_id', 'posts', ['owner_id', 'id'],
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.create_index('ix_posts_owner_id_id', 'posts', ['owner_id', 'id'])
+        return
+
+    op.execute(
+        """
+        CREATE TABLE posts_partitioned (
+            id integer NOT NULL DEFAULT nextval('posts_id_seq'),
+            title varchar NOT NULL,
+            content varchar NOT NULL,
+            owner_id integer NOT NULL REFERENCES users (id),
+            PRIMARY KEY (id, owner_id)
+        ) PARTITION BY HASH (owner_id)
+        """
+    )
+    for remainder in range(POSTS_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE posts_p{remainder} PARTITION OF posts_partitioned "
+            f"FOR VALUES WITH (MODULUS {POSTS_PARTITIONS}, REMAINDER {remainder})"
+        )
+    op.execute("CREATE INDEX ix_posts_partitioned_id ON posts_partitioned (id)")
+    op.execute(
+        "CREATE INDEX ix_posts_owner_id_id ON posts_partitioned (owner_id, id)"
+    )
+    op.execute(SYNC_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER posts_sync_partitioned AFTER INSERT OR UPDATE OR DELETE "
+        "ON posts FOR EACH ROW EXECUTE FUNCTION posts_sync_partitioned()"
+    )
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(
+            sa.text("SELECT min(id), max(id) FROM posts")
+        ).one()
+        if low is not None:
+            for start in range(low, high + 1, BATCH_SIZE):
+                bind.execute(COPY_BATCH, {"low": start, "high": start + BATCH_SIZE})
+
+    op.execute("LOCK TABLE posts IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER posts_sync_partitioned ON posts")
+    op.execute("DROP FUNCTION posts_sync_partitioned()")
+    op.execute("ALTER TABLE posts RENAME TO posts_unpartitioned")
+    op.execute("ALTER TABLE posts_partitioned RENAME TO posts")
+    # the sequence belongs to the old table and would be dropped with it
+    op.execute("ALTER SEQUENCE posts_id_seq OWNED BY posts.id")
+    op.execute("DROP TABLE posts_unpartitioned")
+    op.execute("ALTER INDEX ix_posts_partitioned_id RENAME TO ix_posts_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if is_postgres() and is_partitioned():
+        op.execute("LOCK TABLE posts IN ACCESS EXCLUSIVE MODE")
+        op.execute(
+            """
+            CREATE TABLE posts_unpartitioned (
+                id integer NOT NULL DEFAULT nextval('posts_id_seq') PRIMARY KEY,
+                title varchar NOT NULL,
+                content varchar NOT NULL,
+                owner_id integer NOT NULL REFERENCES users (id)
+            )
+            """
+        )
+        op.execute(
+            "INSERT INTO posts_unpartitioned (id, title, content, owner_id) "
+            "SELECT id, title, content, owner_id FROM posts"
+        )
+        op.execute("ALTER TABLE posts RENAME TO posts_partitioned")
+        op.execute("ALTER TABLE posts_unpartitioned RENAME TO posts")
+        op.execute("ALTER SEQUENCE posts_id_seq OWNED BY posts.id")
+        op.execute("DROP TABLE posts_partitioned")
+        op.create_index(op.f('ix_posts_id'), 'posts', ['id'], unique=False)
+        return
+
+    op.drop_index('ix_posts_owner_id_id', table_name='posts')
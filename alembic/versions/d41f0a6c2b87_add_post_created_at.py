@@ -0,0 +1,48 @@
+"""add post created_at
+
+Revision ID: d41f0a6c2b87
+Revises: 7b2e4c91d0af
+Create Date: 2026-10-19 13:00:00.000000
+
+now() is stable, so Postgres adds the column without rewriting the table;
+existing posts all get the migration time. The feed index is built
+concurrently, per partition when posts is partitioned.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.models.online_migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f0a6c2b87'
+down_revision: Union[str, Sequence[str], None] = '7b2e4c91d0af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_posts_created_at_id"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'posts',
+        sa.Column(
+            'created_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+    )
+    create_index_concurrently(INDEX, 'posts', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently(INDEX, 'posts')
+    op.drop_column('posts', 'created_at')
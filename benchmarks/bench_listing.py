@@ -0,0 +1,112 @@
+"""Memory and CPU per row of GET /posts, ORM instances vs row objects.
+
+    python -m benchmarks.bench_listing [--url sqlite://] [--rows 5000]
+
+The ORM path is what get_all_posts did before: load Post instances, then
+jsonable_encoder and JSONResponse. The row path is get_all_posts today,
+rendered with RowsResponse. "kept" is the memory the loaded listing holds
+until the response is built, "peak" the most allocated at once while
+loading and serializing it.
+"""
+
+import argparse
+import timeit
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import bindparam, create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.models.databases import Base
+from src.models.post import Post
+from src.models.user import User
+from src.services import post_services
+from src.services.rows import RowsResponse
+
+EMAIL = "bench@example.com"
+POSTS_BY_OWNER = select(Post).where(Post.owner_id == bindparam("owner_id"))
+
+
+def setup(url, rows):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    with Session() as db:
+        user = User(name="Bench", email=EMAIL, password="x")
+        db.add(user)
+        db.flush()
+        db.add_all(
+            Post(
+                title=f"Post {i}",
+                content="Body " * 100,
+                owner_id=user.id,
+                tags=["bench", f"t{i % 10}"],
+            )
+            for i in range(rows)
+        )
+        db.commit()
+    return Session
+
+
+def load_orm(db):
+    owner_id = post_services.get_owner_id(EMAIL, db)
+    return db.scalars(POSTS_BY_OWNER, {"owner_id": owner_id}).all()
+
+
+def render_orm(posts):
+    content = {"message": "Posts retrieved successfully", "posts": posts}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def load_rows(db):
+    return post_services.get_all_posts(EMAIL, db)
+
+
+def render_rows(posts):
+    content = {"message": "Posts retrieved successfully", "posts": posts}
+    return RowsResponse(content).body
+
+
+def measure(Session, load, render, rows):
+    def request():
+        with Session() as db:
+            return render(load(db))
+
+    request()
+    seconds = min(timeit.repeat(request, number=1, repeat=5))
+
+    with Session() as db:
+        tracemalloc.start()
+        posts = load(db)
+        kept = tracemalloc.get_traced_memory()[0]
+        render(posts)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds / rows * 1e6, kept / rows, peak / rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    Session = setup(args.url, args.rows)
+    results = {
+        "orm": measure(Session, load_orm, render_orm, args.rows),
+        "rows": measure(Session, load_rows, render_rows, args.rows),
+    }
+
+    print(f"{'path':<8}{'cpu (us/row)':>14}{'kept (B/row)':>14}{'peak (B/row)':>14}")
+    for name, (cpu, kept, peak) in results.items():
+        print(f"{name:<8}{cpu:>14.1f}{kept:>14.0f}{peak:>14.0f}")
+    orm, rows = results["orm"], results["rows"]
+    print(
+        f"rows use {rows[0] / orm[0]:.0%} of the CPU, {rows[1] / orm[1]:.0%} "
+        f"of the kept and {rows[2] / orm[2]:.0%} of the peak memory"
+    )
+
+
+if __name__ == "__main__":
+    main()
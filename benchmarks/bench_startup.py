@@ -0,0 +1,78 @@
+"""Cold start: time to import src.main and to serve the first request.
+
+    python -m benchmarks.bench_startup [--runs 5]
+
+Every run is a fresh interpreter. The first request includes the lifespan
+(engine creation, logging setup) and the whole middleware stack. Run with
+`python -X importtime -c "import src.main"` to see where import time goes.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# kept out of `import src.main`, loaded by the lifespan or on first use. The
+# postgresql dialect module is not: the posts GIN index is declared with it.
+DEFERRED_MODULES = (
+    "psycopg2",
+    "src.services.import_services",
+)
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+loaded = [name for name in {deferred!r} if name in sys.modules]
+from fastapi.testclient import TestClient
+ready = time.perf_counter()
+with TestClient(src.main.app) as client:
+    status = client.get("/.well-known/jwks.json").status_code
+served = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "first_request": served - ready,
+    "status": status,
+    "loaded_at_import": loaded,
+}}))
+"""
+
+
+def measure(env=None):
+    # a throwaway database; the lifespan builds its engine but never connects
+    env = {
+        **os.environ,
+        "DATABASE_URL": "sqlite://",
+        "PUBSUB_BACKEND": "memory",
+        **(env or {}),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(deferred=DEFERRED_MODULES)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    print(f"{'phase':<16}{'best (ms)':>12}{'median (ms)':>14}")
+    for phase in ("import", "first_request"):
+        times = sorted(run[phase] * 1000 for run in runs)
+        print(f"{phase:<16}{times[0]:>12.1f}{times[len(times) // 2]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-call overhead of the service lookups, legacy Query vs prebuilt select().
+
+    python -m benchmarks.bench_statements [--url sqlite://] [--calls 5000]
+
+Runs against an in-memory SQLite database by default so the numbers are
+dominated by SQLAlchemy overhead rather than network round trips.
+"""
+
+import argparse
+import timeit
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.databases import Base
+from src.models.post import Post
+from src.models.user import User
+from src.services import auth_service, post_services
+
+EMAIL = "bench@example.com"
+
+
+def legacy_get_user_by_email(email, db):
+    return db.query(User).filter(User.email == email).first()
+
+
+def legacy_get_post(user_email, post_id, db):
+    user = db.query(User).filter(User.email == user_email).first()
+    return db.query(Post).filter(Post.id == post_id, Post.owner_id == user.id).first()
+
+
+def setup(url):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    user = User(name="Bench", email=EMAIL, password="x")
+    db.add(user)
+    db.flush()
+    post = Post(title="Title", content="Body " * 100, owner_id=user.id)
+    db.add(post)
+    db.commit()
+    return db, post.id
+
+
+def per_call_us(fn, calls):
+    fn()
+    best = min(timeit.repeat(fn, number=calls, repeat=5))
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    db, post_id = setup(args.url)
+    cases = {
+        "get_user_by_email": (
+            lambda: legacy_get_user_by_email(EMAIL, db),
+            lambda: auth_service.get_user_by_email(EMAIL, db),
+        ),
+        "get_post": (
+            lambda: legacy_get_post(EMAIL, post_id, db),
+            lambda: post_services.get_post(EMAIL, post_id, db),
+        ),
+    }
+
+    print(f"{'lookup':<20}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, (before, after) in cases.items():
+        b = per_call_us(before, args.calls)
+        a = per_call_us(after, args.calls)
+        print(f"{name:<20}{b:>14.1f}{a:>14.1f}{b / a:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from src.models.databases import get_db
-from src.services import admin_services
+from src.core import metrics
+from src.core.lazy import LazyModule
+from src.middleware.access_log import route_stats
+from src.models.databases import SessionLocal, get_db, get_read_db
+from src.schemas.auth_schemas import USER_FIELDS
+from src.schemas.field_schemas import FieldSelection, IdSelection
+from src.schemas.import_schemas import ImportFormat, ImportKind
+from src.schemas.post_schemas import POST_FIELDS
+from src.services import (
+    admin_services,
+    audit_services,
+    feed_services,
+    profiling_services,
+)
+from src.services.rows import RowsResponse
+
+# the bulk import pipeline loads with the first import request
+import_services = LazyModule("src.services.import_services")
 
 router = APIRouter()
 
+user_fields = FieldSelection(USER_FIELDS)
+post_fields = FieldSelection(POST_FIELDS)
+user_ids = IdSelection()
+
 
 @router.get("/users")
 async def get_users(
-    email: str = Depends(admin_services.getCurrentAdmin), db: Session = Depends(get_db)
+    ids: list | None = Depends(user_ids),
+    fields: tuple | None = Depends(user_fields),
+    email: str = Depends(admin_services.getCurrentAdmin),
+    db: Session = Depends(get_read_db),
 ):
-    users = admin_services.get_user_for_admin(db)
-    return {"message": "Get users", "users": users}
+    if ids is not None:
+        users, not_found = admin_services.get_users_by_ids(ids, db, fields=fields)
+        return {"message": "Get users", "users": users, "not_found": not_found}
+    users = admin_services.get_user_for_admin(db, fields=fields)
+    return RowsResponse({"message": "Get users", "users": users})
 
 
 @router.patch("/users/{user_id}/promote")
@@ -22,6 +50,7 @@ async def update_user(
     db: Session = Depends(get_db),
 ):
     user = admin_services.user_promote(user_id, db)
+    audit_services.trail.record(email, "user_promote", user_id)
     return {"message": user.email + " promoted to admin", "user": user}
 
 
@@ -32,14 +61,116 @@ async def delete_user(
     db: Session = Depends(get_db),
 ):
     admin_services.delete_user(user_id, db)
+    audit_services.trail.record(email, "delete_user", user_id)
     return {"message": "User deleted successfully"}
 
 
+# sync so concurrent lookups run in the threadpool and can be coalesced
 @router.get("/users/{user_id}")
-async def get_user(
+def get_user(
     user_id: int,
+    fields: tuple | None = Depends(user_fields),
     email: str = Depends(admin_services.getCurrentAdmin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    user = admin_services.get_user_by_id(user_id, db)
+    user = admin_services.get_user_by_id(user_id, db, fields=fields)
     return {"message": "User found", "user": user}
+
+
+@router.get("/metrics")
+async def get_metrics(email: str = Depends(admin_services.getCurrentAdmin)):
+    return {"message": "Metrics", "metrics": metrics.snapshot()}
+
+
+# sync: sampling blocks for `seconds`, in the threadpool rather than the loop
+@router.get("/profile/cpu")
+def profile_cpu(
+    seconds: float = Query(5, gt=0, le=profiling_services.PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    include_idle: bool = False,
+    email: str = Depends(admin_services.getCurrentAdmin),
+):
+    stacks = profiling_services.sample_stacks(
+        seconds, interval_ms / 1000, include_idle=include_idle
+    )
+    if format == "collapsed":
+        return PlainTextResponse(profiling_services.collapsed(stacks))
+    return {
+        "message": "CPU profile",
+        "samples": sum(stacks.values()),
+        "stacks": [
+            {"stack": stack, "count": count} for stack, count in stacks.most_common()
+        ],
+    }
+
+
+@router.post("/profile/memory/start")
+def start_memory_profile(email: str = Depends(admin_services.getCurrentAdmin)):
+    status = profiling_services.start_memory_tracing()
+    return {"message": "Memory tracing started", "memory": status}
+
+
+@router.post("/profile/memory/stop")
+def stop_memory_profile(email: str = Depends(admin_services.getCurrentAdmin)):
+    status = profiling_services.stop_memory_tracing()
+    return {"message": "Memory tracing stopped", "memory": status}
+
+
+@router.get("/profile/memory")
+def memory_profile(
+    limit: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    diff: bool = False,
+    email: str = Depends(admin_services.getCurrentAdmin),
+):
+    snapshot = profiling_services.memory_snapshot(limit, group_by, diff)
+    return {"message": "Memory snapshot", "memory": snapshot}
+
+
+@router.get("/profile/slow")
+async def slow_requests(email: str = Depends(admin_services.getCurrentAdmin)):
+    return {"message": "Slowest requests", "routes": route_stats.slowest_requests()}
+
+
+@router.get("/posts")
+def get_posts(
+    limit: int = Query(
+        feed_services.FEED_PAGE_SIZE, ge=1, le=feed_services.FEED_MAX_PAGE_SIZE
+    ),
+    cursor: str | None = None,
+    fields: tuple | None = Depends(post_fields),
+    email: str = Depends(admin_services.getCurrentAdmin),
+    db: Session = Depends(get_read_db),
+):
+    posts, next_cursor = feed_services.get_feed(db, limit, cursor, fields=fields)
+    return {"message": "Get posts", "posts": posts, "next_cursor": next_cursor}
+
+
+# the body is the raw CSV or NDJSON file, streamed to a spool file
+@router.post("/import/{kind}", status_code=202)
+async def start_import(
+    kind: ImportKind,
+    request: Request,
+    format: ImportFormat = ImportFormat.csv,
+    email: str = Depends(admin_services.getCurrentAdmin),
+):
+    upload = await import_services.receive_upload(request.stream())
+    job = await run_in_threadpool(
+        import_services.start_import, kind, format, upload, SessionLocal
+    )
+    audit_services.trail.record(email, "start_import", job.id, kind=kind.value)
+    return {"message": "Import started", "job": job.report()}
+
+
+# on the primary, a job started a moment ago may not have reached a replica
+@router.get("/import/{job_id}")
+def get_import(
+    job_id: str,
+    email: str = Depends(admin_services.getCurrentAdmin),
+    db: Session = Depends(get_db),
+):
+    job = import_services.get_job(job_id, db)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return {"message": "Import status", "job": job}
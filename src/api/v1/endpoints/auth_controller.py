@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
-from src.models.databases import get_db
+from src.models.databases import get_db, get_read_db
 from src.schemas import auth_schemas
 from src.services import auth_service
 
@@ -62,7 +62,7 @@ async def logout(user_email: str = Depends(auth_service.getCurrentUser)):
 @router.get("/user")
 async def get_user(
     user_email: str = Depends(auth_service.getCurrentUser),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     user = auth_service.get_user_by_email(user_email, db)
     return {
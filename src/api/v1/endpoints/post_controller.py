@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from src.models.databases import get_db
-from src.schemas.post_schemas import PostCreate, PostUpdate
-from src.services import auth_service, post_services
+from src.models.databases import get_db, get_read_db
+from src.schemas.field_schemas import FieldSelection, IdSelection
+from src.schemas.post_schemas import POST_FIELDS, PostCreate, PostUpdate, TagSelection
+from src.services import auth_service, feed_services, post_events, post_services
+from src.services.rows import RowsResponse
 
 router = APIRouter()
 
+post_fields = FieldSelection(POST_FIELDS)
+post_ids = IdSelection()
+post_tags = TagSelection()
+
+EVENTS_HEARTBEAT_SECONDS = 15
+
 
 @router.post("/posts")
 def create_post(
@@ -18,18 +38,106 @@ def create_post(
     return {"message": "Post created successfully", "post": post}
 
 
+# declared before /posts/{post_id} so "tags" is not parsed as an id
+@router.get("/posts/tags")
+def get_tag_counts(
+    limit: int = Query(100, ge=1, le=1000),
+    user_email: str = Depends(auth_service.getCurrentUser),
+    db: Session = Depends(get_read_db),
+):
+    tags = post_services.get_tag_counts(user_email, db, limit)
+    return {"message": "Tags retrieved successfully", "tags": tags}
+
+
+# declared before /posts/{post_id} so "events" is not parsed as an id
+@router.get("/posts/events")
+async def stream_post_events(user_email: str = Depends(auth_service.getCurrentUser)):
+    subscription = post_events.broker.subscribe(user_email)
+
+    async def event_stream():
+        try:
+            yield ": connected\n\n"
+            async for event in subscription.events(EVENTS_HEARTBEAT_SECONDS):
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            post_events.broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def wait_for_disconnect(websocket: WebSocket):
+    # the feed is one-way, anything the client sends is ignored
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/posts/ws")
+async def post_events_websocket(websocket: WebSocket, token: str = Query(...)):
+    # browsers cannot set an Authorization header on websockets
+    try:
+        user_email = auth_service.decode_jwt(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = post_events.broker.subscribe(user_email)
+    disconnected = asyncio.create_task(wait_for_disconnect(websocket))
+    try:
+        async for event in subscription.events(EVENTS_HEARTBEAT_SECONDS):
+            if disconnected.done():
+                break
+            if event is not None:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        post_events.broker.unsubscribe(subscription)
+
+
 @router.get("/posts/{post_id}")
 def get_post(
     post_id: int,
+    fields: tuple | None = Depends(post_fields),
     user_email: str = Depends(auth_service.getCurrentUser),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    post = post_services.get_post(user_email, post_id, db)
+    post = post_services.get_post(user_email, post_id, db, fields=fields)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return {"message": "Post retrieved successfully", "post": post}
 
 
+@router.get("/posts/{post_id}/revisions")
+def get_post_revisions(
+    post_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    user_email: str = Depends(auth_service.getCurrentUser),
+    db: Session = Depends(get_read_db),
+):
+    revisions = post_services.get_revisions(user_email, post_id, db, limit)
+    return {"message": "Revisions retrieved successfully", "revisions": revisions}
+
+
+@router.get("/posts/{post_id}/revisions/{version}")
+def get_post_revision(
+    post_id: int,
+    version: int,
+    user_email: str = Depends(auth_service.getCurrentUser),
+    db: Session = Depends(get_read_db),
+):
+    revision = post_services.get_revision(user_email, post_id, version, db)
+    return {"message": "Revision retrieved successfully", "revision": revision}
+
+
 @router.put("/posts/{post_id}")
 def update_post(
     post_id: int,
@@ -57,8 +165,39 @@ def delete_post(
 
 @router.get("/posts")
 def get_posts(
+    ids: list | None = Depends(post_ids),
+    tags: tuple | None = Depends(post_tags),
+    fields: tuple | None = Depends(post_fields),
     user_email: str = Depends(auth_service.getCurrentUser),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+):
+    if ids is not None and tags is not None:
+        raise HTTPException(status_code=400, detail="Use either ids or tag, not both")
+    if ids is not None:
+        posts, not_found = post_services.get_posts_by_ids(
+            user_email, ids, db, fields=fields
+        )
+        return {
+            "message": "Posts retrieved successfully",
+            "posts": posts,
+            "not_found": not_found,
+        }
+    posts = post_services.get_all_posts(user_email, db, fields=fields, tags=tags)
+    return RowsResponse({"message": "Posts retrieved successfully", "posts": posts})
+
+
+@router.get("/feed")
+def get_feed(
+    limit: int = Query(
+        feed_services.FEED_PAGE_SIZE, ge=1, le=feed_services.FEED_MAX_PAGE_SIZE
+    ),
+    cursor: str | None = None,
+    user_email: str = Depends(auth_service.getCurrentUser),
+    db: Session = Depends(get_read_db),
 ):
-    posts = post_services.get_all_posts(user_email, db)
-    return {"message": "Posts retrieved successfully", "posts": posts}
+    posts, next_cursor = feed_services.get_feed(db, limit, cursor)
+    return {
+        "message": "Feed retrieved successfully",
+        "posts": posts,
+        "next_cursor": next_cursor,
+    }
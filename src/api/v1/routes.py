@@ -1,5 +1,3 @@
-from sys import prefix
-
 from fastapi import APIRouter
 
 from src.api.v1.endpoints import admin_controller, auth_controller, post_controller
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Request, Response
+
+from src.core.keyring import JWKS_MAX_AGE, get_keyring
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+EMPTY_JWKS = b'{"keys":[]}'
+
+
+@router.get("/jwks.json")
+def jwks(request: Request):
+    # the document is built once per keyring; verifiers cache it for max-age
+    # and revalidate with If-None-Match
+    keyring = get_keyring()
+    body, etag = (keyring.jwks, keyring.etag) if keyring else (EMPTY_JWKS, '"empty"')
+    headers = {"Cache-Control": f"public, max-age={JWKS_MAX_AGE}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,54 @@
+"""Generate a JWT signing key for the keyring.
+
+    python -m src.cli.keygen keys/ --kid 2026-10 --algorithm EdDSA
+
+Writes keys/<kid>.pem. A lone private key signs; once there are several,
+JWT_ACTIVE_KID must name the one that does. To rotate without invalidating
+tokens:
+
+1. add the new key with JWT_ACTIVE_KID still naming the current one, and
+   roll it out; it is published in /.well-known/jwks.json but signs nothing
+2. after JWKS_MAX_AGE, once verifiers have fetched it, set JWT_ACTIVE_KID
+   to the new kid and roll out again
+3. after REFRESH_TOKEN_EXPIRE_DAYS, delete the old key file
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+
+from src.core.keyring import EDDSA, ES256, generate_key
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument(
+        "--kid", default=datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    )
+    parser.add_argument("-a", "--algorithm", choices=[EDDSA, ES256], default=EDDSA)
+    args = parser.parse_args(argv)
+
+    path = Path(args.directory) / f"{args.kid}.pem"
+    if path.exists():
+        print(f"{path} already exists", file=sys.stderr)
+        return 1
+    pem = generate_key(args.algorithm).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as file:
+        file.write(pem)
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Fill the database with synthetic users and posts for capacity testing.
+
+    python -m src.cli.seed --users 100000 --posts-per-user 20 --seed 42
+
+The same seed always produces the same rows. Every user shares one password
+(--password), hashed once, so seeding is bound by the database rather than
+Argon2. Posts per user and post lengths follow log-normal distributions, a
+few prolific users and a long tail of short posts, like real traffic. Rows
+are written with COPY on Postgres and batched inserts elsewhere.
+"""
+
+import argparse
+import hashlib
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from argon2 import PasswordHasher
+from sqlalchemy import select
+
+from src.models.databases import get_engine
+from src.models.post import Post
+from src.models.user import User
+from src.schemas.post_schemas import POST_CONTENT_MAX_LENGTH, POST_TITLE_MAX_LENGTH
+from src.services.import_services import batched, copy_rows
+
+# fixed so a seed reproduces the same timestamps whenever it is run
+SEED_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+WORDS = (
+    "api cache query index latency request worker pool replica shard "
+    "deploy release metric trace span token session commit rollback "
+    "vacuum partition backup schema migration feature bug fix review "
+    "the a of and to in is for on with that this from by at as"
+).split()
+FIRST_NAMES = "Ada Alan Barbara Dennis Edsger Grace Guido Ken Linus Margaret".split()
+LAST_NAMES = "Hopper Lovelace Liskov Ritchie Thompson Torvalds Turing Knuth".split()
+
+USER_COLUMNS = ["name", "email", "password", "role"]
+POST_COLUMNS = ["title", "content", "owner_id", "created_at"]
+
+
+def lognormal(rng: random.Random, mean: float, sigma: float) -> float:
+    # mu chosen so the distribution's mean, not its median, is `mean`
+    return rng.lognormvariate(math.log(mean) - sigma**2 / 2, sigma)
+
+
+def words(rng: random.Random, length: int) -> str:
+    text = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        text.append(word)
+        size += len(word) + 1
+    return " ".join(text)[:length]
+
+
+def make_user(rng: random.Random, index: int, password_hash: str):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return (name, f"user{index}@seed.example", password_hash, "user")
+
+
+def make_posts(rng: random.Random, owner_id: int, mean_posts: float, days: int):
+    count = int(lognormal(rng, mean_posts, 1.0)) if mean_posts > 0 else 0
+    for _ in range(count):
+        title_length = min(POST_TITLE_MAX_LENGTH, max(8, int(rng.gauss(50, 20))))
+        content_length = min(
+            POST_CONTENT_MAX_LENGTH, max(20, int(lognormal(rng, 1200, 1.0)))
+        )
+        created_at = SEED_EPOCH - timedelta(seconds=rng.uniform(0, days * 86400))
+        yield (
+            words(rng, title_length).capitalize(),
+            words(rng, content_length),
+            owner_id,
+            created_at,
+        )
+
+
+def seed(
+    engine,
+    users: int,
+    posts_per_user: float,
+    seed: int = 0,
+    password: str = "password",
+    batch_size: int = 5000,
+    days: int = 365,
+    start: int = 0,
+    on_batch=None,
+):
+    rng = random.Random(seed)
+    # a salt derived from the seed keeps even the password hash reproducible
+    salt = hashlib.sha256(f"seed-{seed}".encode()).digest()[:16]
+    password_hash = PasswordHasher().hash(password, salt=salt)
+
+    totals = {"users": 0, "posts": 0}
+    indexes = range(start, start + users)
+    for batch in batched(indexes, batch_size):
+        rows = [make_user(rng, index, password_hash) for index in batch]
+        with engine.begin() as conn:
+            copy_rows(conn, User.__table__, rows, USER_COLUMNS)
+            emails = [row[1] for row in rows]
+            ids = dict(
+                conn.execute(
+                    select(User.email, User.id).where(User.email.in_(emails))
+                ).all()
+            )
+            posts = [
+                post
+                for email in emails
+                for post in make_posts(rng, ids[email], posts_per_user, days)
+            ]
+            for chunk in batched(posts, batch_size):
+                copy_rows(conn, Post.__table__, chunk, POST_COLUMNS)
+        totals["users"] += len(rows)
+        totals["posts"] += len(posts)
+        if on_batch is not None:
+            on_batch(totals)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts-per-user", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument(
+        "--start", type=int, default=0, help="first user index, to add to a seeded db"
+    )
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+
+    def progress(totals):
+        elapsed = time.monotonic() - started
+        print(
+            f"{totals['users']} users  {totals['posts']} posts  "
+            f"{totals['users'] / elapsed:.0f} users/s",
+            file=sys.stderr,
+        )
+
+    seed(
+        get_engine(),
+        args.users,
+        args.posts_per_user,
+        seed=args.seed,
+        password=args.password,
+        batch_size=args.batch_size,
+        days=args.days,
+        start=args.start,
+        on_batch=progress,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
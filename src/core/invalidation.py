@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from src.core import metrics
+from src.core.pubsub import pubsub
+from src.core.settings import settings
+
+CHANNEL = "cache_invalidation"
+CACHE_MAX_STALENESS = settings.get_float("CACHE_MAX_STALENESS", 30)
+
+
+class InvalidationBus:
+    """Tells every worker's local caches that a key changed.
+
+    publish(namespace, key, db=session) is delivered after the session
+    commits, to this worker and all others; key None drops the namespace.
+    When the listener reconnects, notifications may have been lost, so every
+    namespace is dropped.
+    """
+
+    def __init__(self, pubsub, channel: str = CHANNEL):
+        self.pubsub = pubsub
+        self.channel = channel
+        self._handlers = {}
+        self._listening = False
+        self._lock = threading.Lock()
+        self.counters = metrics.Counter("published", "received")
+
+    @property
+    def healthy(self) -> bool:
+        return self.pubsub.connected
+
+    def register(self, namespace: str, handler):
+        # handler(key) runs on the listener thread, key None means everything
+        with self._lock:
+            self._handlers.setdefault(namespace, []).append(handler)
+
+    def listen(self):
+        # deferred so importing a cache does not start the listener thread
+        with self._lock:
+            if self._listening:
+                return
+            self._listening = True
+        self.pubsub.subscribe(self.channel, self._dispatch)
+        self.pubsub.on_reconnect(self._drop_everything)
+
+    def publish(self, namespace: str, key=None, db=None):
+        # this worker forgets right away; the notification repeats it after
+        # commit, discarding anything refilled from the old row meanwhile
+        self._handle(namespace, key)
+        payload = json.dumps({"ns": namespace, "key": key})
+        self.pubsub.publish(self.channel, payload, db=db)
+        self.counters.incr("published")
+
+    def _dispatch(self, payload):
+        message = json.loads(payload)
+        self.counters.incr("received")
+        self._handle(message["ns"], message["key"])
+
+    def _handle(self, namespace, key):
+        with self._lock:
+            handlers = list(self._handlers.get(namespace, ()))
+        for handler in handlers:
+            handler(key)
+
+    def _drop_everything(self):
+        with self._lock:
+            handlers = [h for hs in self._handlers.values() for h in hs]
+        for handler in handlers:
+            handler(None)
+
+
+class VersionedCache:
+    """Worker-local LRU cache kept coherent through an InvalidationBus.
+
+    Entries live at most `ttl` seconds, which bounds staleness even if a
+    notification is lost. While the bus is disconnected the cache is bypassed.
+    Every invalidation advances a version counter; a load that started before
+    an invalidation of its key is not stored, so a slow read of the old row
+    cannot re-populate the cache after the write.
+    """
+
+    def __init__(
+        self,
+        bus: InvalidationBus,
+        namespace: str,
+        max_entries: int = 10000,
+        ttl: float = CACHE_MAX_STALENESS,
+    ):
+        self.bus = bus
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # key -> version of its latest invalidation, trimmed like the entries
+        self._invalidated = OrderedDict()
+        self._version = 0
+        # versions at or below this may have had their record trimmed
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.counters = metrics.Counter("hits", "misses", "bypassed", "invalidations")
+        bus.register(namespace, self.invalidate)
+        metrics.register(f"cache_{namespace}", self.stats)
+
+    def get_or_load(self, key, loader):
+        self.bus.listen()
+        if not self.bus.healthy:
+            self.counters.incr("bypassed")
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.counters.incr("hits")
+                return entry[0]
+            version = self._version
+
+        self.counters.incr("misses")
+        value = loader()
+        with self._lock:
+            if version >= max(self._floor, self._invalidated.get(key, 0)):
+                self._entries[key] = (value, now + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._version += 1
+            self.counters.incr("invalidations")
+            if key is None:
+                self._entries.clear()
+                self._invalidated.clear()
+                self._floor = self._version
+                return
+            self._entries.pop(key, None)
+            self._invalidated[key] = self._version
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.max_entries:
+                _, trimmed = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, trimmed)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"size": size, **self.counters.values()}
+
+
+bus = InvalidationBus(pubsub)
+metrics.register("invalidation_bus", bus.counters.values)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+from src.core.settings import settings
+
+JWT_KEYS_DIR = settings.get("JWT_KEYS_DIR")
+JWT_ACTIVE_KID = settings.get("JWT_ACTIVE_KID")
+JWKS_MAX_AGE = settings.get_int("JWKS_MAX_AGE", 300)
+
+EDDSA, ES256 = "EdDSA", "ES256"
+
+
+def algorithm_for(key) -> str:
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return EDDSA
+    if isinstance(
+        key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)
+    ) and isinstance(key.curve, ec.SECP256R1):
+        return ES256
+    raise ValueError("JWT keys must be Ed25519 or EC P-256")
+
+
+def generate_key(algorithm: str = EDDSA):
+    if algorithm == EDDSA:
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == ES256:
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Unsupported algorithm {algorithm}")
+
+
+class Keyring:
+    """Asymmetric keys that sign and verify tokens, looked up by `kid`.
+
+    `keys` maps kid -> private or public key object, parsed once. Tokens are
+    signed with the active key, which must be named once the ring holds more
+    than one private key; any key in the ring verifies, so a new key can be
+    published before it signs and an old one kept until its tokens have
+    expired. The public half of every key is served as a JWKS document,
+    serialized once per ring.
+    """
+
+    def __init__(self, keys: dict, active_kid: str | None = None):
+        self._verifiers = {}
+        for kid, key in keys.items():
+            public = key.public_key() if hasattr(key, "public_key") else key
+            self._verifiers[kid] = (public, algorithm_for(key))
+
+        signers = sorted(kid for kid, key in keys.items() if hasattr(key, "sign"))
+        if active_kid is None and len(signers) > 1:
+            # guessing would let a key sign before verifiers have fetched it
+            raise ValueError(
+                f"JWT_ACTIVE_KID must name the signing key, one of {signers}"
+            )
+        if active_kid is None and signers:
+            active_kid = signers[0]
+        if active_kid is not None and active_kid not in signers:
+            raise ValueError(f"No private key for active kid {active_kid}")
+        self.active_kid = active_kid
+        self._signer = keys[active_kid] if active_kid is not None else None
+
+        self.jwks = json.dumps(
+            {"keys": [self._jwk(kid) for kid in sorted(self._verifiers)]},
+            separators=(",", ":"),
+        ).encode()
+        self.etag = '"' + hashlib.sha256(self.jwks).hexdigest()[:16] + '"'
+
+    @classmethod
+    def from_directory(cls, path, active_kid: str | None = None):
+        # <kid>.pem holds a PEM private key, or a public key for a kid that
+        # only verifies (signed elsewhere or already retired here)
+        keys = {}
+        for file in sorted(Path(path).glob("*.pem")):
+            data = file.read_bytes()
+            if b"PRIVATE KEY" in data:
+                key = serialization.load_pem_private_key(data, password=None)
+            else:
+                key = serialization.load_pem_public_key(data)
+            keys[file.stem] = key
+        return cls(keys, active_kid)
+
+    def __contains__(self, kid) -> bool:
+        return kid in self._verifiers
+
+    def sign(self, payload: dict) -> str:
+        if self._signer is None:
+            raise RuntimeError("Keyring has no signing key")
+        algorithm = self._verifiers[self.active_kid][1]
+        return jwt.encode(
+            payload, self._signer, algorithm, headers={"kid": self.active_kid}
+        )
+
+    def verify(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid not in self._verifiers:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        public, algorithm = self._verifiers[kid]
+        return jwt.decode(token, public, algorithms=[algorithm])
+
+    def _jwk(self, kid):
+        public, algorithm = self._verifiers[kid]
+        encoder = OKPAlgorithm if algorithm == EDDSA else ECAlgorithm
+        jwk = encoder.to_jwk(public, as_dict=True)
+        return {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+
+
+_keyring = None
+_keyring_lock = threading.Lock()
+
+
+def get_keyring() -> Keyring | None:
+    """The process keyring from JWT_KEYS_DIR, None when it is not set."""
+    global _keyring
+    if JWT_KEYS_DIR is None:
+        return None
+    if _keyring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                _keyring = Keyring.from_directory(JWT_KEYS_DIR, JWT_ACTIVE_KID)
+    return _keyring
@@ -0,0 +1,20 @@
+import importlib
+import sys
+
+
+class LazyModule:
+    """A module that is only imported on first attribute access.
+
+    For heavy modules behind rarely used endpoints, so they cost nothing
+    at startup.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def loaded(self) -> bool:
+        return self.name in sys.modules
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.name), attr)
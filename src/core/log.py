@@ -0,0 +1,100 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+from src.core import metrics
+from src.core.settings import settings
+
+LOG_LEVEL = settings.get("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = settings.get_int("LOG_QUEUE_SIZE", 10000)
+
+# LogRecord attributes that are not user fields passed with extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with extra= become keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to a bounded queue; drops them rather than block when full."""
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+def setup_logging(level: str = LOG_LEVEL, stream=None):
+    """Send all logging through a queue drained by one background thread.
+
+    Callers, including async handlers, only pay for building the record; the
+    JSON formatting and the write happen on the listener thread. Calling it
+    again is a no-op until shutdown_logging().
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter())
+        _handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(_handler.queue, output)
+        _listener.start()
+
+        root = logging.getLogger()
+        root.handlers = [_handler]
+        root.setLevel(level)
+
+
+def shutdown_logging():
+    # stop() drains what is queued before returning
+    global _listener, _handler
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger().removeHandler(_handler)
+        _listener = _handler = None
+
+
+def stats():
+    handler = _handler
+    if handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": handler.queue.qsize(),
+        "dropped": handler.dropped,
+    }
+
+
+metrics.register("logging", stats)
+
@@ -0,0 +1,37 @@
+import threading
+
+# name -> zero-argument callable returning a JSON-serialisable dict
+_collectors = {}
+_lock = threading.Lock()
+
+
+def register(name: str, collector):
+    with _lock:
+        _collectors[name] = collector
+
+
+def unregister(name: str):
+    with _lock:
+        _collectors.pop(name, None)
+
+
+def snapshot():
+    with _lock:
+        collectors = dict(_collectors)
+    return {name: collector() for name, collector in collectors.items()}
+
+
+class Counter:
+    """Thread-safe group of named integer counters."""
+
+    def __init__(self, *names):
+        self._values = dict.fromkeys(names, 0)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
@@ -0,0 +1,207 @@
+import select
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+
+from src.core.settings import settings
+from src.models.databases import DATABASE_URL, get_engine
+from src.models.routing import RoutingSession
+
+PUBSUB_BACKEND = settings.get(
+    "PUBSUB_BACKEND", "postgres" if DATABASE_URL.startswith("postgresql") else "memory"
+)
+
+
+class _Subscriber:
+    def __init__(self, callback, loop):
+        self.callback = callback
+        self.loop = loop
+
+    def deliver(self, payload):
+        # publishers run in threadpool workers, callbacks belong to an event loop
+        if self.loop is None:
+            self.callback(payload)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.callback, payload)
+
+
+class PubSub(ABC):
+    """Channel fan-out shared by every subscriber in the worker.
+
+    publish(channel, payload, db=session) ties delivery to the session's
+    commit: nothing is delivered if the transaction rolls back. Backends
+    implement publish and, when delivery comes from elsewhere, _listen.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._reconnect_callbacks = []
+        self.connected = True
+        self.last_healthy = time.monotonic()
+
+    def subscribe(self, channel, callback, loop=None):
+        # without a loop the callback runs on whichever thread dispatches
+        subscriber = _Subscriber(callback, loop)
+        with self._lock:
+            first = channel not in self._channels
+            self._channels.setdefault(channel, set()).add(subscriber)
+        if first:
+            self._listen(channel)
+
+        def unsubscribe():
+            with self._lock:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+
+        return unsubscribe
+
+    def on_reconnect(self, callback):
+        # notifications may have been missed while the listener was down
+        self._reconnect_callbacks.append(callback)
+
+    def dispatch(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.deliver(payload)
+
+    @abstractmethod
+    def publish(self, channel, payload, db=None):
+        """Deliver `payload` to the channel's subscribers in every worker."""
+
+    def _listen(self, channel):
+        pass
+
+    def close(self):
+        pass
+
+
+class InMemoryPubSub(PubSub):
+    def publish(self, channel, payload, db=None):
+        if db is None:
+            self.dispatch(channel, payload)
+        else:
+            db.info.setdefault("pending_notifications", []).append(
+                (self, channel, payload)
+            )
+
+
+class PostgresPubSub(PubSub):
+    """LISTEN/NOTIFY over one dedicated connection per worker."""
+
+    def __init__(self, engine=None, reconnect_delay: float = 1.0):
+        super().__init__()
+        self._engine = engine
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._ever_connected = False
+        self._conn = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._conn_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        # the app engine only exists once init_db has run
+        return self._engine or get_engine()
+
+    def publish(self, channel, payload, db=None):
+        stmt = sql_select(func.pg_notify(channel, payload))
+        if db is not None:
+            # delivered by Postgres when the surrounding transaction commits
+            db.execute(stmt)
+            return
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def _listen(self, channel):
+        with self._conn_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pg-listener", daemon=True
+                )
+                self._thread.start()
+            elif self._conn is not None:
+                self._execute_listen(self._conn, channel)
+
+    def _execute_listen(self, conn, channel):
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{channel}"')
+
+    def _connect(self):
+        conn = self.engine.raw_connection()
+        # owned by the listener for its whole life, not returned to the pool
+        conn.detach()
+        dbapi_conn = conn.dbapi_connection
+        dbapi_conn.autocommit = True
+        with self._lock:
+            channels = list(self._channels)
+        for channel in channels:
+            self._execute_listen(dbapi_conn, channel)
+        return dbapi_conn
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                with self._conn_lock:
+                    self._conn = self._connect()
+                reconnected = self._ever_connected
+                self._ever_connected = self.connected = True
+                if reconnected:
+                    for callback in self._reconnect_callbacks:
+                        callback()
+                self._poll(self._conn)
+            except Exception:
+                pass
+            self.connected = False
+            with self._conn_lock:
+                if self._conn is not None:
+                    try:
+                        self._conn.close()
+                    except Exception:
+                        pass
+                    self._conn = None
+            self._stopped.wait(self.reconnect_delay)
+
+    def _poll(self, conn):
+        while not self._stopped.is_set():
+            self.last_healthy = time.monotonic()
+            # LISTEN from another thread may already have buffered notifications
+            if not conn.notifies:
+                readable, _, _ = select.select([conn], [], [], 1.0)
+                if not readable:
+                    continue
+            conn.poll()
+            while conn.notifies:
+                notification = conn.notifies.pop(0)
+                self.dispatch(notification.channel, notification.payload)
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _deliver_pending(session):
+    for pubsub, channel, payload in session.info.pop("pending_notifications", ()):
+        pubsub.dispatch(channel, payload)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("pending_notifications", None)
+
+
+def create_pubsub(backend: str = PUBSUB_BACKEND):
+    if backend == "postgres":
+        return PostgresPubSub()
+    return InMemoryPubSub()
+
+
+pubsub = create_pubsub()
@@ -0,0 +1,46 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+
+class Settings:
+    """Configuration from the environment, with `.env` filling the gaps.
+
+    `.env` is read once, on the first lookup, instead of by every module
+    that happens to be imported first. Variables already set in the
+    environment win over the file.
+    """
+
+    def __init__(self, env_file: str | None = None):
+        self.env_file = env_file
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                load_dotenv(self.env_file)
+                self._loaded = True
+
+    def get(self, name: str, default=None):
+        self._load()
+        return os.environ.get(name, default)
+
+    def get_int(self, name: str, default: int | None = None):
+        value = self.get(name)
+        return default if value is None else int(value)
+
+    def get_float(self, name: str, default: float | None = None):
+        value = self.get(name)
+        return default if value is None else float(value)
+
+    def get_list(self, name: str):
+        # comma separated, blanks dropped
+        value = self.get(name, "")
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+
+settings = Settings()
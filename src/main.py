@@ -1,12 +1,124 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
 
+from src.api import well_known
 from src.api.v1 import routes
+from src.core import metrics
+from src.core.invalidation import bus
+from src.core.lazy import LazyModule
+from src.core.log import setup_logging, shutdown_logging
+from src.core.pubsub import pubsub
+from src.core.settings import settings
+from src.middleware.access_log import AccessLogMiddleware, route_stats
+from src.middleware.body_limit import BodySizeLimitMiddleware
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.concurrency import AdaptiveLimit, ConcurrencyLimitMiddleware
+from src.middleware.deadline import DeadlineMiddleware
+from src.middleware.idempotency import IdempotencyMiddleware
+from src.middleware.read_your_writes import ReadYourWritesMiddleware, RecentWriters
+from src.middleware.response_cache import ResponseCache, ResponseCacheMiddleware
+from src.models.databases import init_db, is_statement_timeout
+from src.services import audit_services, auth_service
+from src.services.idempotency_services import IdempotencyStore
 
-app = FastAPI()
+COMPRESSION_MINIMUM_SIZE = settings.get_int("COMPRESSION_MINIMUM_SIZE", 500)
+RESPONSE_CACHE_TTL = settings.get_float("RESPONSE_CACHE_TTL", 5)
+RESPONSE_CACHE_MAX_ENTRIES = settings.get_int("RESPONSE_CACHE_MAX_ENTRIES", 1024)
+MAX_REQUEST_BODY_SIZE = settings.get_int("MAX_REQUEST_BODY_SIZE", 512 * 1024)
+MAX_IMPORT_BODY_SIZE = settings.get_int("MAX_IMPORT_BODY_SIZE", 1024 * 1024 * 1024)
 
+import_services = LazyModule("src.services.import_services")
+
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl=RESPONSE_CACHE_TTL
+)
+
+
+def drop_responses(key):
+    # key is [path prefix, caller or None]; None when notifications were lost
+    if key is None:
+        response_cache.clear()
+    else:
+        response_cache.drop(*key)
+
+
+bus.register("responses", drop_responses)
+recent_writers = RecentWriters()
+
+
+def mark_writer(key):
+    # key is [caller, until]; marks lost with a reconnect simply expire
+    if key is not None:
+        recent_writers.mark(*key)
+
+
+bus.register("recent_writers", mark_writer)
+concurrency_limit = AdaptiveLimit()
+metrics.register("concurrency", concurrency_limit.stats)
+idempotency_store = IdempotencyStore()
+metrics.register("idempotency", idempotency_store.stats)
+metrics.register("routes", route_stats.snapshot)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    init_db()
+    # start receiving other workers' cache invalidations
+    bus.listen()
+    yield
+    if import_services.loaded:
+        import_services.shutdown()
+    audit_services.trail.shutdown()
+    pubsub.close()
+    shutdown_logging()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(OperationalError)
+async def statement_timeout_handler(request: Request, exc: OperationalError):
+    if not is_statement_timeout(exc):
+        raise exc
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+
+
+# middleware added last runs first:
+# access log -> CORS -> deadline -> read-your-writes -> idempotency -> response cache
+# -> concurrency limit -> compression -> body limit -> app; cache hits and
+# idempotent replays are served without taking a slot, and the deadline
+# includes time spent queued for one. Idempotency buffers bodies before the
+# body limit sees them, so it enforces the same limit itself.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=MAX_REQUEST_BODY_SIZE,
+    path_limits={"/api/v1/admin/import/": MAX_IMPORT_BODY_SIZE},
+)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+app.add_middleware(ConcurrencyLimitMiddleware, limiter=concurrency_limit)
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    invalidate=lambda prefix, caller: bus.publish("responses", [prefix, caller]),
+)
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=idempotency_store,
+    identify=auth_service.token_subject,
+    max_body_size=MAX_REQUEST_BODY_SIZE,
+)
+app.add_middleware(
+    ReadYourWritesMiddleware,
+    writers=recent_writers,
+    publish=lambda caller, until: bus.publish("recent_writers", [caller, until]),
+)
+app.add_middleware(DeadlineMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -14,5 +126,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(AccessLogMiddleware, stats=route_stats)
 
 app.include_router(routes.router)
+app.include_router(well_known.router)
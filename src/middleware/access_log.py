@@ -0,0 +1,155 @@
+import heapq
+import itertools
+import logging
+import random
+import re
+import threading
+import time
+
+from src.core.settings import settings
+
+ACCESS_LOG_SAMPLE_RATE = settings.get_float("ACCESS_LOG_SAMPLE_RATE", 0.01)
+# slower requests and server errors are always logged
+ACCESS_LOG_SLOW_SECONDS = settings.get_float("ACCESS_LOG_SLOW_SECONDS", 1.0)
+MAX_ROUTES = 500
+SLOWEST_KEPT = settings.get_int("SLOWEST_REQUESTS_KEPT", 5)
+
+# numeric ids and long hex / uuid tokens, so routes group by shape
+ID_SEGMENT = re.compile(r"/(?:\d+|[0-9a-fA-F-]{16,})(?=/|$)")
+
+logger = logging.getLogger("access")
+
+
+def route_of(path: str) -> str:
+    return ID_SEGMENT.sub("/{id}", path)
+
+
+class RouteStats:
+    """Request count, status classes and latency per method and route.
+
+    The `slowest` requests of each route are kept as samples.
+    """
+
+    def __init__(self, max_routes: int = MAX_ROUTES, slowest: int = SLOWEST_KEPT):
+        self.max_routes = max_routes
+        self.slowest = slowest
+        self._routes = {}
+        # route -> min-heap of (seconds, tie breaker, sample)
+        self._samples = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(
+        self, method: str, route: str, status: int, seconds: float, path=None
+    ):
+        key = f"{method} {route}"
+        with self._lock:
+            entry = self._routes.get(key)
+            if entry is None:
+                if len(self._routes) >= self.max_routes:
+                    key = "other"
+                    entry = self._routes.get(key)
+                if entry is None:
+                    entry = self._routes[key] = {
+                        "count": 0,
+                        "total_seconds": 0.0,
+                        "max_seconds": 0.0,
+                        "statuses": {},
+                    }
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            status_class = f"{status // 100}xx"
+            entry["statuses"][status_class] = entry["statuses"].get(status_class, 0) + 1
+
+            samples = self._samples.setdefault(key, [])
+            if len(samples) < self.slowest or seconds > samples[0][0]:
+                sample = {
+                    "path": path or route,
+                    "status": status,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "at": time.time(),
+                }
+                item = (seconds, next(self._counter), sample)
+                if len(samples) < self.slowest:
+                    heapq.heappush(samples, item)
+                else:
+                    heapq.heapreplace(samples, item)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: {
+                    "count": entry["count"],
+                    "mean_ms": round(entry["total_seconds"] / entry["count"] * 1000, 3),
+                    "max_ms": round(entry["max_seconds"] * 1000, 3),
+                    "statuses": dict(entry["statuses"]),
+                }
+                for key, entry in self._routes.items()
+            }
+
+    def slowest_requests(self):
+        with self._lock:
+            return {
+                key: [item[2] for item in sorted(samples, reverse=True)]
+                for key, samples in self._samples.items()
+            }
+
+
+route_stats = RouteStats()
+
+
+class AccessLogMiddleware:
+    """Times every request into RouteStats and logs a sample of them.
+
+    A `sample_rate` share of requests is logged, plus every server error and
+    every request slower than `slow_threshold`. Log records carry the sample
+    rate so counts can be scaled back up.
+    """
+
+    def __init__(
+        self,
+        app,
+        stats: RouteStats = route_stats,
+        sample_rate: float = ACCESS_LOG_SAMPLE_RATE,
+        slow_threshold: float = ACCESS_LOG_SLOW_SECONDS,
+    ):
+        self.app = app
+        self.stats = stats
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            route = route_of(scope["path"])
+            self.stats.record(scope["method"], route, status, seconds, scope["path"])
+
+            forced = status >= 500 or seconds >= self.slow_threshold
+            if forced or random.random() < self.sample_rate:
+                logger.info(
+                    "request",
+                    extra={
+                        "method": scope["method"],
+                        "route": route,
+                        "path": scope["path"],
+                        "status": status,
+                        "duration_ms": round(seconds * 1000, 3),
+                        "sample_rate": 1.0 if forced else self.sample_rate,
+                    },
+                )
@@ -0,0 +1,58 @@
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+DEFAULT_MAX_BODY_SIZE = 512 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """Rejects oversized request bodies with 413 before they are buffered.
+
+    A declared Content-Length over the limit is refused without reading the
+    body; chunked uploads are counted as they arrive and aborted as soon as
+    they cross it. `path_limits` maps path prefixes to their own limits.
+    """
+
+    def __init__(
+        self, app, max_body_size: int = DEFAULT_MAX_BODY_SIZE, path_limits=None
+    ):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_limits = path_limits or {}
+
+    def limit_for(self, path: str) -> int:
+        for prefix, limit in self.path_limits.items():
+            if path.startswith(prefix):
+                return limit
+        return self.max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size = self.limit_for(scope["path"])
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > max_body_size:
+                response = JSONResponse(
+                    {"detail": "Request body too large"}, status_code=413
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # FastAPI re-raises HTTPExceptions hit while reading the body
+                    raise HTTPException(
+                        status_code=413, detail="Request body too large"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
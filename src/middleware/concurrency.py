@@ -0,0 +1,179 @@
+import threading
+import time
+
+from starlette.responses import JSONResponse
+
+from src.core import metrics
+from src.core.settings import settings
+from src.middleware.access_log import MAX_ROUTES, route_of
+
+CONCURRENCY_INITIAL_LIMIT = settings.get_int("CONCURRENCY_INITIAL_LIMIT", 32)
+CONCURRENCY_MIN_LIMIT = settings.get_int("CONCURRENCY_MIN_LIMIT", 4)
+CONCURRENCY_MAX_LIMIT = settings.get_int("CONCURRENCY_MAX_LIMIT", 128)
+CONCURRENCY_LATENCY_TOLERANCE = settings.get_float("CONCURRENCY_LATENCY_TOLERANCE", 2.0)
+
+CRITICAL, NORMAL, WRITE, LOW = "critical", "normal", "write", "low"
+
+# share of the current limit each priority may fill; once in-flight requests
+# reach it, further requests of that priority get an immediate 503
+PRIORITY_SHARES = {CRITICAL: 1.0, NORMAL: 0.8, WRITE: 0.65, LOW: 0.5}
+
+MUTATIONS = ("POST", "PUT", "PATCH", "DELETE")
+
+# (path prefix, methods or None for any, priority), first match wins; reads
+# keep serving after writes are turned away
+DEFAULT_PRIORITY_RULES = (
+    ("/api/v1/auth/", None, CRITICAL),
+    ("/.well-known/", None, CRITICAL),
+    ("/api/v1/admin/metrics", None, CRITICAL),
+    ("/api/v1/admin/", None, LOW),
+    ("/", MUTATIONS, WRITE),
+)
+
+# long-lived streams and profiles would hold a slot for their whole life and
+# skew latency
+DEFAULT_EXEMPT_PATHS = ("/api/v1/posts/events", "/api/v1/admin/profile/cpu")
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit driven by observed latency.
+
+    Each route has its own baseline, so a slow-by-design route (password
+    hashing, imports, large listings) is only compared with itself and the
+    mix of routes alone never reads as congestion. A baseline tracks the
+    route's lowest recent latency and drifts up slowly so it follows genuine
+    changes in cost. Completions slower than `tolerance` x their baseline
+    (or that raised) shrink the limit by `backoff`, at most once per
+    limit-many completions; otherwise a saturated limit grows by roughly one
+    per round trip.
+    """
+
+    def __init__(
+        self,
+        initial: int = CONCURRENCY_INITIAL_LIMIT,
+        min_limit: int = CONCURRENCY_MIN_LIMIT,
+        max_limit: int = CONCURRENCY_MAX_LIMIT,
+        tolerance: float = CONCURRENCY_LATENCY_TOLERANCE,
+        backoff: float = 0.9,
+        drift: float = 0.01,
+        max_routes: int = MAX_ROUTES,
+    ):
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.drift = drift
+        self.max_routes = max_routes
+        self.in_flight = 0
+        # route -> baseline latency in seconds
+        self._baselines = {}
+        self._since_decrease = 0
+        self._lock = threading.Lock()
+        self.counters = metrics.Counter(
+            *(f"accepted_{p}" for p in PRIORITY_SHARES),
+            *(f"rejected_{p}" for p in PRIORITY_SHARES),
+        )
+
+    def acquire(self, priority: str = NORMAL) -> bool:
+        with self._lock:
+            admitted = self.in_flight < self.limit * PRIORITY_SHARES[priority]
+            if admitted:
+                self.in_flight += 1
+        self.counters.incr(f"{'accepted' if admitted else 'rejected'}_{priority}")
+        return admitted
+
+    def release(self, latency: float, failed: bool = False, route: str = ""):
+        with self._lock:
+            # only grow a limit that is actually being used
+            saturated = self.in_flight * 2 >= self.limit
+            self.in_flight -= 1
+            self._since_decrease += 1
+
+            if route not in self._baselines and len(self._baselines) >= self.max_routes:
+                route = "other"
+            baseline = self._baselines.get(route)
+            if baseline is None or latency < baseline:
+                baseline = latency
+            else:
+                baseline += (latency - baseline) * self.drift
+            self._baselines[route] = baseline
+
+            if failed or latency > baseline * self.tolerance:
+                if self._since_decrease >= self.limit:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._since_decrease = 0
+            elif saturated:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self):
+        with self._lock:
+            state = {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "baselines_ms": {
+                    route: round(baseline * 1000, 3)
+                    for route, baseline in self._baselines.items()
+                },
+            }
+        return {**state, **self.counters.values()}
+
+
+class ConcurrencyLimitMiddleware:
+    """Sheds load with fast 503s once the adaptive limit is reached.
+
+    Requests are classified by path and method into priorities; lower
+    priorities may only use part of the limit so auth and reads keep a
+    reserve when the database slows down, writes are turned away before
+    reads and admin work first of all.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: AdaptiveLimit,
+        rules=DEFAULT_PRIORITY_RULES,
+        exempt_paths=DEFAULT_EXEMPT_PATHS,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.rules = rules
+        self.exempt_paths = exempt_paths
+        self.retry_after = retry_after
+
+    def priority(self, method: str, path: str) -> str:
+        for prefix, methods, priority in self.rules:
+            if path.startswith(prefix) and (methods is None or method in methods):
+                return priority
+        return NORMAL
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.priority(scope["method"], scope["path"])
+        if not self.limiter.acquire(priority):
+            response = JSONResponse(
+                {"detail": "Server overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        failed = False
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # a client disconnect cancels the request without counting as failure
+            self.limiter.release(
+                time.monotonic() - started,
+                failed=failed,
+                route=f"{scope['method']} {route_of(scope['path'])}",
+            )
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from src.core.settings import settings
+
+REQUEST_TIMEOUT_SECONDS = settings.get_float("REQUEST_TIMEOUT_SECONDS", 10)
+REQUEST_TIMEOUT_MAX_SECONDS = settings.get_float("REQUEST_TIMEOUT_MAX_SECONDS", 30)
+TIMEOUT_HEADER = "x-request-timeout"
+
+# path prefix -> timeout in seconds, None for no deadline; first match wins
+DEFAULT_ROUTE_TIMEOUTS = {
+    # uploads then runs in the background with its own sessions
+    "/api/v1/admin/import/": None,
+    "/api/v1/posts/events": None,
+    "/api/v1/admin/users": 20.0,
+}
+
+
+class DeadlineMiddleware:
+    """Gives every request a deadline and notices when its client leaves.
+
+    The deadline is the route's default, shortened by an X-Request-Timeout
+    header (seconds) and capped at `max_timeout`. It is stored on
+    request.state.deadline as a time.monotonic() value; database sessions
+    turn it into a statement timeout. Callables appended to
+    request.state.on_disconnect run in the threadpool if the client
+    disconnects before the response is finished.
+    """
+
+    def __init__(
+        self,
+        app,
+        default_timeout: float = REQUEST_TIMEOUT_SECONDS,
+        max_timeout: float = REQUEST_TIMEOUT_MAX_SECONDS,
+        route_timeouts=DEFAULT_ROUTE_TIMEOUTS,
+    ):
+        self.app = app
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.route_timeouts = route_timeouts
+
+    def timeout_for(self, path: str, header: str | None):
+        timeout = self.default_timeout
+        for prefix, route_timeout in self.route_timeouts.items():
+            if path.startswith(prefix):
+                timeout = route_timeout
+                break
+        if timeout is None:
+            return None
+        try:
+            requested = float(header) if header is not None else timeout
+        except ValueError:
+            requested = timeout
+        return max(0.0, min(timeout, requested, self.max_timeout))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self.timeout_for(
+            scope["path"], Headers(scope=scope).get(TIMEOUT_HEADER)
+        )
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["deadline"] = time.monotonic() + timeout
+        callbacks = state.setdefault("on_disconnect", [])
+
+        # one reader owns receive() so a disconnect is seen even while the
+        # handler is busy in the threadpool and not reading. It stays at most
+        # one message ahead of the handler, so an upload is still read off
+        # the socket only as fast as the handler consumes it.
+        messages = asyncio.Queue(maxsize=1)
+
+        async def watch():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    state["disconnected"] = True
+                    for callback in list(callbacks):
+                        await run_in_threadpool(callback)
+                    await messages.put(message)
+                    return
+                await messages.put(message)
+
+        async def app_receive():
+            if state.get("disconnected") and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await self.app(scope, app_receive, send)
+        finally:
+            watcher.cancel()
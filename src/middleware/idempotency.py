@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import re
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from src.middleware.body_limit import DEFAULT_MAX_BODY_SIZE
+from src.services.idempotency_services import (
+    BUSY,
+    CLAIMED,
+    MISMATCH,
+    IdempotencyStore,
+    StoredResponse,
+)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# (method, path regex) of the requests that honour Idempotency-Key
+DEFAULT_IDEMPOTENT_ROUTES = (
+    ("POST", r"/api/v1/posts"),
+    ("PUT", r"/api/v1/posts/\d+"),
+    ("PATCH", r"/api/v1/admin/users/\d+/promote"),
+    ("DELETE", r"/api/v1/admin/users/\d+"),
+)
+
+# worth running again on a retry rather than replaying
+RETRYABLE_STATUSES = {408, 409, 425, 429}
+
+
+class IdempotencyMiddleware:
+    """Runs a request sent with an Idempotency-Key at most once.
+
+    Keys are scoped to the caller, as returned by `identify(authorization)`;
+    requests it cannot identify pass straight through to fail authentication.
+    A repeat of a finished request gets the stored response back with an
+    Idempotent-Replayed header. A repeat that arrives while the first is
+    still running waits up to `wait_timeout` for it, then gets a 409. Reusing
+    a key for a different method, path or body is a 422. Server errors and
+    retryable statuses are not stored. The body is buffered to fingerprint
+    it, so it is held to `max_body_size` here rather than further in.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: IdempotencyStore,
+        identify,
+        routes=DEFAULT_IDEMPOTENT_ROUTES,
+        wait_timeout: float = 10.0,
+        poll_interval: float = 0.05,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+    ):
+        self.app = app
+        self.store = store
+        self.identify = identify
+        self.routes = [(method, re.compile(path)) for method, path in routes]
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.max_body_size = max_body_size
+        # keys being run by this worker, duplicates wait on the event
+        self._running = {}
+
+    def applies_to(self, method: str, path: str) -> bool:
+        return any(
+            method == route_method and pattern.fullmatch(path)
+            for route_method, pattern in self.routes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.applies_to(
+            scope["method"], scope["path"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Invalid Idempotency-Key"}, 400)
+            await response(scope, receive, send)
+            return
+        caller = await run_in_threadpool(self.identify, headers.get("authorization"))
+        if caller is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            body = None
+        else:
+            body, receive = await buffer_body(receive, self.max_body_size)
+        if body is None:
+            response = JSONResponse({"detail": "Request body too large"}, 413)
+            await response(scope, receive, send)
+            return
+        key = digest(caller, idempotency_key)
+        fingerprint = digest(scope["method"], scope["path"], body)
+
+        outcome, stored = await self._claim(key, fingerprint)
+        if outcome == CLAIMED:
+            # the stored body is replayed as is, so keep it uncompressed
+            raw_headers = [
+                (k, v) for k, v in scope["headers"] if k.lower() != b"accept-encoding"
+            ]
+            inner_scope = dict(scope, headers=raw_headers)
+            await self._run(key, fingerprint, inner_scope, receive, send)
+            return
+        if outcome == MISMATCH:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was used for a different request"}, 422
+            )
+        elif outcome == BUSY:
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress"},
+                409,
+                headers={"Retry-After": "1"},
+            )
+        else:
+            headers = {"Idempotent-Replayed": "true"}
+            if stored.content_type:
+                headers["Content-Type"] = stored.content_type
+            response = Response(stored.body, stored.status, headers=headers)
+        await response(scope, receive, send)
+
+    async def _claim(self, key, fingerprint):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        while True:
+            running = self._running.get(key)
+            if running is not None:
+                try:
+                    await asyncio.wait_for(
+                        running.wait(), max(0.0, deadline - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    return BUSY, None
+                continue
+            outcome, stored = await run_in_threadpool(
+                self.store.claim, key, fingerprint
+            )
+            # running on another worker, poll until it is stored
+            if outcome != BUSY or loop.time() + self.poll_interval > deadline:
+                return outcome, stored
+            await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, key, fingerprint, scope, receive, send):
+        running = self._running[key] = asyncio.Event()
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive, capture)
+            status = start.get("status", 500)
+            if status < 500 and status not in RETRYABLE_STATUSES:
+                response = StoredResponse(
+                    fingerprint,
+                    status,
+                    Headers(raw=start["headers"]).get("content-type"),
+                    b"".join(chunks),
+                )
+                await run_in_threadpool(self.store.complete, key, response)
+                stored = True
+        finally:
+            try:
+                if not stored:
+                    await run_in_threadpool(self.store.release, key)
+            finally:
+                del self._running[key]
+                running.set()
+
+
+def digest(*parts) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else str(part).encode())
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+async def buffer_body(receive, max_body_size: int):
+    # the body is None once it grows past max_body_size
+    chunks = []
+    received = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        received += len(chunks[-1])
+        if received > max_body_size:
+            return None, receive
+        more_body = message.get("more_body", False)
+    body = b"".join(chunks)
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return body, replay
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.middleware.response_cache import caller_of
+from src.models.databases import STICKY_PRIMARY_COOKIE, STICKY_PRIMARY_SECONDS
+
+MAX_RECENT_WRITERS = 10000
+
+
+class RecentWriters:
+    """Until when each caller that wrote recently reads from the primary.
+
+    Callers are digests of their Authorization header, so bearer-token
+    clients, which never send the cookie back, are pinned too.
+    """
+
+    def __init__(self, max_entries: int = MAX_RECENT_WRITERS):
+        self.max_entries = max_entries
+        self._until = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, caller: str, until: float):
+        with self._lock:
+            self._until[caller] = max(until, self._until.get(caller, 0))
+            self._until.move_to_end(caller)
+            while len(self._until) > self.max_entries:
+                self._until.popitem(last=False)
+
+    def until(self, caller: str) -> float:
+        with self._lock:
+            return self._until.get(caller, 0)
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary for a short window after it writes.
+
+    Sessions from get_db record the time of their last flush on request.state;
+    when that is set the response carries a cookie that get_read_db honours,
+    and the caller is marked in `writers`. Later requests with the same
+    Authorization header get request.state.db_primary_until, which
+    get_read_db honours as well. `publish(caller, until)` shares the mark
+    with other workers before the response goes out.
+    """
+
+    def __init__(
+        self,
+        app,
+        window: float = STICKY_PRIMARY_SECONDS,
+        writers: RecentWriters | None = None,
+        publish=None,
+    ):
+        self.app = app
+        self.window = window
+        self.writers = writers if writers is not None else RecentWriters()
+        self.publish = publish
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        # shared with request.state further down, even if inner middleware copy scope
+        state = scope.setdefault("state", {})
+        authorization = Headers(scope=scope).get("authorization")
+        caller = caller_of(authorization) if authorization else None
+        if caller is not None:
+            until = self.writers.until(caller)
+            if until > time.time():
+                state["db_primary_until"] = until
+
+        async def send_wrapper(message):
+            wrote_at = state.get("db_wrote_at")
+            if message["type"] == "http.response.start" and wrote_at is not None:
+                until = wrote_at + self.window
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{STICKY_PRIMARY_COOKIE}={until:.3f}; "
+                    f"Max-Age={int(self.window) + 1}; Path=/; HttpOnly; Secure; "
+                    "SameSite=none",
+                )
+                if caller is not None:
+                    self.writers.mark(caller, until)
+                    if self.publish is not None:
+                        # may notify other workers over the database
+                        await run_in_threadpool(self.publish, caller, until)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
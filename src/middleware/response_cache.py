@@ -0,0 +1,284 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.middleware.compression import (
+    DEFAULT_MINIMUM_SIZE,
+    choose_encoding,
+    compress_body,
+    is_compressible,
+)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def caller_of(authorization: str) -> str:
+    # entries and invalidations name the caller by a digest, so tokens never
+    # travel in invalidation messages
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list
+    expires_at: float
+    # encoding -> body, "identity" is always present
+    bodies: dict = field(default_factory=dict)
+
+
+class ResponseCache:
+    """LRU of responses keyed on (path, query string, caller).
+
+    Every drop advances a version counter, recorded per (prefix, caller)
+    like VersionedCache does per key; a fill that started before a drop
+    covering its entry is not stored, so a response rendered before a write
+    cannot outlive it for a whole TTL.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # (prefix, caller or None) -> version of its latest drop, trimmed like
+        # the entries
+        self._dropped = OrderedDict()
+        self._prefixes = set()
+        self._version = 0
+        # versions at or below this may have had their record trimmed
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def set(self, key, status, headers, body, version=None):
+        """Store a response and return its entry.
+
+        With `version`, the one read before the response was rendered, the
+        entry is only returned, not stored, when a drop covering it came
+        since.
+        """
+        entry = CachedResponse(
+            status=status,
+            headers=headers,
+            expires_at=time.monotonic() + self.ttl,
+            bodies={"identity": body},
+        )
+        with self._lock:
+            if version is not None and version < self._dropped_at(key):
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _dropped_at(self, key):
+        path, _, caller = key
+        return max(
+            [self._floor]
+            + [
+                self._dropped.get((prefix, dropped_caller), 0)
+                for prefix in self._prefixes
+                if path.startswith(prefix)
+                for dropped_caller in (None, caller)
+            ]
+        )
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._dropped.clear()
+            self._prefixes.clear()
+            self._floor = self._version
+
+    def drop(self, prefix: str, caller: str | None = None):
+        """Drop the entries under `prefix`, only `caller`'s unless None."""
+        with self._lock:
+            self._version += 1
+            for key in list(self._entries):
+                path, _, entry_caller = key
+                if path.startswith(prefix) and caller in (None, entry_caller):
+                    del self._entries[key]
+            self._prefixes.add(prefix)
+            self._dropped[(prefix, caller)] = self._version
+            self._dropped.move_to_end((prefix, caller))
+            while len(self._dropped) > self.max_entries:
+                _, trimmed = self._dropped.popitem(last=False)
+                self._floor = max(self._floor, trimmed)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCacheMiddleware:
+    """Caches authenticated GET responses for a short TTL.
+
+    Entries are keyed on path, query string and Authorization header, and keep
+    one body per content encoding so repeated hits never recompress. A
+    successful unsafe request under one of the cached `paths` drops that
+    path's entries; under `private_paths`, whose responses only show the
+    caller's own data, only the caller's. `invalidate(prefix, caller)` is
+    called to do the same on other workers. Writes elsewhere (logins, token
+    refreshes) leave the cache alone.
+    """
+
+    def __init__(
+        self,
+        app,
+        cache: ResponseCache,
+        paths=("/api/v1/posts", "/api/v1/admin/users"),
+        private_paths=("/api/v1/posts",),
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        max_body_size: int = 1024 * 1024,
+        invalidate=None,
+    ):
+        self.app = app
+        self.cache = cache
+        self.invalidate = invalidate
+        self.paths = tuple(paths)
+        self.private_paths = tuple(private_paths)
+        self.minimum_size = minimum_size
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.cache.ttl <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        authorization = headers.get("authorization")
+        if scope["method"] not in SAFE_METHODS:
+            prefix = next((p for p in self.paths if scope["path"].startswith(p)), None)
+            if prefix is None:
+                await self.app(scope, receive, send)
+                return
+            caller = None
+            if prefix.startswith(self.private_paths):
+                caller = caller_of(authorization or "")
+            await self._call_and_invalidate(scope, receive, send, prefix, caller)
+            return
+
+        if (
+            scope["method"] != "GET"
+            or not authorization
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"], caller_of(authorization))
+        encoding = choose_encoding(headers.get("accept-encoding", "")) or "identity"
+
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = await self._fill(key, self.cache.version(), scope, receive, send)
+            if entry is None:
+                # streamed straight through, nothing left to send
+                return
+        await self._send_entry(entry, encoding, send)
+
+    async def _call_and_invalidate(self, scope, receive, send, prefix, caller):
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status is not None and status < 400:
+                self.cache.drop(prefix, caller)
+                if self.invalidate is not None:
+                    # may notify other workers over the database
+                    await run_in_threadpool(self.invalidate, prefix, caller)
+
+    async def _fill(self, key, version, scope, receive, send):
+        # ask the app for the identity body, compression happens here on store
+        raw_headers = [
+            (k, v) for k, v in scope["headers"] if k.lower() != b"accept-encoding"
+        ]
+        inner_scope = dict(scope, headers=raw_headers)
+        start = {}
+        chunks = []
+        streaming = False
+
+        async def capture(message):
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                start.update(message)
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                # event streams never end, pass them through untouched
+                streaming = content_type.startswith("text/event-stream")
+                if streaming:
+                    await send(message)
+            elif streaming:
+                await send(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(inner_scope, receive, capture)
+        if streaming:
+            return None
+        body = b"".join(chunks)
+        headers = list(start.get("headers", []))
+
+        cacheable = (
+            start.get("status") == 200
+            and len(body) <= self.max_body_size
+            and "set-cookie" not in Headers(raw=headers)
+        )
+        if not cacheable:
+            return CachedResponse(
+                status=start["status"],
+                headers=headers,
+                expires_at=0,
+                bodies={"identity": body},
+            )
+        # not stored when a write under the path finished while it rendered
+        return self.cache.set(key, start["status"], headers, body, version)
+
+    async def _send_entry(self, entry, encoding, send):
+        body = entry.bodies["identity"]
+        headers = MutableHeaders(raw=list(entry.headers))
+        headers.add_vary_header("Accept-Encoding")
+
+        if (
+            encoding != "identity"
+            and len(body) >= self.minimum_size
+            and is_compressible(headers)
+        ):
+            compressed = entry.bodies.get(encoding)
+            if compressed is None:
+                compressed = compress_body(body, encoding)
+                entry.bodies[encoding] = compressed
+            body = compressed
+            headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(body))
+
+        await send(
+            {"type": "http.response.start", "status": entry.status, "headers": headers.raw}
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,2 +1,7 @@
+from src.models.audit import AuditEvent
+from src.models.idempotency import IdempotencyKey
+from src.models.import_job import ImportJobState
 from src.models.post import Post  # ← add this
+from src.models.revision import PostRevision
+from src.models.tag_count import TagCount
 from src.models.user import User
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Integer, String
+
+from src.models.databases import Base
+
+
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # when the action happened, not when the batch was written
+    at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
+    actor = Column(String, nullable=False, index=True)
+    action = Column(String, nullable=False)
+    target = Column(String)
+    detail = Column(JSON)
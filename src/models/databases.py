@@ -1,23 +1,201 @@
-import os
+import threading
+import time
+from importlib import import_module
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-load_dotenv()
+from src.core import metrics
+from src.core.settings import settings
+from src.models.pool_metrics import PoolMonitor
+from src.models.routing import ReplicaSet, RoutingSession
 
-DATABASE_URL = "postgresql://postgres:postgres@db:5432/assignment_db"
+DATABASE_URL = settings.get(
+    "DATABASE_URL", "postgresql://postgres:postgres@db:5432/assignment_db"
+)
+DATABASE_REPLICA_URLS = settings.get_list("DATABASE_REPLICA_URLS")
+REPLICA_MAX_LAG_SECONDS = settings.get_float("REPLICA_MAX_LAG_SECONDS", 5)
+REPLICA_CHECK_INTERVAL = settings.get_float("REPLICA_CHECK_INTERVAL", 10)
+# compiled SQL statements kept per engine (benchmarks/bench_statements.py)
+DB_QUERY_CACHE_SIZE = settings.get_int("DB_QUERY_CACHE_SIZE", 1200)
+# how long a client reads from the primary after one of its requests wrote
+STICKY_PRIMARY_SECONDS = settings.get_float("STICKY_PRIMARY_SECONDS", 5)
+STICKY_PRIMARY_COOKIE = "db_primary_until"
 
-engine = create_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def make_sessionmaker(primary, replica_set=None):
+    # sessions only check out a connection on their first statement; keeping
+    # objects loaded after commit lets release_connection hand it back early
+    return sessionmaker(
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=primary,
+        replicas=replica_set,
+    )
+
+
+# bound by init_db, so importing the models never builds an engine
+SessionLocal = make_sessionmaker(None)
+
+_engine = None
+_init_lock = threading.Lock()
+
+
+def init_db():
+    """Create the engines and bind SessionLocal; later calls are no-ops.
+
+    Run from the app lifespan, and by anything that needs the database
+    outside a request (CLIs, background writers) through get_engine().
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+    with _init_lock:
+        if _engine is not None:
+            return _engine
+        engine = create_engine(DATABASE_URL, query_cache_size=DB_QUERY_CACHE_SIZE)
+        replicas = ReplicaSet(
+            [
+                create_engine(url, query_cache_size=DB_QUERY_CACHE_SIZE)
+                for url in DATABASE_REPLICA_URLS
+            ],
+            max_lag=REPLICA_MAX_LAG_SECONDS,
+            check_interval=REPLICA_CHECK_INTERVAL,
+        )
+
+        metrics.register("db_pool", PoolMonitor(engine).snapshot)
+        for index, replica_engine in enumerate(replicas.engines):
+            metrics.register(
+                f"db_pool_replica_{index}", PoolMonitor(replica_engine).snapshot
+            )
+        metrics.register(
+            "db_replicas",
+            lambda: {"configured": len(replicas.engines), "lag_seconds": replicas.lag},
+        )
+
+        SessionLocal.configure(bind=engine, replicas=replicas)
+        _engine = engine
+    return _engine
+
+
+def get_engine():
+    return init_db()
+
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+@event.listens_for(RoutingSession, "after_flush")
+def _remember_write(session, flush_context):
+    state = session.info.get("request_state")
+    if state is not None:
+        state.db_wrote_at = time.time()
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _remember_statement_write(orm_execute_state):
+    # writes issued as statements rather than through a flush
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        _remember_write(state.session, None)
+
+
+@event.listens_for(RoutingSession, "after_begin")
+def _apply_deadline(session, transaction, connection):
+    deadline = session.info.get("deadline")
+    if deadline is None:
+        return
+    state = session.info.get("request_state")
+    remaining = deadline - time.monotonic()
+    if remaining <= 0 or getattr(state, "disconnected", False):
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    # kept so a client disconnect can cancel the running statement
+    session.info["dbapi_connection"] = connection.connection.dbapi_connection
+    if connection.dialect.name == "postgresql":
+        # LOCAL: the pooled connection gets its default back on commit
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}"
+        )
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _forget_connection(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("dbapi_connection", None)
+
+
+def cancel_running_statement(db):
+    """Abort whatever the session is executing; safe from any thread."""
+    conn = db.info.get("dbapi_connection")
+    # psycopg2 sends a cancel request, sqlite3 interrupts
+    cancel = getattr(conn, "cancel", None) or getattr(conn, "interrupt", None)
+    if cancel is not None:
+        cancel()
+
+
+def is_statement_timeout(exc) -> bool:
+    # query_canceled: statement_timeout fired or the statement was cancelled
+    return getattr(getattr(exc, "orig", None), "pgcode", None) == "57014"
+
+
+def dialect_insert(dialect_name: str):
+    # postgresql and sqlite inserts support on_conflict_do_nothing; looked up
+    # per call so the dialect modules load with the engine, not at import
+    return import_module(f"sqlalchemy.dialects.{dialect_name}").insert
+
+
+def release_connection(db):
+    """Return the session's connection to the pool once its reads are done.
+
+    Call before slow work that needs no database (password hashing, building
+    large responses). Loaded objects stay usable; a later query simply checks
+    out a connection again.
+    """
+    if db.in_transaction() and not (db.new or db.dirty or db.deleted):
+        db.commit()
+
+
+def sticky_to_primary(request: Request):
+    # set by ReadYourWritesMiddleware for callers that wrote recently
+    until = getattr(request.state, "db_primary_until", 0)
+    try:
+        until = max(until, float(request.cookies.get(STICKY_PRIMARY_COOKIE, 0)))
+    except ValueError:
+        pass
+    return until > time.time()
+
+
+def request_session(request: Request, **info):
+    state = request.state
+    init_db()
+    db = SessionLocal(
+        info={
+            "request_state": state,
+            "deadline": getattr(state, "deadline", None),
+            **info,
+        }
+    )
+    on_disconnect = getattr(state, "on_disconnect", None)
+    if on_disconnect is not None:
+        on_disconnect.append(lambda: cancel_running_statement(db))
+    return db
+
+
+def get_db(request: Request):
+    db = request_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    # read-only handlers go to a replica unless this client wrote very recently
+    db = request_session(request, read_only=not sticky_to_primary(request))
     try:
         yield db
     finally:
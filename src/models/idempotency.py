@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, Text
+
+from src.models.databases import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of the caller and its Idempotency-Key header
+    key = Column(String(64), primary_key=True)
+    # sha256 of method, path and body, a reused key must repeat the request
+    fingerprint = Column(String(64), nullable=False)
+    # null while the first request is still running
+    status_code = Column(Integer)
+    content_type = Column(Text)
+    body = Column(LargeBinary)
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, Column, DateTime, Float, Integer, String
+
+from src.models.databases import Base
+
+
+class ImportJobState(Base):
+    """The last reported state of a bulk import, readable from any worker."""
+
+    __tablename__ = "import_jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String, nullable=False)
+    format = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    processed = Column(Integer, nullable=False)
+    imported = Column(Integer, nullable=False)
+    failed = Column(Integer, nullable=False)
+    errors = Column(JSON, nullable=False)
+    # time.time() values, as in the job report
+    started_at = Column(Float)
+    finished_at = Column(Float)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
@@ -0,0 +1,331 @@
+"""Helpers for revision files that change large tables without downtime.
+
+    from src.models.online_migrations import backfill, create_index_concurrently
+
+    def upgrade():
+        op.add_column("posts", sa.Column("word_count", sa.Integer()))
+        backfill(
+            "posts_word_count",
+            "posts",
+            "UPDATE posts SET word_count = array_length(regexp_split_to_array("
+            "content, '\\s+'), 1) WHERE id >= :low AND id < :high",
+        )
+        create_index_concurrently("ix_posts_word_count", "posts", ["word_count"])
+
+The helpers commit the revision's transaction so far and then work in short
+transactions of their own, so nothing holds a lock on the table for long.
+Every statement gets a lock_timeout; a statement that times out waiting for
+a lock is retried after a pause instead of queueing the application's
+queries behind it. A backfill records how far it got in migration_progress,
+in the same transaction as each batch, and an interrupted `alembic upgrade`
+picks up from there when run again.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from alembic import op
+
+from src.core.settings import settings
+
+MIGRATION_BATCH_SIZE = settings.get_int("MIGRATION_BATCH_SIZE", 10000)
+# batches are resized to take about this long
+MIGRATION_BATCH_SECONDS = settings.get_float("MIGRATION_BATCH_SECONDS", 0.5)
+# pause between batches, leaves room for the application's writes and for
+# replicas to keep up
+MIGRATION_BATCH_PAUSE = settings.get_float("MIGRATION_BATCH_PAUSE", 0.1)
+MIGRATION_LOCK_TIMEOUT = settings.get_float("MIGRATION_LOCK_TIMEOUT", 5)
+MIGRATION_LOCK_ATTEMPTS = settings.get_int("MIGRATION_LOCK_ATTEMPTS", 5)
+PROGRESS_LOG_SECONDS = 10
+
+logger = logging.getLogger("alembic.online")
+
+progress = sa.table(
+    "migration_progress",
+    sa.column("name", sa.String),
+    sa.column("next_key", sa.BigInteger),
+    sa.column("rows", sa.BigInteger),
+)
+
+CREATE_PROGRESS = """
+CREATE TABLE IF NOT EXISTS migration_progress (
+    name varchar PRIMARY KEY,
+    next_key bigint NOT NULL,
+    rows bigint NOT NULL
+)
+"""
+
+
+def is_lock_timeout(exc) -> bool:
+    # lock_not_available
+    return getattr(getattr(exc, "orig", None), "pgcode", None) == "55P03"
+
+
+@contextmanager
+def own_connection():
+    """A second connection, outside the revision's transaction.
+
+    The revision's transaction so far is committed first, so this one never
+    waits on locks the migration itself took.
+    """
+    with op.get_context().autocommit_block():
+        with op.get_bind().engine.connect() as conn:
+            yield conn
+
+
+def transaction(conn, lock_timeout: float):
+    if conn.dialect.name != "postgresql":
+        return conn.begin()
+    txn = conn.begin()
+    conn.exec_driver_sql(f"SET LOCAL lock_timeout = {int(lock_timeout * 1000)}")
+    return txn
+
+
+def with_lock_retries(work, attempts: int, what: str):
+    for attempt in range(1, attempts + 1):
+        try:
+            return work()
+        except sa.exc.OperationalError as exc:
+            if not is_lock_timeout(exc) or attempt == attempts:
+                raise
+            delay = min(2**attempt, 30)
+            logger.warning("%s: lock timeout, retrying in %ss", what, delay)
+            time.sleep(delay)
+
+
+def run_ddl(
+    sql: str,
+    lock_timeout: float = MIGRATION_LOCK_TIMEOUT,
+    attempts: int = MIGRATION_LOCK_ATTEMPTS,
+):
+    """Run a statement that needs a brief exclusive lock (ALTER TABLE ...).
+
+    Gives up waiting for the lock after `lock_timeout` seconds and retries,
+    so a long running query on the table delays the migration rather than
+    every query queued behind it.
+    """
+
+    def attempt():
+        with own_connection() as conn:
+            with transaction(conn, lock_timeout):
+                conn.exec_driver_sql(sql)
+
+    with_lock_retries(attempt, attempts, sql.split("\n")[0][:60])
+
+
+def backfill(
+    name: str,
+    table: str,
+    statement: str,
+    key: str = "id",
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    batch_seconds: float = MIGRATION_BATCH_SECONDS,
+    pause: float = MIGRATION_BATCH_PAUSE,
+    lock_timeout: float = MIGRATION_LOCK_TIMEOUT,
+    attempts: int = MIGRATION_LOCK_ATTEMPTS,
+):
+    """Run `statement` over `table` in ranges of its integer key.
+
+    `statement` must limit itself to `key >= :low AND key < :high`. Each
+    range is its own transaction; ranges grow or shrink to take about
+    `batch_seconds`. `name` identifies the backfill in migration_progress,
+    the row is removed once it finishes. Returns the rows affected.
+    """
+    statement = sa.text(statement)
+    with own_connection() as conn:
+        with conn.begin():
+            conn.exec_driver_sql(CREATE_PROGRESS)
+            low, high = conn.execute(
+                sa.text(f"SELECT min({key}), max({key}) FROM {table}")
+            ).one()
+            resumed = conn.execute(
+                sa.select(progress.c.next_key, progress.c.rows).where(
+                    progress.c.name == name
+                )
+            ).first()
+        if low is None:
+            return 0
+        start, rows = (low, 0) if resumed is None else tuple(resumed)
+        if resumed is not None:
+            logger.info("%s: resuming at %s=%s", name, key, start)
+
+        size, logged_at, started = batch_size, time.monotonic(), time.monotonic()
+        while start <= high:
+            end = start + size
+
+            def run_batch():
+                with transaction(conn, lock_timeout):
+                    affected = conn.execute(statement, {"low": start, "high": end})
+                    save_progress(conn, name, end, rows + affected.rowcount)
+                    return affected.rowcount
+
+            batch_started = time.monotonic()
+            rows += with_lock_retries(run_batch, attempts, name)
+            took = time.monotonic() - batch_started
+            start = end
+
+            if took > batch_seconds:
+                size = max(size // 2, 1)
+            elif took < batch_seconds / 2:
+                size = min(size * 2, batch_size * 10)
+            if time.monotonic() - logged_at >= PROGRESS_LOG_SECONDS or start > high:
+                logged_at = time.monotonic()
+                done = min(1.0, (start - low) / (high - low + 1))
+                logger.info(
+                    "%s: %.1f%% (%s=%s, %d rows, %.0fs)",
+                    name,
+                    done * 100,
+                    key,
+                    start,
+                    rows,
+                    logged_at - started,
+                )
+            if pause:
+                time.sleep(pause)
+
+        with conn.begin():
+            conn.execute(sa.delete(progress).where(progress.c.name == name))
+    return rows
+
+
+def save_progress(conn, name, next_key, rows):
+    updated = conn.execute(
+        sa.update(progress)
+        .where(progress.c.name == name)
+        .values(next_key=next_key, rows=rows)
+    )
+    if updated.rowcount == 0:
+        conn.execute(
+            sa.insert(progress).values(name=name, next_key=next_key, rows=rows)
+        )
+
+
+def partitions_of(conn, table: str):
+    return conn.scalars(
+        sa.text(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            "WHERE inhparent = CAST(:table AS regclass) ORDER BY 1"
+        ),
+        {"table": table},
+    ).all()
+
+
+def index_is_valid(conn, name: str):
+    # None when the index does not exist
+    return conn.scalar(
+        sa.text(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": name},
+    )
+
+
+def drop_invalid_index(conn, name: str):
+    # left behind when a CREATE INDEX CONCURRENTLY failed or was interrupted,
+    # including by its own lock_timeout
+    if index_is_valid(conn, name) is False:
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY {name}")
+
+
+def check_index_valid(conn, name: str):
+    if not index_is_valid(conn, name):
+        raise RuntimeError(f"Index {name} was not built, it is missing or invalid")
+
+
+def create_index_concurrently(
+    name: str,
+    table: str,
+    columns,
+    unique: bool = False,
+    using: str | None = None,
+    where: str | None = None,
+    lock_timeout: float = MIGRATION_LOCK_TIMEOUT,
+    attempts: int = MIGRATION_LOCK_ATTEMPTS,
+):
+    """CREATE INDEX CONCURRENTLY, safe to re-run after an interruption.
+
+    On a partitioned table the parent index is created invalid and each
+    partition's index is built concurrently and attached. Raises if an index
+    is still invalid once built. Other databases get a plain CREATE INDEX;
+    `using` names a Postgres index method and is refused there.
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        if using is not None:
+            raise ValueError(f"Index method {using} needs PostgreSQL")
+        op.create_index(
+            name,
+            table,
+            list(columns),
+            unique=unique,
+            sqlite_where=None if where is None else sa.text(where),
+        )
+        return
+
+    unique_sql = "UNIQUE " if unique else ""
+    using_sql = f" USING {using}" if using else ""
+    where_sql = f" WHERE {where}" if where else ""
+    columns_sql = ", ".join(columns)
+
+    def create(conn, index, target, only=False):
+        if only:
+            # a partitioned parent cannot be indexed concurrently
+            sql = f"CREATE {unique_sql}INDEX IF NOT EXISTS {index} ON ONLY {target}"
+        else:
+            sql = (
+                f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {index} "
+                f"ON {target}"
+            )
+        sql += f"{using_sql} ({columns_sql}){where_sql}"
+
+        def attempt():
+            # a failed attempt leaves an invalid index that IF NOT EXISTS
+            # would take for a finished one
+            if not only:
+                drop_invalid_index(conn, index)
+            conn.exec_driver_sql(sql)
+
+        with_lock_retries(attempt, attempts, index)
+        if not only:
+            check_index_valid(conn, index)
+
+    with own_connection() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql(f"SET lock_timeout = {int(lock_timeout * 1000)}")
+        try:
+            children = partitions_of(conn, table)
+            if not children:
+                create(conn, name, table)
+                return
+            create(conn, name, table, only=True)
+            attached = set(partitions_of(conn, name))
+            for child in children:
+                child_index = f"{child}_{name.removeprefix('ix_' + table + '_')}"
+                create(conn, child_index, child)
+                if child_index not in attached:
+                    conn.exec_driver_sql(
+                        f"ALTER INDEX {name} ATTACH PARTITION {child_index}"
+                    )
+            # valid once every partition has a valid index attached
+            check_index_valid(conn, name)
+        finally:
+            conn.exec_driver_sql("RESET lock_timeout")
+
+
+def drop_index_concurrently(name: str, table: str):
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index(name, table_name=table)
+        return
+    with own_connection() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        partitioned = conn.scalar(
+            sa.text(
+                "SELECT relkind = 'I' FROM pg_class WHERE oid = to_regclass(:name)"
+            ),
+            {"name": name},
+        )
+        # a partitioned index can only be dropped as a whole, and not
+        # concurrently; its partitions' indexes go with it
+        mode = "" if partitioned else "CONCURRENTLY "
+        conn.exec_driver_sql(f"DROP INDEX {mode}IF EXISTS {name}")
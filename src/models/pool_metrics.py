@@ -0,0 +1,55 @@
+import threading
+import time
+
+from sqlalchemy import event
+
+
+class PoolMonitor:
+    """Tracks how many pooled connections are checked out and for how long."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkouts = 0
+        self.total_hold = 0.0
+        self.max_hold = 0.0
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        with self._lock:
+            self.checked_out -= 1
+            self.total_hold += held
+            self.max_hold = max(self.max_hold, held)
+
+    def reset_peaks(self):
+        with self._lock:
+            self.peak_checked_out = self.checked_out
+            self.max_hold = 0.0
+
+    def snapshot(self):
+        pool = self.engine.pool
+        with self._lock:
+            return {
+                "pool_size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "avg_hold_ms": (
+                    self.total_hold / self.checkouts * 1000 if self.checkouts else 0.0
+                ),
+                "max_hold_ms": self.max_hold * 1000,
+            }
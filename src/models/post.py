@@ -1,15 +1,71 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql.expression import ClauseElement
 
 from src.models.databases import Base
 
 
+class EmptyTags(ClauseElement):
+    """Server default of posts.tags: an empty array literal per dialect."""
+
+
+@compiles(EmptyTags)
+def _empty_array(element, compiler, **kw):
+    return "'{}'"
+
+
+@compiles(EmptyTags, "sqlite")
+def _empty_json_array(element, compiler, **kw):
+    # '{}' would be a JSON object there
+    return "'[]'"
+
+
 class Post(Base):
     __tablename__ = "posts"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    content = Column(String, nullable=False)
+    # bodies can be large, only load them when a query asks for them
+    content = deferred(Column(String, nullable=False))
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # set in Python as well so it is known after flush without a refresh
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
+    # lower-cased and unique per post; SQLite stores them as a JSON array
+    tags = Column(
+        ARRAY(String).with_variant(JSON(), "sqlite"),
+        default=list,
+        server_default=EmptyTags(),
+        nullable=False,
+    )
 
     owner = relationship("User", backref="posts")
+
+    __table_args__ = (
+        Index("ix_posts_owner_id_id", "owner_id", "id"),
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        # serves tags @> (all of) and tags && (any of); Postgres combines it
+        # with the owner index in a bitmap scan
+        Index("ix_posts_tags", "tags", postgresql_using="gin"),
+    )
+    # owner_id is the hash partition key when POSTS_PARTITIONS is set for the
+    # migration; identifying rows by (id, owner_id) keeps the ORM's UPDATE and
+    # DELETE statements pruned to a single partition
+    __mapper_args__ = {"primary_key": [id, owner_id]}
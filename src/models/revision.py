@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+)
+
+from src.models.databases import Base
+
+
+class PostRevision(Base):
+    """One version of a post, numbered from 1 for the post as created.
+
+    `data` is zlib compressed: the whole content for a snapshot, otherwise
+    the delta from the previous version's content.
+    """
+
+    __tablename__ = "post_revisions"
+
+    post_id = Column(Integer, primary_key=True)
+    version = Column(Integer, primary_key=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    title = Column(String, nullable=False)
+    snapshot = Column(Boolean, nullable=False)
+    data = Column(LargeBinary, nullable=False)
@@ -0,0 +1,94 @@
+import itertools
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# 0 when the replica has replayed everything it received, otherwise the age of
+# the last replayed transaction; NULL (not a standby) counts as no lag
+PG_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class ReplicaSet:
+    """Replica engines with periodic health and replication lag checks."""
+
+    def __init__(self, engines, max_lag: float = 5.0, check_interval: float = 10.0):
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = []
+        self.lag = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def measure_lag(self, engine):
+        with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                return float(conn.execute(PG_LAG_QUERY).scalar() or 0)
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def check(self):
+        healthy = []
+        for engine in self.engines:
+            try:
+                lag = self.measure_lag(engine)
+            except Exception:
+                lag = None
+            self.lag[engine.url.render_as_string()] = lag
+            if lag is not None and lag <= self.max_lag:
+                healthy.append(engine)
+        self.healthy = healthy
+        self._checked_at = time.monotonic()
+
+    def pick(self):
+        if not self.engines:
+            return None
+        if (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= self.check_interval
+        ):
+            # only one request pays for the health check, the rest use the last result
+            if self._lock.acquire(blocking=self._checked_at is None):
+                try:
+                    self.check()
+                finally:
+                    self._lock.release()
+        healthy = self.healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+
+class RoutingSession(Session):
+    """Session sending reads to a replica when opened with info={"read_only": True}.
+
+    Falls back to the primary bind when no replica is healthy, and always uses
+    the primary for flushes.
+    """
+
+    def __init__(self, replicas: ReplicaSet | None = None, **kw):
+        super().__init__(**kw)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_only = self.info.get("read_only") and not self._flushing
+        if read_only and self.replicas is not None:
+            if "replica" not in self.info:
+                # one replica per session so reads within a request are consistent
+                self.info["replica"] = self.replicas.pick()
+            if self.info["replica"] is not None:
+                return self.info["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def reads_from_replica(db: Session) -> bool:
+    """Whether `db` may read from a replica, so may miss recent writes."""
+    return bool(db.info.get("read_only"))
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+
+from src.models.databases import Base
+
+
+class TagCount(Base):
+    """How many of an owner's posts carry each tag.
+
+    Kept in step with posts by the post services in the same transaction as
+    the write, so facet counts never need to scan posts.
+    """
+
+    __tablename__ = "tag_counts"
+
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
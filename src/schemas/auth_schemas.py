@@ -10,3 +10,7 @@ class RegisterData(BaseModel):
     email: str
     password: str
     name: str
+
+
+# password is deliberately not selectable
+USER_FIELDS = ("id", "name", "email", "role")
@@ -0,0 +1,56 @@
+from fastapi import HTTPException, Query
+
+
+class FieldSelection:
+    """Dependency parsing a comma separated `fields=` query parameter.
+
+    Returns None when the parameter is absent, otherwise a tuple of column
+    names that always starts with `id`.
+    """
+
+    def __init__(self, allowed):
+        self.allowed = tuple(allowed)
+
+    def __call__(
+        self,
+        fields: str | None = Query(
+            None, description="Comma separated list of fields to return"
+        ),
+    ):
+        if fields is None:
+            return None
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in self.allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail="Unknown fields: " + ", ".join(unknown)
+            )
+        return tuple(dict.fromkeys(["id", *requested]))
+
+
+class IdSelection:
+    """Dependency parsing a comma separated `ids=` query parameter.
+
+    Returns None when the parameter is absent, otherwise the ids in the order
+    given with duplicates removed.
+    """
+
+    def __init__(self, max_ids: int = 100):
+        self.max_ids = max_ids
+
+    def __call__(
+        self,
+        ids: str | None = Query(None, description="Comma separated list of ids"),
+    ):
+        if ids is None:
+            return None
+        try:
+            parsed = [int(id) for id in ids.split(",") if id.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be integers")
+        parsed = list(dict.fromkeys(parsed))
+        if not parsed or len(parsed) > self.max_ids:
+            raise HTTPException(
+                status_code=400, detail=f"Between 1 and {self.max_ids} ids allowed"
+            )
+        return parsed
@@ -0,0 +1,28 @@
+from enum import Enum
+
+from src.schemas.auth_schemas import RegisterData
+from src.schemas.post_schemas import PostCreate
+
+
+class ImportKind(str, Enum):
+    users = "users"
+    posts = "posts"
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class ImportUser(RegisterData):
+    pass
+
+
+class ImportPost(PostCreate):
+    owner_email: str
+
+
+IMPORT_COLUMNS = {
+    ImportKind.users: ("name", "email", "password"),
+    ImportKind.posts: ("owner_email", "title", "content", "tags"),
+}
@@ -1,13 +1,71 @@
 from datetime import datetime
+from typing import Annotated
 
-from pydantic import BaseModel
+from fastapi import HTTPException, Query
+from pydantic import AfterValidator, BaseModel, Field, StringConstraints
+
+from src.core.settings import settings
+
+POST_TITLE_MAX_LENGTH = settings.get_int("POST_TITLE_MAX_LENGTH", 300)
+POST_CONTENT_MAX_LENGTH = settings.get_int("POST_CONTENT_MAX_LENGTH", 100000)
+POST_MAX_TAGS = settings.get_int("POST_MAX_TAGS", 20)
+TAG_MAX_LENGTH = 50
+
+Tag = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True, to_lower=True, min_length=1, max_length=TAG_MAX_LENGTH
+    ),
+]
+# duplicates dropped, first occurrence wins
+Tags = Annotated[
+    list[Tag],
+    Field(max_length=POST_MAX_TAGS),
+    AfterValidator(lambda tags: list(dict.fromkeys(tags))),
+]
 
 
 class PostCreate(BaseModel):
-    title: str
-    content: str
+    title: str = Field(max_length=POST_TITLE_MAX_LENGTH)
+    content: str = Field(max_length=POST_CONTENT_MAX_LENGTH)
+    tags: Tags = []
 
 
 class PostUpdate(BaseModel):
-    title: str
-    content: str
+    title: str = Field(max_length=POST_TITLE_MAX_LENGTH)
+    content: str = Field(max_length=POST_CONTENT_MAX_LENGTH)
+    # left out, the post keeps its tags
+    tags: Tags | None = None
+
+
+POST_FIELDS = ("id", "title", "content", "owner_id", "created_at", "tags")
+
+MATCH_ALL, MATCH_ANY = "all", "any"
+
+
+class TagSelection:
+    """Dependency parsing repeated `tag=` query parameters.
+
+    Returns None when no tag is given, otherwise the normalized tags and
+    whether posts must carry all of them or any one.
+    """
+
+    def __init__(self, max_tags: int = POST_MAX_TAGS):
+        self.max_tags = max_tags
+
+    def __call__(
+        self,
+        tag: list[str] | None = Query(None, description="Filter on this tag"),
+        match: str = Query(
+            MATCH_ALL, pattern="^(all|any)$", description="Posts with all or any tag"
+        ),
+    ):
+        if not tag:
+            return None
+        tags = [name.strip().lower() for name in tag if name.strip()]
+        tags = tuple(dict.fromkeys(tags))
+        if not tags or len(tags) > self.max_tags:
+            raise HTTPException(
+                status_code=400, detail=f"Between 1 and {self.max_tags} tags allowed"
+            )
+        return tags, match
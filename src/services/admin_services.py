@@ -1,51 +1,132 @@
+from functools import lru_cache
+
 from fastapi import Depends, HTTPException
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
-from src.models.databases import get_db
+from src.core.invalidation import VersionedCache, bus
+from src.models.databases import get_db, release_connection
+from src.models.routing import reads_from_replica
 from src.models.user import User
+from src.schemas.auth_schemas import USER_FIELDS
 from src.services.auth_service import getCurrentUser
+from src.services.coalescing import SingleFlight
+from src.services.dataloader import (
+    dialect_of,
+    found_and_missing,
+    get_loader,
+    id_in,
+)
+from src.services.rows import fetch_rows
+
+USER_BY_ID = select(User).where(User.id == bindparam("user_id")).limit(1)
+ROLE_BY_EMAIL = select(User.role).where(User.email == bindparam("email")).limit(1)
+
+# every admin request checks the caller's role; writes that change a role
+# publish on the invalidation bus so no worker keeps stale privileges
+roles = VersionedCache(bus, "user_roles")
+
+# concurrent GET /admin/users/{id} for the same user share one query, among
+# sessions routed alike (see post_services.post_lookups)
+user_lookups = SingleFlight("user_lookups")
+
+
+def load_role(email: str, db: Session):
+    role = db.scalar(ROLE_BY_EMAIL, {"email": email})
+    release_connection(db)
+    return role
 
 
 def getCurrentAdmin(
     admin_email: str = Depends(getCurrentUser), db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == admin_email).first()
-    if not user:
+    role = roles.get_or_load(admin_email, lambda: load_role(admin_email, db))
+    if role is None:
         raise HTTPException(status_code=404, detail="Admin not found")
 
-    if user.role != "admin":
+    if role != "admin":
         raise HTTPException(status_code=403, detail="Admins only")
-    return user
+    return admin_email
+
+
+@lru_cache(maxsize=32)
+def select_user_fields(fields):
+    return select(*(getattr(User, name) for name in fields))
+
+
+@lru_cache(maxsize=32)
+def select_non_admin_fields(fields):
+    return select_user_fields(fields).where(User.role != "admin")
+
 
+@lru_cache(maxsize=32)
+def select_user_fields_by_id(fields):
+    return select_user_fields(fields).where(User.id == bindparam("user_id")).limit(1)
 
-def get_user_for_admin(db: Session):
-    users = db.query(User).filter(User.role != "admin").all()
+
+@lru_cache(maxsize=32)
+def select_user_fields_by_ids(fields, dialect):
+    return select_user_fields(fields).where(id_in(User.id, dialect))
+
+
+def user_loader(db: Session, fields=USER_FIELDS):
+    """Request-scoped loader of users by id, as dicts of `fields`."""
+
+    def load_batch(db, ids):
+        stmt = select_user_fields_by_ids(fields, dialect_of(db))
+        rows = db.execute(stmt, {"ids": ids}).mappings()
+        return {row["id"]: dict(row) for row in rows}
+
+    return get_loader(db, ("users", fields), load_batch)
+
+
+def get_users_by_ids(ids, db: Session, fields=None):
+    users = user_loader(db, fields or USER_FIELDS).load_many(ids)
+    release_connection(db)
+    return found_and_missing(ids, users)
+
+
+def get_user_for_admin(db: Session, fields=None):
+    stmt = select_non_admin_fields(fields or USER_FIELDS)
+    users = fetch_rows(db, stmt, {}, "UserRow")
+    release_connection(db)
     return users
 
 
-def get_user_by_id(user_id: int, db: Session):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+def get_user_by_id(user_id: int, db: Session, fields=None):
+    fields = fields or USER_FIELDS
+    return user_lookups.do(
+        (user_id, fields, reads_from_replica(db)),
+        lambda: load_user(user_id, db, fields),
+    )
+
+
+def load_user(user_id: int, db: Session, fields):
+    stmt = select_user_fields_by_id(fields)
+    row = db.execute(stmt, {"user_id": user_id}).mappings().first()
+    release_connection(db)
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return dict(row)
 
 
 def user_promote(user_id: int, db: Session):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.scalars(USER_BY_ID, {"user_id": user_id}).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.role = "admin"
+    bus.publish("user_roles", user.email, db=db)
     db.commit()
-    db.refresh(user)
     return user
 
 
 def delete_user(user_id: int, db: Session):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.scalars(USER_BY_ID, {"user_id": user_id}).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     db.delete(user)
+    bus.publish("user_roles", user.email, db=db)
     db.commit()
     return {"message": "User deleted"}
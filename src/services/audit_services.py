@@ -0,0 +1,119 @@
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from src.core import metrics
+from src.core.settings import settings
+from src.models.audit import AuditEvent
+from src.models.databases import get_engine
+
+AUDIT_BATCH_SIZE = settings.get_int("AUDIT_BATCH_SIZE", 500)
+AUDIT_FLUSH_INTERVAL = settings.get_float("AUDIT_FLUSH_INTERVAL", 1.0)
+AUDIT_QUEUE_SIZE = settings.get_int("AUDIT_QUEUE_SIZE", 10000)
+
+logger = logging.getLogger("audit")
+
+
+class AuditTrail:
+    """Who did what, written to audit_events by a background thread.
+
+    record() only queues the event, so request handlers never wait on the
+    insert. The writer takes whatever has queued up, up to `batch_size`
+    events, at least every `flush_interval` seconds, and writes it with one
+    executemany. Every event is also logged, so events from a batch that
+    fails, or that find the queue full, still reach the log.
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        max_queued: int = AUDIT_QUEUE_SIZE,
+    ):
+        self._engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(max_queued)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.counters = metrics.Counter("recorded", "written", "dropped", "failed")
+
+    @property
+    def engine(self):
+        return self._engine or get_engine()
+
+    def record(self, actor: str, action: str, target=None, **detail):
+        event = {
+            "at": datetime.now(timezone.utc),
+            "actor": actor,
+            "action": action,
+            "target": None if target is None else str(target),
+            "detail": detail or None,
+        }
+        logger.info(action, extra={"audit": event})
+        self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.counters.incr("dropped")
+            return
+        self.counters.incr("recorded")
+
+    def flush(self):
+        # blocks until every event queued so far has been written or failed
+        self._queue.join()
+
+    def shutdown(self, timeout: float = 5.0):
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(AuditEvent.__table__), batch)
+        except Exception:
+            self.counters.incr("failed", len(batch))
+            logger.exception("audit batch lost", extra={"events": len(batch)})
+            return
+        self.counters.incr("written", len(batch))
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), **self.counters.values()}
+
+
+trail = AuditTrail()
+metrics.register("audit", trail.stats)
@@ -1,35 +1,53 @@
 import datetime
-import os
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
-import dotenv
 import jwt
 from argon2 import PasswordHasher
 from fastapi import Cookie, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
+from src.core.keyring import get_keyring
+from src.core.settings import settings
 from src.models import User
+from src.models.databases import release_connection
 from src.schemas import auth_schemas
 
-dotenv.load_dotenv()
-
-SECRET = os.getenv("SECRET")
+SECRET = settings.get("SECRET")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 ph = PasswordHasher()
 bearer = HTTPBearer()
+
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email")).limit(1)
 # Hash password
 
 
+def encode_jwt(payload):
+    keyring = get_keyring()
+    if keyring is None:
+        return jwt.encode(payload, SECRET, ALGORITHM)
+    return keyring.sign(payload)
+
+
+def verify_jwt(token: str):
+    keyring = get_keyring()
+    # tokens without a kid were signed with SECRET before the keyring was
+    # configured; they stay valid until they expire if SECRET is still set
+    if keyring is None or (SECRET and "kid" not in jwt.get_unverified_header(token)):
+        return jwt.decode(token, SECRET, algorithms=[ALGORITHM])
+    return keyring.verify(token)
+
+
 def create_accesstoken(payload):
     to_encode = payload.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, SECRET, ALGORITHM)
+    token = encode_jwt(to_encode)
     return token
 
 
@@ -37,13 +55,13 @@ def create_refreshtoken(payload):
     to_encode = payload.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, SECRET, ALGORITHM)
+    token = encode_jwt(to_encode)
     return token
 
 
 def decode_jwt(token: str):
     try:
-        payload = jwt.decode(token, SECRET, algorithms=[ALGORITHM])
+        payload = verify_jwt(token)
         email = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -60,6 +78,17 @@ def decode_jwt(token: str):
         )
 
 
+def token_subject(authorization: str | None):
+    # the caller of a request, for middleware that runs before dependencies
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_jwt(token)
+    except HTTPException:
+        return None
+
+
 def hash_password(password):
     return ph.hash(password)
 
@@ -108,11 +137,12 @@ def create_user(data: auth_schemas.RegisterData, db: Session):
     )
     db.add(new_user)
     db.commit()
-    db.refresh(new_user)
 
 
 def verify_user(email: str, password: str, db: Session):
-    user = db.query(User).filter(User.email == email).first()
+    user = db.scalars(USER_BY_EMAIL, {"email": email}).first()
+    # don't hold a pooled connection through the Argon2 verification
+    release_connection(db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     verify_password(user.password, password)
@@ -120,7 +150,8 @@ def verify_user(email: str, password: str, db: Session):
 
 
 def get_user_by_email(email: str, db: Session):
-    user = db.query(User).filter(User.email == email).first()
+    user = db.scalars(USER_BY_EMAIL, {"email": email}).first()
+    release_connection(db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from src.core import metrics
+from src.core.settings import settings
+
+COALESCE_TIMEOUT_SECONDS = settings.get_float("COALESCE_TIMEOUT_SECONDS", 2)
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the lookup; callers arriving while it is
+    in flight wait for its result (or exception) instead of querying again.
+    A waiter that times out runs the lookup itself. Results are shared
+    between requests, so lookups must return plain data, not ORM objects.
+    """
+
+    def __init__(self, name: str, timeout: float = COALESCE_TIMEOUT_SECONDS):
+        self.name = name
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = metrics.Counter("leaders", "coalesced", "timeouts")
+        metrics.register(f"coalescing_{name}", self.stats)
+
+    def do(self, key, fn, timeout: float | None = None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if leader:
+            self.counters.incr("leaders")
+            try:
+                result = fn()
+            except BaseException as exc:
+                call.set_exception(exc)
+                raise
+            else:
+                call.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+
+        self.counters.incr("coalesced")
+        try:
+            return call.result(self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            self.counters.incr("timeouts")
+            return fn()
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"in_flight": in_flight, **self.counters.values()}
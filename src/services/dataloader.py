@@ -0,0 +1,69 @@
+from sqlalchemy import ARRAY, any_, bindparam
+from sqlalchemy.orm import Session
+
+
+class DataLoader:
+    """Loads rows by id for the life of one request, batching the queries.
+
+    `batch_fn(db, ids)` returns {id: row} for the ids that exist. Ids passed
+    to want() are fetched along with the next load_many(), so services that
+    each need a few rows can share one query. Every id is fetched at most
+    once per loader, misses included; rows are as they were when loaded.
+    """
+
+    def __init__(self, db: Session, batch_fn):
+        self.db = db
+        self.batch_fn = batch_fn
+        self._rows = {}
+        # insertion ordered set of ids to fetch with the next batch
+        self._wanted = {}
+        self.batches = 0
+
+    def want(self, ids):
+        for id in ids:
+            if id not in self._rows:
+                self._wanted[id] = None
+
+    def load_many(self, ids):
+        self.want(ids)
+        if self._wanted:
+            batch = list(self._wanted)
+            self._wanted.clear()
+            found = self.batch_fn(self.db, batch)
+            for id in batch:
+                self._rows[id] = found.get(id)
+            self.batches += 1
+        return [self._rows[id] for id in ids]
+
+    def load(self, id):
+        return self.load_many([id])[0]
+
+    def prime(self, id, row):
+        self._rows.setdefault(id, row)
+
+
+def found_and_missing(ids, rows):
+    found = [row for row in rows if row is not None]
+    missing = [id for id, row in zip(ids, rows) if row is None]
+    return found, missing
+
+
+def get_loader(db: Session, key, batch_fn) -> DataLoader:
+    # sessions are opened per request, so their info dict is request scoped
+    loaders = db.info.setdefault("loaders", {})
+    loader = loaders.get(key)
+    if loader is None:
+        loader = loaders[key] = DataLoader(db, batch_fn)
+    return loader
+
+
+def id_in(column, dialect: str):
+    # Postgres gets one array parameter, so any number of ids shares a single
+    # statement; elsewhere an expanding IN
+    if dialect == "postgresql":
+        return column == any_(bindparam("ids", type_=ARRAY(column.type)))
+    return column.in_(bindparam("ids", expanding=True))
+
+
+def dialect_of(db: Session) -> str:
+    return db.get_bind().dialect.name
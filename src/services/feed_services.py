@@ -0,0 +1,199 @@
+import base64
+import json
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Integer, bindparam, select, tuple_
+from sqlalchemy.orm import Session
+
+from src.core import metrics
+from src.core.invalidation import bus
+from src.core.pubsub import pubsub
+from src.core.settings import settings
+from src.models.databases import release_connection
+from src.models.post import Post
+from src.services.post_events import CHANNEL
+
+FEED_HEAD_SIZE = settings.get_int("FEED_HEAD_SIZE", 200)
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+# what the feed shows by default; bodies are fetched per post
+FEED_FIELDS = ("id", "title", "owner_id", "created_at")
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite hands timestamps back naive, Postgres and the model default are UTC
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(post) -> str:
+    raw = f"{_utc(post['created_at']).isoformat()}|{post['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return _utc(datetime.fromisoformat(created_at)), int(post_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@lru_cache(maxsize=64)
+def select_feed(fields, after_cursor: bool):
+    # newest first over the (created_at, id) index; id and created_at are always
+    # selected because the next cursor is built from them
+    columns = dict.fromkeys(("id", "created_at") + fields)
+    stmt = select(*(getattr(Post, name) for name in columns))
+    if after_cursor:
+        stmt = stmt.where(
+            tuple_(Post.created_at, Post.id)
+            < tuple_(
+                bindparam("created_at", type_=DateTime(timezone=True)),
+                bindparam("post_id", type_=Integer),
+            )
+        )
+    return stmt.order_by(Post.created_at.desc(), Post.id.desc()).limit(
+        bindparam("limit", type_=Integer)
+    )
+
+
+class RecentPosts:
+    """The newest posts across all owners, held in memory by each worker.
+
+    Filled from the database on first use, then kept current from the post
+    events channel so the first page of the feed needs no query. A listener
+    reconnect may have missed events, so it drops the buffer for a refill.
+    """
+
+    def __init__(self, size: int = FEED_HEAD_SIZE):
+        self.size = size
+        self._posts = {}
+        self._ordered = None
+        self._warm = False
+        self._warming = False
+        self._pending = None
+        # True when the table holds no posts older than the buffer
+        self._complete = False
+        self._subscribed = False
+        self._lock = threading.Lock()
+        self.counters = metrics.Counter("hits", "misses", "refills")
+
+    def first_page(self, limit: int, db: Session):
+        if limit > self.size:
+            return None
+        if not self._warm:
+            self._refill(db)
+        with self._lock:
+            if not self._warm:
+                ordered = None
+            else:
+                if self._ordered is None:
+                    self._ordered = sorted(
+                        self._posts.values(),
+                        key=lambda post: (post["created_at"], post["id"]),
+                        reverse=True,
+                    )
+                ordered = self._ordered
+            complete = self._complete
+        if ordered is None or (len(ordered) <= limit and not complete):
+            self.counters.incr("misses")
+            return None
+        self.counters.incr("hits")
+        return ordered[: limit + 1]
+
+    def invalidate(self):
+        with self._lock:
+            self._warm = False
+            self._posts = {}
+            self._ordered = None
+
+    def _refill(self, db: Session):
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+            self._pending = []
+            if not self._subscribed:
+                self._subscribed = True
+                pubsub.subscribe(CHANNEL, self._on_event)
+                pubsub.on_reconnect(self.invalidate)
+        bus.listen()
+        try:
+            stmt = select_feed(FEED_FIELDS, False)
+            rows = db.execute(stmt, {"limit": self.size}).mappings()
+            posts = [dict(row, created_at=_utc(row["created_at"])) for row in rows]
+        finally:
+            with self._lock:
+                pending, self._pending, self._warming = self._pending, None, False
+        with self._lock:
+            self._posts = {post["id"]: post for post in posts}
+            self._complete = len(posts) < self.size
+            self._ordered = None
+            self._warm = True
+            # events that raced with the query win over what it returned
+            for kind, post in pending:
+                self._apply(kind, post)
+        self.counters.incr("refills")
+
+    def _on_event(self, payload):
+        event = json.loads(payload)
+        post = event["post"]
+        post["created_at"] = _utc(datetime.fromisoformat(post["created_at"]))
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((event["type"], post))
+            elif self._warm:
+                self._apply(event["type"], post)
+
+    def _apply(self, kind, post):
+        self._ordered = None
+        if kind == "deleted":
+            self._posts.pop(post["id"], None)
+            if len(self._posts) < self.size // 2 and not self._complete:
+                # too thin to serve a page, refill on the next request
+                self._warm = False
+        elif kind == "updated":
+            if post["id"] in self._posts:
+                self._posts[post["id"]] = post
+        else:
+            self._posts[post["id"]] = post
+            if len(self._posts) > self.size:
+                oldest = min(
+                    self._posts.values(),
+                    key=lambda post: (post["created_at"], post["id"]),
+                )
+                del self._posts[oldest["id"]]
+                self._complete = False
+
+    def stats(self):
+        with self._lock:
+            state = {"size": len(self._posts), "warm": self._warm}
+        return {**state, **self.counters.values()}
+
+
+recent_posts = RecentPosts()
+metrics.register("feed", recent_posts.stats)
+# writes that bypass post events (bulk imports) drop every worker's buffer
+bus.register("feed", lambda key: recent_posts.invalidate())
+
+
+def get_feed(db: Session, limit: int = FEED_PAGE_SIZE, cursor=None, fields=None):
+    fields = fields or FEED_FIELDS
+    rows = None
+    if cursor is None and set(fields) <= set(FEED_FIELDS):
+        rows = recent_posts.first_page(limit, db)
+    if rows is None:
+        params = {"limit": limit + 1}
+        if cursor is not None:
+            params["created_at"], params["post_id"] = decode_cursor(cursor)
+        stmt = select_feed(fields, cursor is not None)
+        rows = [dict(row) for row in db.execute(stmt, params).mappings()]
+    release_connection(db)
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    posts = [{name: post[name] for name in fields} for post in rows[:limit]]
+    return posts, next_cursor
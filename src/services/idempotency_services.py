@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+
+from src.core import metrics
+from src.core.settings import settings
+from src.models.databases import dialect_insert, get_engine
+from src.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_TTL_SECONDS = settings.get_float("IDEMPOTENCY_TTL_SECONDS", 86400)
+# a claim not completed within this is treated as abandoned by a dead worker
+IDEMPOTENCY_LOCK_SECONDS = settings.get_float("IDEMPOTENCY_LOCK_SECONDS", 60)
+IDEMPOTENCY_CACHE_ENTRIES = settings.get_int("IDEMPOTENCY_CACHE_ENTRIES", 10000)
+IDEMPOTENCY_PRUNE_INTERVAL = settings.get_float("IDEMPOTENCY_PRUNE_INTERVAL", 60)
+PRUNE_BATCH_SIZE = 1000
+
+CLAIMED, REPLAY, BUSY, MISMATCH = "claimed", "replay", "busy", "mismatch"
+
+keys = IdempotencyKey.__table__
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    content_type: str | None
+    body: bytes
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class IdempotencyStore:
+    """Responses to requests sent with an Idempotency-Key, shared by workers.
+
+    claim() returns CLAIMED to the first request for a key, which must then
+    complete() or release() it. Later requests get REPLAY with the stored
+    response, BUSY while the first is still running, or MISMATCH when the key
+    was used for a different request. Completed responses are also kept in a
+    local LRU so replays on the same worker need no query. Rows expire after
+    `ttl` and are pruned in batches.
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        ttl: float = IDEMPOTENCY_TTL_SECONDS,
+        lock_timeout: float = IDEMPOTENCY_LOCK_SECONDS,
+        max_entries: int = IDEMPOTENCY_CACHE_ENTRIES,
+        prune_interval: float = IDEMPOTENCY_PRUNE_INTERVAL,
+    ):
+        self._engine = engine
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        self.counters = metrics.Counter(
+            "claimed", "replayed", "busy", "mismatched", "pruned"
+        )
+
+    @property
+    def engine(self):
+        return self._engine or get_engine()
+
+    def claim(self, key: str, fingerprint: str):
+        response = self._cached(key)
+        if response is None:
+            now = utcnow()
+            with self.engine.begin() as conn:
+                if self._insert(conn, key, fingerprint, now):
+                    self.counters.incr("claimed")
+                    return CLAIMED, None
+                row = conn.execute(select(keys).where(keys.c.key == key)).first()
+                if row is None:
+                    # released between the insert and the select
+                    self.counters.incr("busy")
+                    return BUSY, None
+                if self._take_over(conn, row, fingerprint, now):
+                    self.counters.incr("claimed")
+                    return CLAIMED, None
+            if row.status_code is None:
+                outcome = BUSY if row.fingerprint == fingerprint else MISMATCH
+                self.counters.incr("busy" if outcome == BUSY else "mismatched")
+                return outcome, None
+            response = StoredResponse(
+                row.fingerprint, row.status_code, row.content_type, row.body
+            )
+            self._remember(key, response)
+
+        if response.fingerprint != fingerprint:
+            self.counters.incr("mismatched")
+            return MISMATCH, None
+        self.counters.incr("replayed")
+        return REPLAY, response
+
+    def complete(self, key: str, response: StoredResponse):
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(keys)
+                .where(keys.c.key == key)
+                .values(
+                    status_code=response.status,
+                    content_type=response.content_type,
+                    body=response.body,
+                    expires_at=utcnow() + timedelta(seconds=self.ttl),
+                )
+            )
+        self._remember(key, response)
+        if time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + self.prune_interval
+            self.prune()
+
+    def release(self, key: str):
+        # the request failed in a way worth retrying, let the next one run
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(keys).where(keys.c.key == key, keys.c.status_code.is_(None))
+            )
+
+    def prune(self):
+        expired = (
+            select(keys.c.key)
+            .where(keys.c.expires_at < utcnow())
+            .limit(PRUNE_BATCH_SIZE)
+            .scalar_subquery()
+        )
+        with self.engine.begin() as conn:
+            pruned = conn.execute(delete(keys).where(keys.c.key.in_(expired))).rowcount
+        self.counters.incr("pruned", pruned)
+        return pruned
+
+    def _insert(self, conn, key, fingerprint, now):
+        stmt = (
+            dialect_insert(conn.dialect.name)(keys)
+            .values(
+                key=key,
+                fingerprint=fingerprint,
+                locked_until=now + timedelta(seconds=self.lock_timeout),
+                expires_at=now + timedelta(seconds=self.ttl),
+            )
+            .on_conflict_do_nothing(index_elements=["key"])
+        )
+        return conn.execute(stmt).rowcount == 1
+
+    def _take_over(self, conn, row, fingerprint, now):
+        # an expired row, or a claim whose worker never finished it
+        expired = row.expires_at < now.replace(tzinfo=row.expires_at.tzinfo)
+        abandoned = row.status_code is None and row.locked_until < now.replace(
+            tzinfo=row.locked_until.tzinfo
+        )
+        if not (expired or abandoned):
+            return False
+        taken = conn.execute(
+            update(keys)
+            .where(
+                keys.c.key == row.key,
+                keys.c.locked_until == row.locked_until,
+                keys.c.expires_at == row.expires_at,
+            )
+            .values(
+                fingerprint=fingerprint,
+                status_code=None,
+                content_type=None,
+                body=None,
+                locked_until=now + timedelta(seconds=self.lock_timeout),
+                expires_at=now + timedelta(seconds=self.ttl),
+            )
+        )
+        return taken.rowcount == 1
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _remember(self, key, response):
+        with self._lock:
+            self._entries[key] = (response, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"cached": size, **self.counters.values()}
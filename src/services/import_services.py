@@ -0,0 +1,425 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from argon2 import PasswordHasher
+from pydantic import ValidationError
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    true,
+)
+from starlette.concurrency import run_in_threadpool
+
+from src.core import metrics
+from src.core.invalidation import bus
+from src.core.settings import settings
+from src.models.databases import dialect_insert, release_connection
+from src.models.import_job import ImportJobState
+from src.models.post import Post
+from src.models.user import RoleEnum, User
+from src.schemas.import_schemas import (
+    IMPORT_COLUMNS,
+    ImportFormat,
+    ImportKind,
+    ImportPost,
+    ImportUser,
+)
+from src.services.dataloader import dialect_of
+from src.services.post_services import add_tag_counts
+
+IMPORT_BATCH_SIZE = settings.get_int("IMPORT_BATCH_SIZE", 5000)
+IMPORT_HASH_WORKERS = settings.get_int("IMPORT_HASH_WORKERS", os.cpu_count() or 1)
+IMPORT_MAX_ERRORS = settings.get_int("IMPORT_MAX_ERRORS", 1000)
+IMPORT_JOBS_KEPT = 100
+# finished jobs stay readable from import_jobs this long
+IMPORT_JOB_RETENTION = settings.get_float("IMPORT_JOB_RETENTION", 7 * 86400)
+# uploads larger than this are spooled to disk while they are received
+UPLOAD_SPOOL_SIZE = 8 * 1024 * 1024
+# received chunks are written out in the threadpool once this much is pending
+UPLOAD_WRITE_SIZE = 1024 * 1024
+
+ROW_MODELS = {ImportKind.users: ImportUser, ImportKind.posts: ImportPost}
+# staged with the type of the column they are merged into, other columns are text
+STAGING_TYPES = {"tags": Post.__table__.c.tags.type}
+
+ph = PasswordHasher()
+
+
+class ImportJob:
+    def __init__(self, kind: ImportKind, fmt: ImportFormat):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.format = fmt
+        self.status = "pending"
+        self.processed = 0
+        self.imported = 0
+        self.errors = []
+        self.error_count = 0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def add_error(self, line: int, error: str):
+        with self._lock:
+            self.error_count += 1
+            # the count stays exact, the report is capped
+            if len(self.errors) < IMPORT_MAX_ERRORS:
+                self.errors.append({"line": line, "error": error})
+
+    def advance(self, processed: int, imported: int):
+        with self._lock:
+            self.processed += processed
+            self.imported += imported
+
+    def report(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind.value,
+                "format": self.format.value,
+                "status": self.status,
+                "processed": self.processed,
+                "imported": self.imported,
+                "failed": self.error_count,
+                "errors": list(self.errors),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+REPORT_FIELDS = (
+    "id",
+    "kind",
+    "format",
+    "status",
+    "processed",
+    "imported",
+    "failed",
+    "errors",
+    "started_at",
+    "finished_at",
+)
+JOB_BY_ID = select(*(getattr(ImportJobState, name) for name in REPORT_FIELDS)).where(
+    ImportJobState.id == bindparam("job_id")
+)
+
+
+def save_job(job: ImportJob, session_factory):
+    """Store the job's report so GET /admin/import/{id} works on any worker."""
+    report = job.report()
+    with session_factory() as db:
+        stmt = dialect_insert(dialect_of(db))(ImportJobState).values(**report)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["id"],
+                set_={name: stmt.excluded[name] for name in REPORT_FIELDS[3:]},
+            )
+        )
+        db.commit()
+
+
+def prune_jobs(session_factory):
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=IMPORT_JOB_RETENTION)
+    with session_factory() as db:
+        db.execute(delete(ImportJobState).where(ImportJobState.created_at < cutoff))
+        db.commit()
+
+
+def read_rows(fileobj, fmt: ImportFormat):
+    """Yield (line number, dict) pairs, or (line number, error message)."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+    if fmt == ImportFormat.csv:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            yield line, "invalid JSON"
+            continue
+        yield line, row if isinstance(row, dict) else "expected a JSON object"
+
+
+def validate_rows(job: ImportJob, rows):
+    model = ROW_MODELS[job.kind]
+    valid = []
+    for line, row in rows:
+        if isinstance(row, str):
+            job.add_error(line, row)
+            continue
+        try:
+            valid.append((line, model.model_validate(row)))
+        except ValidationError as exc:
+            problems = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                for err in exc.errors()
+            )
+            job.add_error(line, problems)
+    return valid
+
+
+def batched(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    global _hash_pool
+    if IMPORT_HASH_WORKERS <= 1:
+        return None
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=IMPORT_HASH_WORKERS)
+        return _hash_pool
+
+
+def hash_passwords(passwords, pool=None):
+    # Argon2 is CPU bound and holds the GIL, threads would not help
+    if pool is None:
+        return [ph.hash(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (IMPORT_HASH_WORKERS * 4))
+    return list(pool.map(ph.hash, passwords, chunksize=chunksize))
+
+
+def staging_table(kind: ImportKind):
+    columns = [
+        Column(name, STAGING_TYPES.get(name, String)) for name in IMPORT_COLUMNS[kind]
+    ]
+    return Table(
+        f"import_{kind.value}",
+        MetaData(),
+        Column("line", Integer),
+        *columns,
+        prefixes=["TEMPORARY"],
+    )
+
+
+def array_literal(items):
+    # COPY reads arrays as {"a","b"}, quotes and backslashes escaped
+    escaped = (item.replace("\\", "\\\\").replace('"', '\\"') for item in items)
+    return "{" + ",".join(f'"{item}"' for item in escaped) + "}"
+
+
+def copy_rows(conn, table: Table, rows, columns=None):
+    columns = columns or [column.name for column in table.columns]
+    if conn.dialect.name != "postgresql":
+        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+        return
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [array_literal(value) if isinstance(value, list) else value for value in row]
+        for row in rows
+    )
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def merge_users(conn, staging: Table):
+    already = select(staging.c.line).join(User, User.email == staging.c.email)
+    skipped = [(line, "email already registered") for line in conn.scalars(already)]
+    stmt = (
+        dialect_insert(conn.dialect.name)(User)
+        .from_select(
+            ["name", "email", "password", "role"],
+            select(
+                staging.c.name,
+                staging.c.email,
+                staging.c.password,
+                # imports never create admins
+                cast(literal(RoleEnum.user.value), User.__table__.c.role.type),
+            ).where(true()),
+        )
+        .on_conflict_do_nothing(index_elements=["email"])
+    )
+    return conn.execute(stmt).rowcount, skipped
+
+
+def merge_posts(conn, staging: Table):
+    unknown = (
+        select(staging.c.line)
+        .outerjoin(User, User.email == staging.c.owner_email)
+        .where(User.id.is_(None))
+    )
+    skipped = [(line, "unknown owner_email") for line in conn.scalars(unknown)]
+    known = select(
+        staging.c.title, staging.c.content, staging.c.tags, User.id, func.now()
+    ).join(User, User.email == staging.c.owner_email)
+    stmt = Post.__table__.insert().from_select(
+        ["title", "content", "tags", "owner_id", "created_at"], known
+    )
+    imported = conn.execute(stmt).rowcount
+    # bulk rows bypass create_post, keep the owners' tag counts in step here
+    tagged = select(User.id, staging.c.tags).join(
+        User, User.email == staging.c.owner_email
+    )
+    counts = Counter(
+        (owner_id, tag) for owner_id, tags in conn.execute(tagged) for tag in tags
+    )
+    if counts:
+        add_tag_counts(conn, conn.dialect.name, counts)
+    return imported, skipped
+
+
+def load_batch(job: ImportJob, db, rows):
+    staging = staging_table(job.kind)
+    conn = db.connection()
+    staging.create(conn)
+    try:
+        copy_rows(conn, staging, rows)
+        merge = merge_users if job.kind == ImportKind.users else merge_posts
+        imported, skipped = merge(conn, staging)
+    finally:
+        staging.drop(conn)
+    db.commit()
+    return imported, skipped
+
+
+def prepare_batch(job: ImportJob, batch, seen_emails: set, pool):
+    valid = validate_rows(job, batch)
+    if job.kind == ImportKind.posts:
+        return [(line, r.owner_email, r.title, r.content, r.tags) for line, r in valid]
+
+    users = []
+    for line, user in valid:
+        if user.email in seen_emails:
+            job.add_error(line, "duplicate email in file")
+            continue
+        seen_emails.add(user.email)
+        users.append((line, user.name, user.email, user.password))
+    hashes = hash_passwords([password for *_, password in users], pool)
+    return [(*row[:3], hashed) for row, hashed in zip(users, hashes)]
+
+
+def run_import(job: ImportJob, fileobj, session_factory, pool=None, on_batch=None):
+    job.status = "running"
+    job.started_at = time.time()
+    seen_emails = set()
+    try:
+        for batch in batched(read_rows(fileobj, job.format), IMPORT_BATCH_SIZE):
+            rows = prepare_batch(job, batch, seen_emails, pool)
+            imported, skipped = 0, []
+            if rows:
+                with session_factory() as db:
+                    imported, skipped = load_batch(job, db, rows)
+            for line, error in sorted(skipped):
+                job.add_error(line, error)
+            if job.kind == ImportKind.posts and imported:
+                # bulk rows bypass post events, every worker refills its feed head
+                bus.publish("feed")
+            job.advance(len(batch), imported)
+            import_counters.incr("rows", len(batch))
+            import_counters.incr("imported", imported)
+            save_job(job, session_factory)
+            if on_batch is not None:
+                on_batch(job)
+        job.status = "done"
+    except Exception as exc:
+        job.status = "failed"
+        job.add_error(0, f"import aborted: {exc}")
+        raise
+    finally:
+        job.finished_at = time.time()
+        fileobj.close()
+        save_job(job, session_factory)
+    return job
+
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+# one import at a time per worker, each already uses every core for hashing
+_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import")
+import_counters = metrics.Counter("jobs", "rows", "imported")
+
+
+def stats():
+    with _jobs_lock:
+        running = sum(job.status in ("pending", "running") for job in _jobs.values())
+    return {"active_jobs": running, **import_counters.values()}
+
+
+metrics.register("imports", stats)
+
+
+async def receive_upload(chunks):
+    # writes can hit the disk once the upload is spooled, keep them off the
+    # event loop
+    upload = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    pending, size = [], 0
+    async for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= UPLOAD_WRITE_SIZE:
+            await run_in_threadpool(upload.writelines, pending)
+            pending, size = [], 0
+    await run_in_threadpool(upload.writelines, pending)
+    upload.seek(0)
+    return upload
+
+
+def start_import(kind: ImportKind, fmt: ImportFormat, upload, session_factory):
+    job = ImportJob(kind, fmt)
+    prune_jobs(session_factory)
+    save_job(job, session_factory)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > IMPORT_JOBS_KEPT:
+            _jobs.popitem(last=False)
+    import_counters.incr("jobs")
+    _runner.submit(run_import, job, upload, session_factory, get_hash_pool())
+    return job
+
+
+def get_job(job_id: str, db):
+    """The job's report: live when it runs on this worker, else as stored."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.report()
+    row = db.execute(JOB_BY_ID, {"job_id": job_id}).mappings().first()
+    release_connection(db)
+    return dict(row) if row else None
+
+
+def shutdown():
+    _runner.shutdown(wait=False, cancel_futures=True)
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
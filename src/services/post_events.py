@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+
+from sqlalchemy.orm import Session
+
+from src.core import metrics
+from src.core.pubsub import pubsub
+from src.core.settings import settings
+
+CHANNEL = "post_events"
+SUBSCRIBER_QUEUE_SIZE = settings.get_int("POST_EVENTS_QUEUE_SIZE", 100)
+
+
+class Subscription:
+    def __init__(self, owner_email: str, maxsize: int):
+        self.owner_email = owner_email
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, event):
+        # runs on the subscription's loop; returns False once it has overflowed
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            # a slow client must resync with GET /posts instead of stalling
+            # the fan-out for everybody else
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+            return False
+
+    async def events(self, heartbeat: float | None = None):
+        # yields None after `heartbeat` idle seconds so callers can ping the client
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield event
+            if event["type"] == "resync":
+                return
+
+
+class PostEventBroker:
+    """Fans post changes out to this worker's subscribers, keyed by owner."""
+
+    def __init__(self, pubsub, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.pubsub = pubsub
+        self.queue_size = queue_size
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._unsubscribe = None
+        self.counters = metrics.Counter("published", "delivered", "overflowed")
+
+    def publish(self, db: Session, owner_email: str, kind: str, post):
+        payload = json.dumps(
+            {
+                "owner": owner_email,
+                "type": kind,
+                # bodies stay out of the notification, clients fetch them on demand
+                "post": {
+                    "id": post.id,
+                    "title": post.title,
+                    "owner_id": post.owner_id,
+                    "created_at": post.created_at.isoformat(),
+                },
+            }
+        )
+        self.pubsub.publish(CHANNEL, payload, db=db)
+        self.counters.incr("published")
+
+    def subscribe(self, owner_email: str):
+        subscription = Subscription(owner_email, self.queue_size)
+        with self._lock:
+            if self._unsubscribe is None:
+                self._unsubscribe = self.pubsub.subscribe(CHANNEL, self._dispatch)
+            self._subscriptions.setdefault(owner_email, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.owner_email)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.owner_email]
+
+    def _dispatch(self, payload):
+        event = json.loads(payload)
+        owner_email = event.pop("owner")
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(owner_email, ()))
+        for subscription in subscriptions:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(self._offer, subscription, event)
+
+    def _offer(self, subscription, event):
+        already_overflowed = subscription.overflowed
+        if subscription.offer(event):
+            self.counters.incr("delivered")
+        elif not already_overflowed:
+            self.counters.incr("overflowed")
+
+    def stats(self):
+        with self._lock:
+            subscribers = sum(len(subs) for subs in self._subscriptions.values())
+        return {"subscribers": subscribers, **self.counters.values()}
+
+
+broker = PostEventBroker(pubsub)
+metrics.register("post_events", broker.stats)
+
+
+def publish(db: Session, owner_email: str, kind: str, post):
+    broker.publish(db, owner_email, kind, post)
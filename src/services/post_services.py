@@ -1,59 +1,288 @@
+from functools import lru_cache
+
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.orm import Session, undefer
 
+from src.models.databases import dialect_insert, release_connection
 from src.models.post import Post
+from src.models.routing import reads_from_replica
+from src.models.tag_count import TagCount
 from src.models.user import User
-from src.schemas.post_schemas import PostCreate, PostUpdate
+from src.schemas.post_schemas import MATCH_ALL, POST_FIELDS, PostCreate, PostUpdate
+from src.services import post_events, revision_services
+from src.services.coalescing import SingleFlight
+from src.services.dataloader import (
+    dialect_of,
+    found_and_missing,
+    get_loader,
+    id_in,
+)
+from src.services.rows import fetch_rows
 
+# what a listing returns unless fields= asks otherwise; bodies are fetched
+# per post
+LIST_FIELDS = ("id", "title", "owner_id", "created_at", "tags")
 
-def create_post_for_user(user_email: str, post_data: PostCreate, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
+# statements are built once and executed with bound parameters, so each call
+# hits the engine's compiled cache instead of rebuilding a Query. Every posts
+# query filters on owner_id, the partition key, so it touches one partition.
+USER_ID_BY_EMAIL = select(User.id).where(User.email == bindparam("email")).limit(1)
+POST_BY_ID = (
+    select(Post)
+    .where(Post.id == bindparam("post_id"), Post.owner_id == bindparam("owner_id"))
+    .limit(1)
+)
+# the row is locked so concurrent edits number their revisions in turn
+POST_FOR_UPDATE = (
+    select(
+        Post, revision_services.LATEST_VERSION, revision_services.LATEST_SNAPSHOT
+    )
+    .options(undefer(Post.content))
+    .where(Post.id == bindparam("post_id"), Post.owner_id == bindparam("owner_id"))
+    .limit(1)
+    .with_for_update(of=Post)
+)
+POST_BY_TITLE = (
+    select(Post)
+    .where(Post.owner_id == bindparam("owner_id"), Post.title == bindparam("title"))
+    .limit(1)
+)
+TAG_COUNTS_BY_OWNER = (
+    select(TagCount.tag, TagCount.count)
+    .where(TagCount.owner_id == bindparam("owner_id"))
+    .order_by(TagCount.count.desc(), TagCount.tag)
+    .limit(bindparam("limit"))
+)
+DECREMENT_TAG_COUNTS = (
+    update(TagCount)
+    .where(
+        # not "owner_id", that name is reserved for the SET clause
+        TagCount.owner_id == bindparam("owner"),
+        TagCount.tag.in_(bindparam("tags", expanding=True)),
+    )
+    .values(count=TagCount.count - 1)
+)
+DELETE_UNUSED_TAGS = delete(TagCount).where(
+    TagCount.owner_id == bindparam("owner"),
+    TagCount.tag.in_(bindparam("tags", expanding=True)),
+    TagCount.count <= 0,
+)
+
+
+# concurrent GET /posts/{id} for the same post share one query; keyed on the
+# session's routing too, so a caller pinned to the primary never gets a
+# replica's row
+post_lookups = SingleFlight("post_lookups")
+
+
+def get_owner_id(user_email: str, db: Session):
+    owner_id = db.scalar(USER_ID_BY_EMAIL, {"email": user_email})
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="User not found")
-    post = Post(title=post_data.title, content=post_data.content, owner_id=user.id)
+    return owner_id
+
+
+def create_post_for_user(user_email: str, post_data: PostCreate, db: Session):
+    owner_id = get_owner_id(user_email, db)
+    post = Post(
+        title=post_data.title,
+        content=post_data.content,
+        tags=post_data.tags,
+        owner_id=owner_id,
+    )
     db.add(post)
+    db.flush()
+    count_tags(db, owner_id, added=post.tags)
+    post_events.publish(db, user_email, "created", post)
     db.commit()
-    db.refresh(post)
     return post
 
 
-def get_all_posts(user_email: str, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return db.query(Post).filter(Post.owner_id == user.id).all()
+@lru_cache(maxsize=64)
+def select_post_fields(fields):
+    # column-restricted select, rows come back as plain dicts
+    return select(*(getattr(Post, name) for name in fields)).where(
+        Post.owner_id == bindparam("owner_id")
+    )
 
 
-def get_post(user_email: str, post_id: int, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return db.query(Post).filter(Post.id == post_id, Post.owner_id == user.id).first()
+@lru_cache(maxsize=64)
+def select_post_fields_by_id(fields):
+    return (
+        select_post_fields(fields).where(Post.id == bindparam("post_id")).limit(1)
+    )
+
+
+@lru_cache(maxsize=64)
+def select_post_fields_by_ids(fields, dialect):
+    return select_post_fields(fields).where(id_in(Post.id, dialect))
+
+
+def post_loader(owner_id: int, db: Session, fields=POST_FIELDS):
+    """Request-scoped loader of one owner's posts by id, as dicts of `fields`."""
+
+    def load_batch(db, ids):
+        stmt = select_post_fields_by_ids(fields, dialect_of(db))
+        rows = db.execute(stmt, {"owner_id": owner_id, "ids": ids}).mappings()
+        return {row["id"]: dict(row) for row in rows}
+
+    return get_loader(db, ("posts", owner_id, fields), load_batch)
+
+
+def get_posts_by_ids(user_email: str, ids, db: Session, fields=None):
+    fields = fields or POST_FIELDS
+    owner_id = get_owner_id(user_email, db)
+    posts = post_loader(owner_id, db, fields).load_many(ids)
+    release_connection(db)
+    return found_and_missing(ids, posts)
+
+
+def tags_match(column, match: str, dialect: str):
+    # on Postgres @> (all) and && (any), both served by the GIN index; SQLite
+    # counts matching elements of the JSON array
+    if dialect == "postgresql":
+        tags = bindparam("tags", type_=column.type)
+        return column.contains(tags) if match == MATCH_ALL else column.overlap(tags)
+    element = func.json_each(column).table_valued("value")
+    matched = (
+        select(func.count(func.distinct(element.c.value)))
+        .where(element.c.value.in_(bindparam("tags", expanding=True)))
+        .scalar_subquery()
+    )
+    if match == MATCH_ALL:
+        return matched == bindparam("tag_count")
+    return matched > 0
+
+
+@lru_cache(maxsize=64)
+def select_tagged_posts(fields, match, dialect):
+    return select_post_fields(fields).where(tags_match(Post.tags, match, dialect))
 
 
-def get_post_by_title(title: str, db: Session):
-    return db.query(Post).filter(Post.title == title).first()
+def get_all_posts(user_email: str, db: Session, fields=None, tags=None):
+    """The user's posts as read-only rows, see rows.ListRow.
+
+    `tags` is a (tags, match) pair from TagSelection.
+    """
+    fields = fields or LIST_FIELDS
+    owner_id = get_owner_id(user_email, db)
+    params = {"owner_id": owner_id}
+    if tags is None:
+        stmt = select_post_fields(fields)
+    else:
+        names, match = tags
+        stmt = select_tagged_posts(fields, match, dialect_of(db))
+        params.update(tags=list(names), tag_count=len(names))
+    posts = fetch_rows(db, stmt, params, "PostRow")
+    release_connection(db)
+    return posts
+
+
+def add_tag_counts(db, dialect: str, counts: dict):
+    """Add `counts`, {(owner_id, tag): n}, to the TagCount rows."""
+    # a fixed order, so concurrent writers lock the rows in the same order
+    stmt = dialect_insert(dialect)(TagCount).values(
+        [
+            {"owner_id": owner_id, "tag": tag, "count": count}
+            for (owner_id, tag), count in sorted(counts.items())
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["owner_id", "tag"],
+            set_={"count": TagCount.count + stmt.excluded["count"]},
+        )
+    )
+
+
+def count_tags(db: Session, owner_id: int, added=(), removed=()):
+    """Apply a post's tag changes to the owner's TagCount rows."""
+    # a fixed order, so concurrent writers lock the rows in the same order
+    removed = sorted(removed)
+    if added:
+        add_tag_counts(db, dialect_of(db), {(owner_id, tag): 1 for tag in added})
+    if removed:
+        params = {"owner": owner_id, "tags": removed}
+        db.execute(DECREMENT_TAG_COUNTS, params)
+        db.execute(DELETE_UNUSED_TAGS, params)
+
+
+def get_tag_counts(user_email: str, db: Session, limit: int = 100):
+    owner_id = get_owner_id(user_email, db)
+    rows = db.execute(TAG_COUNTS_BY_OWNER, {"owner_id": owner_id, "limit": limit})
+    tags = [{"tag": tag, "count": count} for tag, count in rows]
+    release_connection(db)
+    return tags
+
+
+def get_post(user_email: str, post_id: int, db: Session, fields=None):
+    fields = fields or POST_FIELDS
+    return post_lookups.do(
+        (user_email, post_id, fields, reads_from_replica(db)),
+        lambda: load_post(user_email, post_id, db, fields),
+    )
+
+
+def load_post(user_email: str, post_id: int, db: Session, fields):
+    owner_id = get_owner_id(user_email, db)
+    params = {"post_id": post_id, "owner_id": owner_id}
+    row = db.execute(select_post_fields_by_id(fields), params).mappings().first()
+    release_connection(db)
+    return dict(row) if row else None
+
+
+def get_post_by_title(user_email: str, title: str, db: Session):
+    owner_id = get_owner_id(user_email, db)
+    return db.scalars(POST_BY_TITLE, {"owner_id": owner_id, "title": title}).first()
 
 
 def update_post(user_email: str, post_id: int, post_data: PostUpdate, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    post = db.query(Post).filter(Post.id == post_id, Post.owner_id == user.id).first()
-    if post:
-        post.title = post_data.title
-        post.content = post_data.content
-        db.commit()
-        db.refresh(post)
+    owner_id = get_owner_id(user_email, db)
+    params = {"post_id": post_id, "owner_id": owner_id}
+    row = db.execute(POST_FOR_UPDATE, params).first()
+    if row is None:
+        return None
+    post, latest, latest_snapshot = row
+    values = {"title": post_data.title, "content": post_data.content}
+    if post_data.tags is not None:
+        old, new = set(post.tags), set(post_data.tags)
+        values["tags"] = post_data.tags
+        count_tags(db, owner_id, added=new - old, removed=old - new)
+    revision_services.write_update(db, post, values, latest, latest_snapshot)
+    post_events.publish(db, user_email, "updated", post)
+    db.commit()
     return post
 
 
 def delete_post(user_email: str, post_id: int, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    post = db.query(Post).filter(Post.id == post_id, Post.owner_id == user.id).first()
+    owner_id = get_owner_id(user_email, db)
+    post = db.scalars(POST_BY_ID, {"post_id": post_id, "owner_id": owner_id}).first()
     if post:
         db.delete(post)
+        count_tags(db, owner_id, removed=post.tags)
+        revision_services.delete_revisions(db, post)
+        post_events.publish(db, user_email, "deleted", post)
         db.commit()
     return post
+
+
+def get_revisions(user_email: str, post_id: int, db: Session, limit: int = 100):
+    owner_id = get_owner_id(user_email, db)
+    history = revision_services.list_revisions(db, owner_id, post_id, limit)
+    # history starts at the first edit, an unedited post has none
+    if not history:
+        params = {"post_id": post_id, "owner_id": owner_id}
+        if db.execute(select_post_fields_by_id(("id",)), params).first() is None:
+            raise HTTPException(status_code=404, detail="Post not found")
+    release_connection(db)
+    return history
+
+
+def get_revision(user_email: str, post_id: int, version: int, db: Session):
+    owner_id = get_owner_id(user_email, db)
+    revision = revision_services.get_revision(db, owner_id, post_id, version)
+    release_connection(db)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return revision
@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from fastapi import HTTPException
+
+from src.core.settings import settings
+
+PROFILE_MAX_SECONDS = settings.get_float("PROFILE_MAX_SECONDS", 30)
+TRACEMALLOC_FRAMES = settings.get_int("TRACEMALLOC_FRAMES", 10)
+
+# leaf frames of threads parked waiting for work, left out unless asked for
+IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# one sampler per worker, two would only measure each other
+_profile_lock = threading.Lock()
+_memory_lock = threading.Lock()
+_baseline = None
+
+
+def frame_label(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def is_idle(code) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS
+
+
+def sample_stacks(seconds: float, interval: float, include_idle: bool = False):
+    """Samples every thread's stack for `seconds`; returns collapsed stacks.
+
+    The result maps "thread;outer;...;inner" to the number of samples it was
+    seen in, the input format of flamegraph.pl and speedscope. Nothing runs
+    outside a call, so there is no cost when no one is profiling.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        stacks = Counter()
+        labels = {}
+        me = threading.get_ident()
+        deadline = time.monotonic() + min(seconds, PROFILE_MAX_SECONDS)
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not include_idle and is_idle(frame.f_code)):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _profile_lock.release()
+
+
+def collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def start_memory_tracing(frames: int = TRACEMALLOC_FRAMES):
+    global _baseline
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _baseline = None
+    return memory_status()
+
+
+def stop_memory_tracing():
+    global _baseline
+    with _memory_lock:
+        tracemalloc.stop()
+        _baseline = None
+    return memory_status()
+
+
+def memory_status():
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    return {"tracing": True, "traced_bytes": current, "peak_bytes": peak}
+
+
+def memory_snapshot(limit: int = 20, group_by: str = "lineno", diff: bool = False):
+    """Top allocation sites now, or their growth since the previous snapshot.
+
+    Each call becomes the baseline for the next diff.
+    """
+    global _baseline
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            raise HTTPException(
+                status_code=409, detail="Memory tracing is not running"
+            )
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        baseline, _baseline = _baseline, snapshot
+
+    if diff and baseline is not None:
+        top = [
+            {
+                "site": str(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in snapshot.compare_to(baseline, group_by)[:limit]
+        ]
+    else:
+        top = [
+            {"site": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+    return {**memory_status(), "diff": diff and baseline is not None, "top": top}
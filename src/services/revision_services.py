@@ -0,0 +1,198 @@
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.core import metrics
+from src.core.settings import settings
+from src.models.post import Post
+from src.models.revision import PostRevision
+from src.services.dataloader import dialect_of
+
+# a full copy at least this often bounds the deltas applied to read a version
+REVISION_SNAPSHOT_INTERVAL = settings.get_int("REVISION_SNAPSHOT_INTERVAL", 10)
+
+# words with their trailing whitespace, so edits inside a long paragraph
+# still leave most of it to copy
+TOKEN = re.compile(r"\S+\s*|\s+")
+
+revisions = PostRevision.__table__
+
+LATEST_VERSION = (
+    select(func.max(PostRevision.version))
+    .where(PostRevision.post_id == Post.id)
+    .scalar_subquery()
+)
+LATEST_SNAPSHOT = (
+    select(func.max(PostRevision.version))
+    .where(PostRevision.post_id == Post.id, PostRevision.snapshot.is_(True))
+    .scalar_subquery()
+)
+REVISIONS_BY_POST = (
+    select(
+        PostRevision.version,
+        PostRevision.created_at,
+        PostRevision.title,
+        PostRevision.snapshot,
+        func.length(PostRevision.data).label("stored_bytes"),
+    )
+    .where(
+        PostRevision.post_id == bindparam("post_id"),
+        PostRevision.owner_id == bindparam("owner_id"),
+    )
+    .order_by(PostRevision.version.desc())
+    .limit(bindparam("limit"))
+)
+# the newest snapshot at or before the version and every delta after it, in
+# one query
+SNAPSHOT_BEFORE = (
+    select(func.max(PostRevision.version))
+    .where(
+        PostRevision.post_id == bindparam("post_id"),
+        PostRevision.snapshot.is_(True),
+        PostRevision.version <= bindparam("version"),
+    )
+    .scalar_subquery()
+)
+REVISION_CHAIN = (
+    select(
+        PostRevision.version,
+        PostRevision.created_at,
+        PostRevision.title,
+        PostRevision.snapshot,
+        PostRevision.data,
+    )
+    .where(
+        PostRevision.post_id == bindparam("post_id"),
+        PostRevision.owner_id == bindparam("owner_id"),
+        PostRevision.version.between(SNAPSHOT_BEFORE, bindparam("version")),
+    )
+    .order_by(PostRevision.version)
+)
+DELETE_REVISIONS = delete(PostRevision).where(
+    PostRevision.post_id == bindparam("post_id"),
+    PostRevision.owner_id == bindparam("owner_id"),
+)
+
+counters = metrics.Counter("written", "snapshots", "stored_bytes", "content_bytes")
+metrics.register("revisions", counters.values)
+
+
+def encode_delta(old: str, new: str) -> bytes:
+    """`new` as a list of [start, end) token ranges copied from `old` and
+    strings of inserted text."""
+    old_tokens, new_tokens = TOKEN.findall(old), TOKEN.findall(new)
+    ops = []
+    matcher = SequenceMatcher(None, old_tokens, new_tokens)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_tokens[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode())
+
+
+def apply_delta(old: str, data: bytes) -> str:
+    old_tokens = TOKEN.findall(old)
+    return "".join(
+        "".join(old_tokens[op[0] : op[1]]) if isinstance(op, list) else op
+        for op in json.loads(zlib.decompress(data))
+    )
+
+
+def decode(row, previous: str | None) -> str:
+    if row.snapshot:
+        return zlib.decompress(row.data).decode()
+    return apply_delta(previous, row.data)
+
+
+def make_revision(post, version, title, old, new, since_snapshot):
+    full = zlib.compress(new.encode())
+    snapshot = old is None or since_snapshot >= REVISION_SNAPSHOT_INTERVAL
+    data = full
+    if not snapshot:
+        data = encode_delta(old, new)
+        # a rewrite can make the delta the larger of the two
+        if len(data) >= len(full):
+            snapshot, data = True, full
+    counters.incr("written")
+    counters.incr("snapshots", snapshot)
+    counters.incr("stored_bytes", len(data))
+    counters.incr("content_bytes", len(new.encode()))
+    return {
+        "post_id": post.id,
+        "version": version,
+        "owner_id": post.owner_id,
+        "title": title,
+        "snapshot": snapshot,
+        "data": data,
+    }
+
+
+def write_update(db: Session, post, values: dict, latest, latest_snapshot):
+    """Update the post and record the new version.
+
+    `latest` and `latest_snapshot` are the post's newest version and newest
+    snapshot, None before its first edit; the post as created is then
+    recorded as version 1. On Postgres the UPDATE rides in a CTE of the
+    revision INSERT, so both cost one round trip.
+    """
+    rows = []
+    if latest is None:
+        first = make_revision(post, 1, post.title, None, post.content, 0)
+        rows.append({**first, "created_at": post.created_at})
+        latest = latest_snapshot = 1
+    rows.append(
+        make_revision(
+            post,
+            latest + 1,
+            values["title"],
+            post.content,
+            values["content"],
+            latest + 1 - latest_snapshot,
+        )
+    )
+
+    post_update = (
+        update(Post.__table__)
+        .where(Post.id == post.id, Post.owner_id == post.owner_id)
+        .values(**values)
+    )
+    record = insert(revisions).values(rows)
+    if dialect_of(db) == "postgresql":
+        db.execute(record.add_cte(post_update.cte("updated")))
+    else:
+        db.execute(post_update)
+        db.execute(record)
+    for name, value in values.items():
+        set_committed_value(post, name, value)
+
+
+def list_revisions(db: Session, owner_id: int, post_id: int, limit: int):
+    params = {"post_id": post_id, "owner_id": owner_id, "limit": limit}
+    return [dict(row) for row in db.execute(REVISIONS_BY_POST, params).mappings()]
+
+
+def get_revision(db: Session, owner_id: int, post_id: int, version: int):
+    params = {"post_id": post_id, "owner_id": owner_id, "version": version}
+    rows = db.execute(REVISION_CHAIN, params).all()
+    if not rows or rows[-1].version != version:
+        return None
+    content = None
+    for row in rows:
+        content = decode(row, content)
+    last = rows[-1]
+    return {
+        "version": last.version,
+        "created_at": last.created_at,
+        "title": last.title,
+        "content": content,
+    }
+
+
+def delete_revisions(db: Session, post):
+    db.execute(DELETE_REVISIONS, {"post_id": post.id, "owner_id": post.owner_id})
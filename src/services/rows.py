@@ -0,0 +1,62 @@
+import json
+from dataclasses import make_dataclass
+from datetime import date
+from functools import lru_cache
+from itertools import starmap
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+class ListRow:
+    """Base of the row classes listings are returned as.
+
+    A row holds only its column values in slots: no __dict__, no instance
+    state, nothing in the session's identity map. Columns read as attributes
+    or by name, like the dicts returned by field-selected lookups.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@lru_cache(maxsize=64)
+def row_class(name: str, fields: tuple):
+    return make_dataclass(name, fields, bases=(ListRow,), slots=True)
+
+
+def fetch_rows(db, stmt, params, name: str):
+    """Execute a column select and return its rows as `name` row objects."""
+    result = db.execute(stmt, params)
+    return list(starmap(row_class(name, tuple(result.keys())), result))
+
+
+def encode(value):
+    if isinstance(value, ListRow):
+        return value._asdict()
+    if isinstance(value, date):
+        return value.isoformat()
+    return jsonable_encoder(value)
+
+
+class RowsResponse(JSONResponse):
+    """JSON response for listings, serialized in one json.dumps pass.
+
+    jsonable_encoder walks and copies every value before it is dumped; here
+    plain values go straight to the C encoder and only rows, dates and
+    anything else it does not know reach `encode`.
+    """
+
+    def render(self, content) -> bytes:
+        return json.dumps(
+            content,
+            default=encode,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
@@ -1,10 +1,17 @@
+import os
 from unittest.mock import MagicMock
 
+# keep post events in-process, tests have no Postgres to LISTEN on
+os.environ.setdefault("PUBSUB_BACKEND", "memory")
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
 
 from src.main import app
-from src.models.databases import get_db
+from src.models.databases import Base, get_db, get_read_db, make_sessionmaker
+from src.models.user import User
 
 
 # override DB dependency with a mock
@@ -17,8 +24,32 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 
 @pytest.fixture
 def client():
     return TestClient(app)
+
+
+@pytest.fixture
+def Session():
+    """Sessions on a fresh in-memory SQLite database holding Alice and Bob.
+
+    Every connection shares the one database, so threads see each other's
+    writes. Session.statements collects the SQL run after seeding.
+    """
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    Session = make_sessionmaker(engine)
+    with Session() as db:
+        db.add(User(name="Alice", email="alice@example.com", password="x"))
+        db.add(User(name="Bob", email="bob@example.com", password="x"))
+        db.commit()
+    Session.statements = statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    return Session
@@ -95,6 +95,38 @@ def test_get_users_returns_empty_list():
     app.dependency_overrides.clear()
 
 
+def test_get_users_with_fields():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    with patch(
+        "src.services.admin_services.get_user_for_admin",
+        return_value=[{"id": 1, "email": "alice@example.com"}],
+    ) as mock_get:
+        res = client.get("/api/v1/admin/users?fields=email")
+
+        assert res.status_code == 200
+        assert res.json()["users"] == [{"id": 1, "email": "alice@example.com"}]
+        assert mock_get.call_args.kwargs["fields"] == ("id", "email")
+
+    app.dependency_overrides.clear()
+
+
+def test_get_users_password_not_selectable():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    res = client.get("/api/v1/admin/users?fields=email,password")
+
+    assert res.status_code == 400
+
+    app.dependency_overrides.clear()
+
+
 # ─── PATCH /admin/users/{user_id}/promote ────────────────
 
 
@@ -256,3 +288,33 @@ def test_delete_user_as_regular_user_forbidden():
     assert res.status_code == 403
 
     app.dependency_overrides.clear()
+
+
+# ─── GET /admin/metrics ──────────────────────────────────
+
+
+def test_get_metrics_as_admin():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+
+    res = client.get("/api/v1/admin/metrics")
+
+    assert res.status_code == 200
+    assert "checked_out" in res.json()["metrics"]["db_pool"]
+
+    app.dependency_overrides.clear()
+
+
+def test_get_metrics_as_regular_user_forbidden():
+    from fastapi import HTTPException
+
+    def raise_403():
+        raise HTTPException(status_code=403, detail="Admins only")
+
+    app.dependency_overrides[admin_services.getCurrentAdmin] = raise_403
+
+    res = client.get("/api/v1/admin/metrics")
+    assert res.status_code == 403
+
+    app.dependency_overrides.clear()
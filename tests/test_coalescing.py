@@ -0,0 +1,157 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from src.models.post import Post
+from src.services import post_services
+from src.services.coalescing import SingleFlight
+
+
+def run_concurrently(n, fn):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(fn) for _ in range(n)]
+        return [future.result() for future in futures]
+
+
+def blocking_lookup(release, result="row"):
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        release.wait(1)
+        return result
+
+    return lookup, calls
+
+
+# ─── SingleFlight ────────────────────────────────────────
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test_share")
+    release = threading.Event()
+    lookup, calls = blocking_lookup(release)
+
+    def call():
+        return flight.do("key", lookup)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(call) for _ in range(5)]
+        while flight.stats()["coalesced"] < 4:
+            pass
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["row"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {
+        "in_flight": 0,
+        "leaders": 1,
+        "coalesced": 4,
+        "timeouts": 0,
+    }
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight("test_keys")
+
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["leaders"] == 2
+
+
+def test_exception_is_shared_with_waiters():
+    flight = SingleFlight("test_errors")
+    release = threading.Event()
+
+    def failing():
+        release.wait(1)
+        raise LookupError("missing")
+
+    def call():
+        return flight.do("key", failing)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(call) for _ in range(3)]
+        while flight.stats()["coalesced"] < 2:
+            pass
+        release.set()
+        for future in futures:
+            with pytest.raises(LookupError):
+                future.result()
+
+    # the failed call is forgotten, the next caller retries
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_waiter_falls_back_after_timeout():
+    flight = SingleFlight("test_timeout", timeout=0.01)
+    release = threading.Event()
+    lookup, _ = blocking_lookup(release)
+
+    leader = threading.Thread(target=flight.do, args=("key", lookup))
+    leader.start()
+    while not flight.stats()["in_flight"]:
+        pass
+    result = flight.do("key", lambda: "fallback")
+    release.set()
+    leader.join()
+
+    assert result == "fallback"
+    assert flight.stats()["timeouts"] == 1
+
+
+# ─── post_services.get_post ──────────────────────────────
+
+
+def test_get_post_returns_shared_snapshot(Session):
+    with Session() as db:
+        post = Post(title="Title", content="Body", owner_id=1)
+        db.add(post)
+        db.commit()
+        post_id = post.id
+
+    def lookup():
+        with Session() as db:
+            return post_services.get_post("alice@example.com", post_id, db)
+
+    results = run_concurrently(4, lookup)
+
+    assert all(result == results[0] for result in results)
+    assert results[0]["created_at"] is not None
+    assert {k: v for k, v in results[0].items() if k != "created_at"} == {
+        "id": post_id,
+        "title": "Title",
+        "content": "Body",
+        "owner_id": 1,
+        "tags": [],
+    }
+
+
+def test_primary_reads_never_join_a_replica_read(Session):
+    started, release = threading.Event(), threading.Event()
+
+    def load_post(user_email, post_id, db, fields):
+        if db.info.get("read_only"):
+            started.set()
+            release.wait(5)
+            return "replica row"
+        return "primary row"
+
+    coalesced = post_services.post_lookups.stats()["coalesced"]
+    with (
+        patch.object(post_services, "load_post", load_post),
+        ThreadPoolExecutor(max_workers=1) as pool,
+    ):
+        replica = Session(info={"read_only": True})
+        leader = pool.submit(post_services.get_post, "alice@example.com", 1, replica)
+        assert started.wait(5)
+        # a caller pinned to the primary after a write
+        primary = post_services.get_post("alice@example.com", 1, Session())
+        release.set()
+
+        assert leader.result() == "replica row"
+    assert primary == "primary row"
+    assert post_services.post_lookups.stats()["coalesced"] == coalesced
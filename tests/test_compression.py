@@ -0,0 +1,261 @@
+import gzip
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.main import app, response_cache
+from src.middleware.response_cache import caller_of
+from src.middleware.compression import CompressionMiddleware, choose_encoding
+from src.models.databases import get_db
+from src.services import auth_service
+
+client = TestClient(app)
+
+# ─── Mock Data ───────────────────────────────────────────
+
+big_posts = [
+    SimpleNamespace(id=i, title=f"Post {i}", content="lorem ipsum " * 50, owner_id=1)
+    for i in range(20)
+]
+
+auth_headers = {"Authorization": "Bearer token", "Accept-Encoding": "gzip"}
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    response_cache.clear()
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    yield
+    response_cache.clear()
+    app.dependency_overrides.clear()
+
+
+# ─── Negotiation ─────────────────────────────────────────
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+# ─── CompressionMiddleware ───────────────────────────────
+
+
+def test_large_listing_is_gzipped():
+    with patch("src.services.post_services.get_all_posts", return_value=big_posts):
+        res = client.get("/api/v1/posts", headers={"Accept-Encoding": "gzip"})
+
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in res.headers["vary"].lower()
+    assert len(res.json()["posts"]) == 20
+
+
+def test_small_response_not_compressed():
+    with patch("src.services.post_services.get_all_posts", return_value=[]):
+        res = client.get("/api/v1/posts", headers={"Accept-Encoding": "gzip"})
+
+    assert res.status_code == 200
+    assert "content-encoding" not in res.headers
+
+
+def test_no_accept_encoding_not_compressed():
+    with patch("src.services.post_services.get_all_posts", return_value=big_posts):
+        res = client.get("/api/v1/posts", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in res.headers
+    assert len(res.json()["posts"]) == 20
+
+
+def test_streaming_response_compressed_incrementally():
+    stream_app = FastAPI()
+
+    @stream_app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (b"chunk of text " * 10 for _ in range(5)), media_type="text/plain"
+        )
+
+    stream_app.add_middleware(CompressionMiddleware, minimum_size=10)
+    res = TestClient(stream_app).get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert res.headers["content-encoding"] == "gzip"
+    assert "content-length" not in res.headers
+    assert res.content == b"chunk of text " * 50
+
+
+# ─── ResponseCacheMiddleware ─────────────────────────────
+
+
+def test_cached_listing_served_without_calling_service():
+    with patch(
+        "src.services.post_services.get_all_posts", return_value=big_posts
+    ) as mock_get:
+        first = client.get("/api/v1/posts", headers=auth_headers)
+        second = client.get("/api/v1/posts", headers=auth_headers)
+
+    assert mock_get.call_count == 1
+    assert first.json() == second.json()
+    assert second.headers["content-encoding"] == "gzip"
+
+
+def test_cache_stores_compressed_body_once():
+    with patch("src.services.post_services.get_all_posts", return_value=big_posts):
+        client.get("/api/v1/posts", headers=auth_headers)
+        client.get("/api/v1/posts", headers=auth_headers)
+
+    (entry,) = response_cache._entries.values()
+    assert set(entry.bodies) == {"identity", "gzip"}
+    assert gzip.decompress(entry.bodies["gzip"]) == entry.bodies["identity"]
+
+
+def test_cache_is_per_authorization_header():
+    with patch(
+        "src.services.post_services.get_all_posts", return_value=big_posts
+    ) as mock_get:
+        client.get("/api/v1/posts", headers=auth_headers)
+        client.get(
+            "/api/v1/posts",
+            headers={"Authorization": "Bearer other", "Accept-Encoding": "gzip"},
+        )
+
+    assert mock_get.call_count == 2
+
+
+def test_write_clears_cache():
+    created = SimpleNamespace(id=21, title="New", content="Body", owner_id=1)
+
+    with (
+        patch(
+            "src.services.post_services.get_all_posts", return_value=big_posts
+        ) as mock_get,
+        patch(
+            "src.services.post_services.create_post_for_user", return_value=created
+        ),
+    ):
+        client.get("/api/v1/posts", headers=auth_headers)
+        client.post(
+            "/api/v1/posts",
+            json={"title": "New", "content": "Body"},
+            headers=auth_headers,
+        )
+        client.get("/api/v1/posts", headers=auth_headers)
+
+    assert mock_get.call_count == 2
+
+
+def test_post_writes_only_drop_the_writers_entries():
+    other = {"Authorization": "Bearer other", "Accept-Encoding": "gzip"}
+    created = SimpleNamespace(id=21, title="New", content="Body", owner_id=1)
+
+    with (
+        patch(
+            "src.services.post_services.get_all_posts", return_value=big_posts
+        ) as mock_get,
+        patch(
+            "src.services.post_services.create_post_for_user", return_value=created
+        ),
+        patch("src.main.bus.publish") as publish,
+    ):
+        client.get("/api/v1/posts", headers=auth_headers)
+        client.get("/api/v1/posts", headers=other)
+        client.post(
+            "/api/v1/posts",
+            json={"title": "New", "content": "Body"},
+            headers=auth_headers,
+        )
+        client.get("/api/v1/posts", headers=other)
+
+    assert mock_get.call_count == 2
+    assert [key[2] for key in response_cache._entries] == [
+        caller_of("Bearer other")
+    ]
+    publish.assert_called_once_with(
+        "responses", ["/api/v1/posts", caller_of("Bearer token")]
+    )
+
+
+def test_listing_rendered_during_a_write_is_not_stored():
+    created = SimpleNamespace(id=21, title="New", content="Body", owner_id=1)
+    reading, written = threading.Event(), threading.Event()
+
+    def slow_listing(*args, **kwargs):
+        reading.set()
+        written.wait(5)
+        # read before the write committed
+        return big_posts
+
+    with (
+        patch("src.services.post_services.get_all_posts", side_effect=slow_listing),
+        patch(
+            "src.services.post_services.create_post_for_user", return_value=created
+        ),
+        ThreadPoolExecutor(max_workers=1) as pool,
+    ):
+        listing = pool.submit(client.get, "/api/v1/posts", headers=auth_headers)
+        assert reading.wait(5)
+        client.post(
+            "/api/v1/posts",
+            json={"title": "New", "content": "Body"},
+            headers=auth_headers,
+        )
+        written.set()
+
+        assert listing.result().status_code == 200
+    assert len(response_cache) == 0
+
+
+def test_drops_only_reject_fills_they_cover():
+    key = ("/api/v1/posts", b"", caller_of("a"))
+    version = response_cache.version()
+    response_cache.drop("/api/v1/posts", caller_of("b"))
+    response_cache.drop("/api/v1/admin/users")
+
+    response_cache.set(key, 200, [], b"", version)
+    assert key in response_cache._entries
+
+    response_cache.drop("/api/v1/posts")
+    response_cache.set(key, 200, [], b"", version)
+    assert key not in response_cache._entries
+
+
+def test_admin_writes_drop_every_callers_admin_entries():
+    response_cache.set(("/api/v1/admin/users", b"", caller_of("a")), 200, [], b"")
+    response_cache.set(("/api/v1/admin/users", b"", caller_of("b")), 200, [], b"")
+    response_cache.set(("/api/v1/posts", b"", caller_of("a")), 200, [], b"")
+
+    response_cache.drop("/api/v1/admin/users")
+
+    assert list(response_cache._entries) == [("/api/v1/posts", b"", caller_of("a"))]
+
+
+def test_writes_outside_cached_paths_keep_the_cache():
+    with patch(
+        "src.services.post_services.get_all_posts", return_value=big_posts
+    ) as mock_get:
+        client.get("/api/v1/posts", headers=auth_headers)
+        logout = client.post("/api/v1/auth/logout", headers=auth_headers)
+        client.get("/api/v1/posts", headers=auth_headers)
+
+    assert logout.status_code == 200
+    assert mock_get.call_count == 1
+    assert len(response_cache) == 1
+
+
+def test_unauthenticated_requests_not_cached():
+    with patch(
+        "src.services.post_services.get_all_posts", return_value=big_posts
+    ) as mock_get:
+        client.get("/api/v1/posts")
+        client.get("/api/v1/posts")
+
+    assert mock_get.call_count == 2
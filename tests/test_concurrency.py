@@ -0,0 +1,134 @@
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware.concurrency import (
+    CRITICAL,
+    LOW,
+    NORMAL,
+    WRITE,
+    AdaptiveLimit,
+    ConcurrencyLimitMiddleware,
+)
+
+# ─── AdaptiveLimit ───────────────────────────────────────
+
+
+def fill(limit, n, priority=NORMAL):
+    return [limit.acquire(priority) for _ in range(n)]
+
+
+def test_priorities_share_the_limit():
+    limit = AdaptiveLimit(initial=10, min_limit=1, max_limit=10)
+
+    assert fill(limit, 5, LOW) == [True] * 5
+    assert limit.acquire(LOW) is False
+    assert fill(limit, 3) == [True] * 3
+    assert limit.acquire(NORMAL) is False
+    assert fill(limit, 2, CRITICAL) == [True] * 2
+    assert limit.acquire(CRITICAL) is False
+
+    stats = limit.stats()
+    assert stats["in_flight"] == 10
+    assert stats["rejected_low"] == 1
+    assert stats["rejected_normal"] == 1
+    assert stats["rejected_critical"] == 1
+
+
+def test_slow_responses_shrink_the_limit():
+    limit = AdaptiveLimit(initial=10, min_limit=2, max_limit=20)
+    fill(limit, 8)
+    for _ in range(8):
+        limit.release(0.01)
+
+    for _ in range(20):
+        limit.acquire()
+        limit.release(1.0)
+
+    assert limit.limit < 10
+    assert limit.limit >= 2
+
+
+def test_saturated_fast_responses_grow_the_limit():
+    limit = AdaptiveLimit(initial=4, min_limit=1, max_limit=5)
+
+    for _ in range(50):
+        fill(limit, 3)
+        for _ in range(3):
+            limit.release(0.01)
+
+    assert limit.limit == 5
+
+
+def test_route_mix_alone_does_not_shrink_the_limit():
+    limit = AdaptiveLimit(initial=50, min_limit=4, max_limit=50)
+    rng = random.Random(7)
+    fill(limit, 20)
+    # steady load: most requests are fast, one in ten is a slow-by-design
+    # route such as login; latencies never change
+    for _ in range(5000):
+        if rng.random() < 0.9:
+            limit.release(rng.uniform(0.002, 0.003), route="GET /api/v1/posts")
+        else:
+            limit.release(rng.uniform(0.08, 0.1), route="POST /api/v1/auth/login")
+        assert limit.acquire()
+
+    assert limit.limit == 50
+    assert set(limit.stats()["baselines_ms"]) == {
+        "GET /api/v1/posts",
+        "POST /api/v1/auth/login",
+    }
+
+
+def test_failures_shrink_the_limit():
+    limit = AdaptiveLimit(initial=10, min_limit=1, max_limit=10)
+    for _ in range(10):
+        limit.acquire()
+        limit.release(0.01, failed=True)
+
+    assert limit.limit == 9
+
+
+# ─── Middleware ──────────────────────────────────────────
+
+
+def make_client(limiter):
+    inner = FastAPI()
+
+    @inner.get("/api/v1/posts")
+    async def posts():
+        return {"ok": True}
+
+    @inner.get("/api/v1/admin/users")
+    async def users():
+        return {"ok": True}
+
+    inner.add_middleware(ConcurrencyLimitMiddleware, limiter=limiter)
+    return TestClient(inner)
+
+
+def test_middleware_sheds_low_priority_first():
+    limiter = AdaptiveLimit(initial=10, min_limit=1, max_limit=10)
+    client = make_client(limiter)
+    # simulate six requests already in flight
+    fill(limiter, 6)
+
+    admin = client.get("/api/v1/admin/users")
+    posts = client.get("/api/v1/posts")
+
+    assert admin.status_code == 503
+    assert admin.headers["retry-after"] == "1"
+    assert posts.status_code == 200
+    assert limiter.stats()["in_flight"] == 6
+
+
+def test_middleware_priority_rules():
+    middleware = ConcurrencyLimitMiddleware(None, limiter=AdaptiveLimit())
+
+    assert middleware.priority("POST", "/api/v1/auth/refresh") == CRITICAL
+    assert middleware.priority("GET", "/api/v1/admin/metrics") == CRITICAL
+    assert middleware.priority("DELETE", "/api/v1/admin/users/3") == LOW
+    assert middleware.priority("GET", "/api/v1/posts/3") == NORMAL
+    assert middleware.priority("PUT", "/api/v1/posts/3") == WRITE
+    assert middleware.priority("POST", "/api/v1/posts") == WRITE
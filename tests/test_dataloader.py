@@ -0,0 +1,132 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.models.post import Post
+from src.services import admin_services, auth_service, post_services
+from src.services.dataloader import DataLoader, get_loader
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def Session(Session):
+    with Session() as db:
+        for id in (1, 2, 3):
+            db.add(Post(id=id, title=f"Post {id}", content="Body", owner_id=1))
+        db.add(Post(id=4, title="Bob's", content="Body", owner_id=2))
+        db.commit()
+    Session.statements.clear()
+    return Session
+
+
+# ─── DataLoader ──────────────────────────────────────────
+
+
+def test_load_many_batches_and_caches():
+    batches = []
+
+    def load_batch(db, ids):
+        batches.append(ids)
+        return {id: id * 10 for id in ids if id != 3}
+
+    loader = DataLoader(None, load_batch)
+    loader.want([5])
+
+    assert loader.load_many([1, 2, 3, 1]) == [10, 20, None, 10]
+    assert loader.load(5) == 50
+    assert loader.load_many([3, 2]) == [None, 20]
+    assert batches == [[5, 1, 2, 3]]
+
+
+def test_loaders_are_scoped_to_the_session(Session):
+    with Session() as db, Session() as other:
+        loader = get_loader(db, "things", lambda db, ids: {})
+        assert get_loader(db, "things", lambda db, ids: {}) is loader
+        assert get_loader(other, "things", lambda db, ids: {}) is not loader
+
+
+# ─── Services ────────────────────────────────────────────
+
+
+def test_posts_by_ids_in_one_query(Session):
+    with Session() as db:
+        posts, missing = post_services.get_posts_by_ids(
+            "alice@example.com", [3, 1, 4, 99], db, fields=("id", "title")
+        )
+
+    assert posts == [{"id": 3, "title": "Post 3"}, {"id": 1, "title": "Post 1"}]
+    # another owner's post is reported missing, not leaked
+    assert missing == [4, 99]
+    post_queries = [sql for sql in Session.statements if "FROM posts" in sql]
+    assert len(post_queries) == 1
+
+
+def test_loader_is_reused_within_a_request(Session):
+    with Session() as db:
+        owner_id = post_services.get_owner_id("alice@example.com", db)
+        post_services.post_loader(owner_id, db).want([1, 2])
+        post_services.get_posts_by_ids("alice@example.com", [2, 3], db)
+        post_services.get_posts_by_ids("alice@example.com", [1], db)
+
+    post_queries = [sql for sql in Session.statements if "FROM posts" in sql]
+    assert len(post_queries) == 1
+
+
+def test_users_by_ids(Session):
+    with Session() as db:
+        users, missing = admin_services.get_users_by_ids([2, 7], db)
+
+    assert users == [
+        {"id": 2, "name": "Bob", "email": "bob@example.com", "role": "user"}
+    ]
+    assert missing == [7]
+
+
+# ─── Endpoints ───────────────────────────────────────────
+
+
+def test_get_posts_by_ids_endpoint():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    try:
+        with patch(
+            "src.services.post_services.get_posts_by_ids",
+            return_value=([{"id": 1, "title": "Post 1"}], [5]),
+        ) as mock_get:
+            res = client.get("/api/v1/posts?ids=1,5,1&fields=title")
+    finally:
+        app.dependency_overrides.pop(auth_service.getCurrentUser)
+
+    assert res.status_code == 200
+    assert res.json()["posts"] == [{"id": 1, "title": "Post 1"}]
+    assert res.json()["not_found"] == [5]
+    assert mock_get.call_args.args[1] == [1, 5]
+
+
+@pytest.mark.parametrize("ids", ["1,two", "", ",".join(map(str, range(101)))])
+def test_get_posts_rejects_bad_ids(ids):
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    try:
+        res = client.get(f"/api/v1/posts?ids={ids}")
+    finally:
+        app.dependency_overrides.pop(auth_service.getCurrentUser)
+
+    assert res.status_code == 400
+
+
+def test_get_users_by_ids_endpoint():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: "admin@x.com"
+    try:
+        with patch(
+            "src.services.admin_services.get_users_by_ids",
+            return_value=([{"id": 2, "name": "Bob"}], []),
+        ):
+            res = client.get("/api/v1/admin/users?ids=2&fields=name")
+    finally:
+        app.dependency_overrides.pop(admin_services.getCurrentAdmin)
+
+    assert res.status_code == 200
+    assert res.json()["users"] == [{"id": 2, "name": "Bob"}]
+    assert res.json()["not_found"] == []
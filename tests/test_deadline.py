@@ -0,0 +1,143 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.middleware.deadline import DeadlineMiddleware
+from src.models.databases import (
+    cancel_running_statement,
+    is_statement_timeout,
+    make_sessionmaker,
+)
+
+# ─── Timeouts ────────────────────────────────────────────
+
+
+def test_timeout_for_routes_and_header():
+    middleware = DeadlineMiddleware(
+        None,
+        default_timeout=10,
+        max_timeout=30,
+        route_timeouts={"/slow": 20.0, "/stream": None},
+    )
+
+    assert middleware.timeout_for("/api", None) == 10
+    assert middleware.timeout_for("/api", "2.5") == 2.5
+    # a client can shorten its deadline, not extend it
+    assert middleware.timeout_for("/api", "60") == 10
+    assert middleware.timeout_for("/api", "soon") == 10
+    assert middleware.timeout_for("/slow/report", None) == 20
+    assert middleware.timeout_for("/stream", "1") is None
+
+
+def test_deadline_reaches_request_state():
+    app = FastAPI()
+
+    @app.get("/remaining")
+    def remaining(request: Request):
+        return {"remaining": request.state.deadline - time.monotonic()}
+
+    app.add_middleware(DeadlineMiddleware, default_timeout=10)
+    client = TestClient(app)
+
+    res = client.get("/remaining", headers={"X-Request-Timeout": "3"})
+    assert 2 < res.json()["remaining"] <= 3
+
+
+def test_disconnect_runs_callbacks():
+    cancelled = []
+
+    async def app(scope, receive, send):
+        scope["state"]["on_disconnect"].append(lambda: cancelled.append(True))
+        # a handler busy elsewhere, not reading from receive
+        for _ in range(100):
+            if scope["state"].get("disconnected"):
+                break
+            await asyncio.sleep(0.01)
+        assert (await receive())["type"] == "http.request"
+        assert (await receive())["type"] == "http.disconnect"
+        assert (await receive())["type"] == "http.disconnect"
+
+    messages = [
+        {"type": "http.request", "body": b"", "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "path": "/api", "headers": []}
+    asyncio.run(DeadlineMiddleware(app)(scope, receive, None))
+
+    assert cancelled == [True]
+
+
+def test_upload_is_read_only_as_fast_as_the_handler_consumes_it():
+    read = []
+
+    async def receive():
+        read.append(len(read))
+        await asyncio.sleep(0)
+        return {"type": "http.request", "body": b"x" * 1024, "more_body": True}
+
+    async def app(scope, receive, send):
+        await receive()
+        # a slow handler, the watcher must not drain the upload meanwhile
+        await asyncio.sleep(0.05)
+        assert len(read) <= 3
+
+    scope = {"type": "http", "path": "/api", "headers": []}
+    asyncio.run(DeadlineMiddleware(app)(scope, receive, None))
+
+
+# ─── Sessions ────────────────────────────────────────────
+
+
+def session_with_deadline(seconds, **state):
+    SessionLocal = make_sessionmaker(create_engine("sqlite://"))
+    return SessionLocal(
+        info={
+            "deadline": time.monotonic() + seconds,
+            "request_state": SimpleNamespace(**state),
+        }
+    )
+
+
+def test_expired_deadline_refuses_new_transactions():
+    with session_with_deadline(-1) as db:
+        with pytest.raises(HTTPException) as exc:
+            db.execute(text("SELECT 1"))
+    assert exc.value.status_code == 504
+
+
+def test_disconnected_request_refuses_new_transactions():
+    with session_with_deadline(10, disconnected=True) as db:
+        with pytest.raises(HTTPException):
+            db.execute(text("SELECT 1"))
+
+
+def test_running_statement_can_be_cancelled():
+    with session_with_deadline(10) as db:
+        db.execute(text("SELECT 1"))
+        conn = db.info["dbapi_connection"]
+        db.info["dbapi_connection"] = MagicMock(wraps=conn)
+
+        cancel_running_statement(db)
+
+        db.info["dbapi_connection"].interrupt.assert_called_once()
+        db.commit()
+        assert "dbapi_connection" not in db.info
+
+
+def test_statement_timeout_detection():
+    canceled = OperationalError("SELECT", {}, SimpleNamespace(pgcode="57014"))
+    other = OperationalError("SELECT", {}, SimpleNamespace(pgcode="08006"))
+
+    assert is_statement_timeout(canceled)
+    assert not is_statement_timeout(other)
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.models.databases import get_read_db
+from src.models.post import Post
+from src.services import admin_services, auth_service, feed_services, post_events
+from src.services.feed_services import RecentPosts
+
+client = TestClient(app)
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(Session):
+    with Session() as db:
+        db.add_all(
+            Post(
+                title=f"Post {i}",
+                content="Body",
+                owner_id=1,
+                created_at=START + timedelta(minutes=i),
+            )
+            for i in range(10)
+        )
+        db.commit()
+        yield db
+
+
+@pytest.fixture
+def recent_posts():
+    recent_posts = RecentPosts(size=6)
+    with patch.object(feed_services, "recent_posts", recent_posts):
+        yield recent_posts
+
+
+def titles(posts):
+    return [post["title"] for post in posts]
+
+
+# ─── get_feed ────────────────────────────────────────────
+
+
+def test_keyset_pages_cover_every_post_newest_first(db, recent_posts):
+    seen, cursor = [], None
+    while True:
+        posts, cursor = feed_services.get_feed(db, limit=3, cursor=cursor)
+        seen += titles(posts)
+        if cursor is None:
+            break
+
+    assert seen == [f"Post {i}" for i in range(9, -1, -1)]
+    assert set(posts[0]) == {"id", "title", "owner_id", "created_at"}
+
+
+def test_first_page_served_from_memory(db, recent_posts):
+    feed_services.get_feed(db, limit=3)
+
+    # a new post reaches the buffer through the events channel, no query needed
+    new_post = SimpleNamespace(
+        id=100, title="Fresh", owner_id=1, created_at=START + timedelta(hours=1)
+    )
+    post_events.publish(None, "a@example.com", "created", new_post)
+    posts, cursor = feed_services.get_feed(MagicMock(), limit=3)
+
+    assert titles(posts) == ["Fresh", "Post 9", "Post 8"]
+    assert recent_posts.stats()["hits"] == 2
+
+    # the cursor continues on the database where the buffer left off
+    posts, _ = feed_services.get_feed(db, limit=3, cursor=cursor)
+    assert titles(posts) == ["Post 7", "Post 6", "Post 5"]
+
+
+def test_deleted_posts_leave_the_buffer(db, recent_posts):
+    feed_services.get_feed(db, limit=3)
+    deleted = SimpleNamespace(
+        id=10, title="Post 9", owner_id=1, created_at=START + timedelta(minutes=9)
+    )
+    post_events.publish(None, "a@example.com", "deleted", deleted)
+
+    posts, _ = feed_services.get_feed(MagicMock(), limit=3)
+    assert titles(posts) == ["Post 8", "Post 7", "Post 6"]
+
+
+def test_content_is_read_from_the_database(db, recent_posts):
+    posts, _ = feed_services.get_feed(db, limit=2, fields=("id", "content"))
+
+    assert posts == [{"id": 10, "content": "Body"}, {"id": 9, "content": "Body"}]
+    assert recent_posts.stats()["hits"] == 0
+
+
+def test_invalid_cursor_rejected(db, recent_posts):
+    from fastapi import HTTPException
+
+    with pytest.raises(HTTPException) as exc:
+        feed_services.get_feed(db, limit=3, cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+# ─── GET /feed ───────────────────────────────────────────
+
+
+def test_get_feed_endpoint():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "a@example.com"
+    app.dependency_overrides[get_read_db] = lambda: MagicMock()
+
+    with patch(
+        "src.services.feed_services.get_feed", return_value=([], None)
+    ) as mock_feed:
+        res = client.get("/api/v1/feed?limit=5&cursor=abc")
+
+    assert res.status_code == 200
+    assert res.json() == {
+        "message": "Feed retrieved successfully",
+        "posts": [],
+        "next_cursor": None,
+    }
+    assert mock_feed.call_args.args[1:] == (5, "abc")
+
+    app.dependency_overrides.clear()
+
+
+def test_get_feed_limit_bounded():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "a@example.com"
+
+    res = client.get("/api/v1/feed?limit=1000")
+    assert res.status_code == 422
+
+    app.dependency_overrides.clear()
+
+
+# ─── GET /admin/posts ────────────────────────────────────
+
+
+def test_admin_posts_as_regular_user_forbidden():
+    from fastapi import HTTPException
+
+    def raise_403():
+        raise HTTPException(status_code=403, detail="Admins only")
+
+    app.dependency_overrides[admin_services.getCurrentAdmin] = raise_403
+
+    res = client.get("/api/v1/admin/posts")
+    assert res.status_code == 403
+
+    app.dependency_overrides.clear()
+
+
+def test_admin_posts_pass_fields():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+    app.dependency_overrides[get_read_db] = lambda: MagicMock()
+
+    with patch(
+        "src.services.feed_services.get_feed", return_value=([], "next")
+    ) as mock_feed:
+        res = client.get("/api/v1/admin/posts?fields=content")
+
+    assert res.status_code == 200
+    assert res.json()["next_cursor"] == "next"
+    assert mock_feed.call_args.kwargs["fields"] == ("id", "content")
+
+    app.dependency_overrides.clear()
@@ -0,0 +1,227 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from src.middleware.idempotency import IdempotencyMiddleware
+from src.models.databases import Base
+from src.services import auth_service
+from src.services.idempotency_services import (
+    BUSY,
+    CLAIMED,
+    MISMATCH,
+    REPLAY,
+    IdempotencyStore,
+    StoredResponse,
+    keys,
+)
+
+
+@pytest.fixture
+def store():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[keys])
+    return IdempotencyStore(engine)
+
+
+def stored(fingerprint="fp", body=b'{"ok":true}'):
+    return StoredResponse(fingerprint, 200, "application/json", body)
+
+
+def row_count(store):
+    with store.engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(keys))
+
+
+# ─── Store ───────────────────────────────────────────────
+
+
+def test_first_claim_wins(store):
+    assert store.claim("k", "fp") == (CLAIMED, None)
+    assert store.claim("k", "fp") == (BUSY, None)
+    assert store.claim("k", "other") == (MISMATCH, None)
+
+
+def test_completed_response_replays(store):
+    store.claim("k", "fp")
+    store.complete("k", stored())
+
+    assert store.claim("k", "fp") == (REPLAY, stored())
+    assert store.claim("k", "other") == (MISMATCH, None)
+
+    # another worker has nothing cached and reads the row
+    other = IdempotencyStore(store.engine)
+    assert other.claim("k", "fp") == (REPLAY, stored())
+
+
+def test_released_key_can_be_claimed_again(store):
+    store.claim("k", "fp")
+    store.release("k")
+
+    assert store.claim("k", "fp") == (CLAIMED, None)
+
+
+def test_abandoned_claim_is_taken_over(store):
+    crashed = IdempotencyStore(store.engine, lock_timeout=-1)
+    crashed.claim("k", "fp")
+
+    assert store.claim("k", "fp") == (CLAIMED, None)
+
+
+def test_expired_rows_are_pruned(store):
+    short = IdempotencyStore(store.engine, ttl=-1)
+    short.claim("old", "fp")
+    short.claim("older", "fp")
+    store.claim("new", "fp")
+
+    assert store.prune() == 2
+    assert row_count(store) == 1
+
+    # completing prunes too, at most once per interval
+    short.claim("old", "fp")
+    short.complete("old", stored())
+    assert row_count(store) == 1
+    assert IdempotencyStore(store.engine).claim("old", "fp") == (CLAIMED, None)
+
+
+# ─── Middleware ──────────────────────────────────────────
+
+
+def make_app(store, **options):
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/items")
+    async def create_item(request: Request):
+        app.state.calls += 1
+        body = await request.json()
+        if body.get("fail"):
+            raise HTTPException(status_code=503, detail="try again")
+        await asyncio.sleep(0.05)
+        return {"id": app.state.calls, **body}
+
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=store,
+        identify=lambda authorization: authorization,
+        routes=(("POST", "/items"),),
+        **options,
+    )
+    return app
+
+
+def post(client, body, key="key-1", caller="alice"):
+    headers = {"Authorization": caller}
+    if key is not None:
+        headers["Idempotency-Key"] = key
+    return client.post("/items", json=body, headers=headers)
+
+
+def test_retry_replays_the_first_response(store):
+    app = make_app(store)
+    client = TestClient(app)
+
+    first = post(client, {"title": "hello"})
+    retry = post(client, {"title": "hello"})
+
+    assert app.state.calls == 1
+    assert retry.status_code == 200
+    assert retry.json() == first.json() == {"id": 1, "title": "hello"}
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_keys_are_scoped_to_the_caller(store):
+    app = make_app(store)
+    client = TestClient(app)
+
+    post(client, {"title": "hello"}, caller="alice")
+    res = post(client, {"title": "hello"}, caller="bob")
+
+    assert app.state.calls == 2
+    assert res.json()["id"] == 2
+
+
+def test_reused_key_with_different_body(store):
+    client = TestClient(make_app(store))
+
+    post(client, {"title": "hello"})
+    res = post(client, {"title": "changed"})
+
+    assert res.status_code == 422
+
+
+def test_requests_without_key_always_run(store):
+    app = make_app(store)
+    client = TestClient(app)
+
+    post(client, {"title": "hello"}, key=None)
+    post(client, {"title": "hello"}, key=None)
+
+    assert app.state.calls == 2
+    assert row_count(store) == 0
+
+
+def test_failures_are_not_stored(store):
+    app = make_app(store)
+    client = TestClient(app)
+
+    assert post(client, {"fail": True}).status_code == 503
+    assert post(client, {"fail": True}).status_code == 503
+
+    assert app.state.calls == 2
+    assert row_count(store) == 0
+
+
+def test_concurrent_duplicates_run_once(store):
+    app = make_app(store)
+
+    async def send_both():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            headers = {"Authorization": "alice", "Idempotency-Key": "key-1"}
+            return await asyncio.gather(
+                *(c.post("/items", json={"n": 1}, headers=headers) for _ in range(3))
+            )
+
+    responses = asyncio.run(send_both())
+
+    assert app.state.calls == 1
+    assert [res.json() for res in responses] == [{"id": 1, "n": 1}] * 3
+    assert sum("idempotent-replayed" in res.headers for res in responses) == 2
+
+
+def test_oversized_bodies_are_rejected_before_buffering(store):
+    app = make_app(store, max_body_size=1000)
+    client = TestClient(app)
+    headers = {"Authorization": "alice", "Idempotency-Key": "key-1"}
+
+    def chunks():
+        # no Content-Length, sent with chunked transfer encoding
+        for _ in range(100):
+            yield b"x" * 100
+
+    chunked = client.post("/items", content=chunks(), headers=headers)
+    declared = client.post("/items", content=b"x" * 2000, headers=headers)
+
+    assert chunked.status_code == declared.status_code == 413
+    assert app.state.calls == 0
+    assert row_count(store) == 0
+
+
+def test_token_subject():
+    with patch.object(auth_service, "decode_jwt", return_value="alice@example.com"):
+        assert auth_service.token_subject("Bearer abc") == "alice@example.com"
+        assert auth_service.token_subject("Basic abc") is None
+        assert auth_service.token_subject(None) is None
+    with patch.object(
+        auth_service, "decode_jwt", side_effect=HTTPException(status_code=401)
+    ):
+        assert auth_service.token_subject("Bearer abc") is None
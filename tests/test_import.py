@@ -0,0 +1,195 @@
+import io
+import json
+import time
+from unittest.mock import patch
+
+from argon2 import PasswordHasher
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from src.main import app
+from src.models.databases import get_db
+from src.models.post import Post
+from src.models.tag_count import TagCount
+from src.models.user import RoleEnum, User
+from src.schemas.import_schemas import ImportFormat, ImportKind
+from src.services import admin_services, import_services
+
+client = TestClient(app)
+
+
+def run(kind, fmt, data, Session):
+    job = import_services.ImportJob(kind, fmt)
+    return import_services.run_import(job, io.BytesIO(data.encode()), Session)
+
+
+# ─── run_import ──────────────────────────────────────────
+
+
+def test_users_csv_import(Session):
+    data = (
+        "name,email,password\n"
+        "Carol,carol@example.com,secret1\n"
+        "Dave,dave@example.com,secret2\n"
+        "Again,alice@example.com,secret3\n"
+        "Twice,carol@example.com,secret4\n"
+        "NoPassword,nopass@example.com\n"
+    )
+    job = run(ImportKind.users, ImportFormat.csv, data, Session)
+
+    report = job.report()
+    assert report["status"] == "done"
+    assert report["processed"] == 5
+    assert report["imported"] == 2
+    assert {(e["line"], e["error"]) for e in report["errors"]} >= {
+        (4, "email already registered"),
+        (5, "duplicate email in file"),
+    }
+    assert any(e["line"] == 6 for e in report["errors"])
+
+    with Session() as db:
+        carol = db.scalars(select(User).where(User.email == "carol@example.com")).one()
+    assert carol.role == RoleEnum.user
+    assert PasswordHasher().verify(carol.password, "secret1")
+
+
+def test_posts_ndjson_import(Session):
+    lines = [
+        {"owner_email": "alice@example.com", "title": "One", "content": "Body"},
+        {"owner_email": "ghost@example.com", "title": "Two", "content": "Body"},
+        {"owner_email": "alice@example.com", "title": "Three"},
+    ]
+    data = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+    job = run(ImportKind.posts, ImportFormat.ndjson, data, Session)
+
+    errors = {e["line"]: e["error"] for e in job.report()["errors"]}
+    assert job.imported == 1
+    assert errors[2] == "unknown owner_email"
+    assert "content" in errors[3]
+    assert errors[4] == "invalid JSON"
+
+    with Session() as db:
+        assert db.scalars(select(Post.title)).all() == ["One"]
+
+
+def test_posts_import_keeps_tags_and_counts_them(Session):
+    with Session() as db:
+        db.add(TagCount(owner_id=1, tag="go", count=2))
+        db.commit()
+    alice, ghost = "alice@example.com", "ghost@example.com"
+    lines = [
+        {"owner_email": alice, "title": "One", "content": "B", "tags": ["Go"]},
+        {"owner_email": alice, "title": "Two", "content": "B", "tags": ["go", "db"]},
+        {"owner_email": ghost, "title": "Lost", "content": "B", "tags": ["db"]},
+        {"owner_email": alice, "title": "Three", "content": "B"},
+    ]
+    data = "\n".join(json.dumps(line) for line in lines)
+    job = run(ImportKind.posts, ImportFormat.ndjson, data, Session)
+
+    assert job.imported == 3
+    with Session() as db:
+        tags = dict(db.execute(select(Post.title, Post.tags)).all())
+        counts = dict(db.execute(select(TagCount.tag, TagCount.count)).all())
+    assert tags == {"One": ["go"], "Two": ["go", "db"], "Three": []}
+    assert counts == {"go": 4, "db": 1}
+
+
+def test_import_in_batches_reports_progress(Session):
+    rows = "".join(f"User {i},u{i}@example.com,pw\n" for i in range(5))
+    progress = []
+    job = import_services.ImportJob(ImportKind.users, ImportFormat.csv)
+
+    with patch.object(import_services, "IMPORT_BATCH_SIZE", 2):
+        import_services.run_import(
+            job,
+            io.BytesIO(("name,email,password\n" + rows).encode()),
+            Session,
+            on_batch=lambda job: progress.append(job.processed),
+        )
+
+    assert progress == [2, 4, 5]
+    assert job.imported == 5
+
+
+# ─── POST /admin/import/{kind} ───────────────────────────
+
+
+def test_import_endpoint_runs_job(Session):
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+
+    with patch("src.api.v1.endpoints.admin_controller.SessionLocal", Session):
+        res = client.post(
+            "/api/v1/admin/import/users?format=csv",
+            content=b"name,email,password\nCarol,carol@example.com,pw\n",
+        )
+        assert res.status_code == 202
+        job_id = res.json()["job"]["id"]
+
+        for _ in range(200):
+            job = client.get(f"/api/v1/admin/import/{job_id}").json()["job"]
+            if job["status"] == "done":
+                break
+            time.sleep(0.01)
+
+    assert job["imported"] == 1
+
+    app.dependency_overrides.clear()
+
+
+def test_import_unknown_job(Session):
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+    app.dependency_overrides[get_db] = lambda: Session()
+
+    res = client.get("/api/v1/admin/import/nope")
+    assert res.status_code == 404
+
+    app.dependency_overrides.clear()
+
+
+def test_import_status_from_another_worker(Session):
+    job = run(ImportKind.users, ImportFormat.csv, "name,email,password\n", Session)
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+    app.dependency_overrides[get_db] = lambda: Session()
+
+    # the job is not in this worker's memory, only in import_jobs
+    res = client.get(f"/api/v1/admin/import/{job.id}")
+
+    app.dependency_overrides.clear()
+    assert res.status_code == 200
+    assert res.json()["job"] == job.report()
+
+
+def test_import_as_regular_user_forbidden():
+    from fastapi import HTTPException
+
+    def raise_403():
+        raise HTTPException(status_code=403, detail="Admins only")
+
+    app.dependency_overrides[admin_services.getCurrentAdmin] = raise_403
+
+    res = client.post("/api/v1/admin/import/users", content=b"name,email,password\n")
+    assert res.status_code == 403
+
+    app.dependency_overrides.clear()
+
+
+def test_import_allows_bodies_over_the_default_limit():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: (
+        "admin@example.com"
+    )
+
+    with patch("src.services.import_services.start_import") as mock_start:
+        mock_start.return_value.report.return_value = {"id": "x"}
+        res = client.post(
+            "/api/v1/admin/import/posts", content=b"x" * (600 * 1024)
+        )
+
+    assert res.status_code == 202
+
+    app.dependency_overrides.clear()
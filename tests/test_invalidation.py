@@ -0,0 +1,113 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+
+from src.core.invalidation import InvalidationBus, VersionedCache
+from src.core.pubsub import InMemoryPubSub
+from src.models.databases import make_sessionmaker
+from src.services import admin_services
+
+
+@pytest.fixture
+def bus():
+    return InvalidationBus(InMemoryPubSub())
+
+
+def counting_loader(value):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return value
+
+    return load, calls
+
+
+# ─── VersionedCache ──────────────────────────────────────
+
+
+def test_hits_until_invalidated(bus):
+    cache = VersionedCache(bus, "test_hits")
+    load, calls = counting_loader("admin")
+
+    assert cache.get_or_load("a", load) == "admin"
+    assert cache.get_or_load("a", load) == "admin"
+    assert len(calls) == 1
+
+    bus.publish("test_hits", "a")
+    cache.get_or_load("a", load)
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_other_workers_are_notified_on_commit():
+    pubsub = InMemoryPubSub()
+    writer, reader = InvalidationBus(pubsub), InvalidationBus(pubsub)
+    reader.listen()
+    cache = VersionedCache(reader, "test_remote")
+    cache.get_or_load("a", lambda: "user")
+
+    SessionLocal = make_sessionmaker(create_engine("sqlite://"))
+    with SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+        writer.publish("test_remote", "a", db=db)
+        assert cache.get_or_load("a", lambda: "changed") == "user"
+        db.commit()
+
+    assert cache.get_or_load("a", lambda: "changed") == "changed"
+
+
+def test_load_racing_an_invalidation_is_not_stored(bus):
+    cache = VersionedCache(bus, "test_race")
+
+    def slow_load():
+        # the row changes while the old value is being read
+        bus.publish("test_race", "a")
+        return "stale"
+
+    assert cache.get_or_load("a", slow_load) == "stale"
+    assert cache.get_or_load("a", lambda: "fresh") == "fresh"
+
+
+def test_entries_expire_after_ttl(bus):
+    cache = VersionedCache(bus, "test_ttl", ttl=0)
+    load, calls = counting_loader(1)
+
+    cache.get_or_load("a", load)
+    cache.get_or_load("a", load)
+    assert len(calls) == 2
+
+
+def test_bypassed_while_bus_disconnected(bus):
+    cache = VersionedCache(bus, "test_bypass")
+    bus.pubsub.connected = False
+    load, calls = counting_loader(1)
+
+    cache.get_or_load("a", load)
+    cache.get_or_load("a", load)
+    assert len(calls) == 2
+    assert cache.stats()["bypassed"] == 2
+
+
+def test_invalidate_everything(bus):
+    cache = VersionedCache(bus, "test_all")
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+
+    bus.publish("test_all")
+    assert cache.stats()["size"] == 0
+
+
+# ─── Admin role cache ────────────────────────────────────
+
+
+def test_promotion_reaches_the_role_cache(Session):
+    with Session() as db:
+        with pytest.raises(HTTPException) as exc:
+            admin_services.getCurrentAdmin("bob@example.com", db)
+        assert exc.value.status_code == 403
+
+        admin_services.user_promote(2, db)
+        assert admin_services.getCurrentAdmin("bob@example.com", db) == (
+            "bob@example.com"
+        )
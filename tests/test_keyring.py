@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from src.cli import keygen
+from src.core.keyring import ES256, Keyring, generate_key
+from src.main import app
+from src.services import auth_service
+
+client = TestClient(app)
+
+
+def claims(**extra):
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    return {"sub": "alice@example.com", "exp": expire, **extra}
+
+
+# ─── Keyring ─────────────────────────────────────────────
+
+
+@pytest.mark.parametrize("algorithm", ["EdDSA", ES256])
+def test_sign_and_verify(algorithm):
+    keyring = Keyring({"k1": generate_key(algorithm)})
+
+    token = keyring.sign(claims())
+
+    header = jwt.get_unverified_header(token)
+    assert header["kid"] == "k1"
+    assert header["alg"] == algorithm
+    assert keyring.verify(token)["sub"] == "alice@example.com"
+
+
+def test_rotation_keeps_old_tokens_valid():
+    old, new = generate_key(), generate_key(ES256)
+    before = Keyring({"2026-01": old, "2026-02": new}, active_kid="2026-01")
+    token = before.sign(claims())
+
+    after = Keyring({"2026-01": old, "2026-02": new}, active_kid="2026-02")
+    assert after.active_kid == "2026-02"
+    assert after.verify(token)["sub"] == "alice@example.com"
+
+    retired = Keyring({"2026-02": new})
+    with pytest.raises(jwt.InvalidTokenError):
+        retired.verify(token)
+
+
+def test_public_only_keys_verify_but_do_not_sign():
+    signer = Keyring({"k1": generate_key()})
+    verifier = Keyring({"k1": generate_key().public_key()})
+    other = Keyring({"k1": signer._signer.public_key()})
+
+    with pytest.raises(RuntimeError):
+        verifier.sign(claims())
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(signer.sign(claims()))
+    assert other.verify(signer.sign(claims()))["sub"] == "alice@example.com"
+
+
+def test_active_kid_needs_a_private_key():
+    with pytest.raises(ValueError):
+        Keyring({"k1": generate_key().public_key()}, active_kid="k1")
+
+
+def test_active_kid_required_with_several_private_keys():
+    with pytest.raises(ValueError):
+        Keyring({"2026-01": generate_key(), "2026-02": generate_key()})
+
+    # a public key only verifies, the lone private key signs
+    retired = generate_key().public_key()
+    keyring = Keyring({"2026-01": retired, "2026-02": generate_key()})
+    assert keyring.active_kid == "2026-02"
+
+
+def test_jwks_publishes_public_keys_only():
+    keyring = Keyring({"a": generate_key(), "b": generate_key(ES256)}, "a")
+
+    keys = json.loads(keyring.jwks)["keys"]
+
+    assert [key["kid"] for key in keys] == ["a", "b"]
+    assert [key["alg"] for key in keys] == ["EdDSA", "ES256"]
+    assert all("d" not in key for key in keys)
+    token = keyring.sign(claims())
+    kid = jwt.get_unverified_header(token)["kid"]
+    jwk = jwt.PyJWKSet.from_dict({"keys": keys})[kid]
+    assert jwt.decode(token, jwk.key, algorithms=[jwk.algorithm_name])
+
+
+def test_keys_load_from_directory(tmp_path):
+    assert keygen.main([str(tmp_path), "--kid", "2026-01"]) == 0
+    assert keygen.main([str(tmp_path), "--kid", "2026-02", "-a", ES256]) == 0
+    assert keygen.main([str(tmp_path), "--kid", "2026-02"]) == 1
+
+    with pytest.raises(ValueError):
+        Keyring.from_directory(tmp_path)
+    keyring = Keyring.from_directory(tmp_path, active_kid="2026-02")
+
+    assert keyring.active_kid == "2026-02"
+    assert "2026-01" in keyring
+    assert keyring.verify(keyring.sign(claims()))["sub"] == "alice@example.com"
+
+
+# ─── Auth service ────────────────────────────────────────
+
+
+def test_tokens_signed_with_keyring():
+    keyring = Keyring({"k1": generate_key()})
+    with patch("src.services.auth_service.get_keyring", return_value=keyring):
+        token = auth_service.create_accesstoken({"sub": "alice@example.com"})
+
+        assert jwt.get_unverified_header(token)["kid"] == "k1"
+        assert auth_service.decode_jwt(token) == "alice@example.com"
+
+
+def test_legacy_secret_tokens_still_accepted():
+    keyring = Keyring({"k1": generate_key()})
+    legacy = jwt.encode(claims(), "legacy-secret-of-at-least-32-bytes", "HS256")
+    with patch("src.services.auth_service.get_keyring", return_value=keyring):
+        with patch("src.services.auth_service.SECRET", "legacy-secret-of-at-least-32-bytes"):
+            assert auth_service.decode_jwt(legacy) == "alice@example.com"
+        with patch("src.services.auth_service.SECRET", None):
+            with pytest.raises(Exception):
+                auth_service.decode_jwt(legacy)
+
+
+def test_forged_kid_rejected():
+    keyring = Keyring({"k1": generate_key()})
+    forged = jwt.encode(claims(), "guessed-secret-of-at-least-32-bytes", "HS256", headers={"kid": "k1"})
+    with patch("src.services.auth_service.get_keyring", return_value=keyring):
+        with pytest.raises(Exception) as exc:
+            auth_service.decode_jwt(forged)
+    assert exc.value.status_code == 401
+
+
+# ─── /.well-known/jwks.json ──────────────────────────────
+
+
+def test_jwks_endpoint_revalidates():
+    keyring = Keyring({"k1": generate_key()})
+    with patch("src.api.well_known.get_keyring", return_value=keyring):
+        res = client.get("/.well-known/jwks.json")
+        assert res.status_code == 200
+        assert res.json()["keys"][0]["kid"] == "k1"
+        assert "max-age" in res.headers["cache-control"]
+
+        res = client.get(
+            "/.well-known/jwks.json", headers={"If-None-Match": res.headers["etag"]}
+        )
+        assert res.status_code == 304
+
+
+def test_jwks_endpoint_without_keyring():
+    with patch("src.api.well_known.get_keyring", return_value=None):
+        res = client.get("/.well-known/jwks.json")
+    assert res.json() == {"keys": []}
@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.models.databases import get_read_db
+from src.models.post import Post
+from src.models.user import User
+from src.services import admin_services, auth_service, post_services
+from src.services.rows import ListRow, RowsResponse, row_class
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def Session(Session):
+    with Session() as db:
+        db.add(User(name="Root", email="root@x", password="x", role="admin"))
+        db.add_all(
+            Post(title=f"Post {i}", content="Body", owner_id=1, tags=["go"])
+            for i in range(3)
+        )
+        db.commit()
+    return Session
+
+
+# ─── Rows ────────────────────────────────────────────────
+
+
+def test_rows_are_slotted_and_read_like_dicts():
+    Row = row_class("PostRow", ("id", "title"))
+    row = Row(1, "Title")
+
+    assert row_class("PostRow", ("id", "title")) is Row
+    assert not hasattr(row, "__dict__")
+    assert row.title == row["title"] == "Title"
+    assert row._asdict() == {"id": 1, "title": "Title"}
+
+
+def test_rows_response_serializes_rows_dates_and_other_objects():
+    Row = row_class("PostRow", ("id", "created_at"))
+    at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    body = RowsResponse(
+        {"rows": [Row(1, at)], "other": SimpleNamespace(id=2), "text": "é"}
+    ).body
+
+    assert body == (
+        '{"rows":[{"id":1,"created_at":"2026-01-02T03:04:05+00:00"}],'
+        '"other":{"id":2},"text":"é"}'
+    ).encode()
+
+
+# ─── Services ────────────────────────────────────────────
+
+
+def test_get_all_posts_returns_rows_without_orm_instances(Session):
+    with Session() as db:
+        posts = post_services.get_all_posts("alice@example.com", db)
+
+        assert len(db.identity_map) == 0
+    assert all(isinstance(post, ListRow) for post in posts)
+    assert sorted(post.title for post in posts) == ["Post 0", "Post 1", "Post 2"]
+    assert posts[0]._asdict().keys() == set(post_services.LIST_FIELDS)
+    assert posts[0].tags == ["go"]
+
+
+def test_get_all_posts_with_fields_and_tags(Session):
+    with Session() as db:
+        posts = post_services.get_all_posts(
+            "alice@example.com", db, fields=("id", "content"), tags=(("go",), "all")
+        )
+
+    assert len(posts) == 3
+    assert posts[0]._asdict() == {"id": posts[0].id, "content": "Body"}
+
+
+def test_get_user_for_admin_skips_admins_and_passwords(Session):
+    with Session() as db:
+        users = admin_services.get_user_for_admin(db)
+
+    assert [user._asdict() for user in users] == [
+        {"id": 1, "name": "Alice", "email": "alice@example.com", "role": "user"},
+        {"id": 2, "name": "Bob", "email": "bob@example.com", "role": "user"},
+    ]
+
+
+# ─── Endpoints ───────────────────────────────────────────
+
+
+def test_list_endpoints_serialize_rows(Session):
+    db = Session()
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: "root@x"
+    try:
+        posts = client.get("/api/v1/posts?fields=title").json()["posts"]
+        users = client.get("/api/v1/admin/users").json()["users"]
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous)
+        db.close()
+
+    assert sorted(post["title"] for post in posts) == ["Post 0", "Post 1", "Post 2"]
+    assert set(posts[0]) == {"id", "title"}
+    assert users == [
+        {"id": 1, "name": "Alice", "email": "alice@example.com", "role": "user"},
+        {"id": 2, "name": "Bob", "email": "bob@example.com", "role": "user"},
+    ]
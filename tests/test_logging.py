@@ -0,0 +1,174 @@
+import io
+import json
+import logging
+import queue
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from src.core.log import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    setup_logging,
+    shutdown_logging,
+    stats,
+)
+from src.middleware.access_log import AccessLogMiddleware, RouteStats, route_of
+from src.models.audit import AuditEvent
+from src.models.databases import Base
+from src.services.audit_services import AuditTrail
+
+# ─── Structured logging ──────────────────────────────────
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord(
+        {"name": "access", "levelname": "INFO", "msg": "hi %s", "args": ("there",)}
+    )
+    record.status = 200
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "hi there"
+    assert entry["logger"] == "access"
+    assert entry["status"] == 200
+
+
+def test_records_are_written_by_the_listener():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    setup_logging("INFO", stream)
+    try:
+        logging.getLogger("test").info("hello", extra={"user": "alice"})
+        assert stats()["configured"]
+    finally:
+        shutdown_logging()
+        root.handlers, root.level = handlers, level
+
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "hello"
+    assert entry["user"] == "alice"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    record = logging.makeLogRecord({"msg": "x"})
+
+    handler.emit(record)
+    handler.emit(record)
+
+    assert handler.dropped == 1
+
+
+# ─── Access log ──────────────────────────────────────────
+
+
+def test_route_of_groups_ids():
+    assert route_of("/api/v1/posts/42") == "/api/v1/posts/{id}"
+    assert route_of("/api/v1/users/7/promote") == "/api/v1/users/{id}/promote"
+    assert route_of("/api/v1/import/0f8a9c2e4b6d4e1f") == "/api/v1/import/{id}"
+
+
+def make_app(stats, sample_rate):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=503)
+        return {"id": item_id}
+
+    app.add_middleware(AccessLogMiddleware, stats=stats, sample_rate=sample_rate)
+    return app
+
+
+def test_every_request_counted_and_errors_logged(caplog):
+    route_stats = RouteStats()
+    client = TestClient(make_app(route_stats, sample_rate=0))
+
+    with caplog.at_level(logging.INFO, logger="access"):
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/items/0")
+
+    snapshot = route_stats.snapshot()["GET /items/{id}"]
+    assert snapshot["count"] == 3
+    assert snapshot["statuses"] == {"2xx": 2, "5xx": 1}
+    assert [record.status for record in caplog.records] == [503]
+    assert caplog.records[0].sample_rate == 1.0
+
+
+def test_sampled_requests_logged(caplog):
+    client = TestClient(make_app(RouteStats(), sample_rate=1))
+
+    with caplog.at_level(logging.INFO, logger="access"):
+        client.get("/items/1")
+
+    assert caplog.records[0].route == "/items/{id}"
+    assert caplog.records[0].duration_ms >= 0
+
+
+def test_route_stats_are_bounded():
+    route_stats = RouteStats(max_routes=2)
+    for path in ("/a", "/b", "/c", "/d"):
+        route_stats.record("GET", path, 200, 0.001)
+
+    assert set(route_stats.snapshot()) == {"GET /a", "GET /b", "other"}
+    assert route_stats.snapshot()["other"]["count"] == 2
+
+
+# ─── Audit trail ─────────────────────────────────────────
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[AuditEvent.__table__])
+    return engine
+
+
+def test_audit_events_written_in_batches(engine):
+    trail = AuditTrail(engine, batch_size=100, flush_interval=0.01)
+    for user_id in range(5):
+        trail.record("admin@example.com", "delete_user", user_id, reason="spam")
+    trail.flush()
+    trail.shutdown()
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(AuditEvent.__table__)).mappings().all()
+    assert [row["target"] for row in rows] == ["0", "1", "2", "3", "4"]
+    assert rows[0]["actor"] == "admin@example.com"
+    assert rows[0]["detail"] == {"reason": "spam"}
+    assert trail.stats()["written"] == 5
+
+
+def test_failed_batch_is_counted_not_raised():
+    trail = AuditTrail(create_engine("sqlite://"), flush_interval=0.01)
+
+    trail.record("admin@example.com", "user_promote", 1)
+    trail.flush()
+    trail.shutdown()
+
+    assert trail.stats()["failed"] == 1
+
+
+def test_record_does_not_wait_for_the_database(engine):
+    trail = AuditTrail(engine, flush_interval=0.01)
+    trail.record("admin@example.com", "warm_up")
+
+    started = time.perf_counter()
+    for _ in range(100):
+        trail.record("admin@example.com", "user_promote", 1)
+    elapsed = time.perf_counter() - started
+    trail.flush()
+    trail.shutdown()
+
+    assert elapsed < 0.1
+    assert trail.stats()["written"] == 101
@@ -0,0 +1,253 @@
+from contextlib import contextmanager, nullcontext
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.models import online_migrations
+
+INCREMENT = (
+    "UPDATE items SET hits = coalesce(hits, 0) + 1 WHERE id >= :low AND id < :high"
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, hits INTEGER)"))
+        conn.execute(
+            text("INSERT INTO items (id) VALUES (:id)"),
+            [{"id": id} for id in range(1, 1001)],
+        )
+    return engine
+
+
+@contextmanager
+def migration(engine):
+    # what `alembic upgrade` sets up around a revision's upgrade()
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with Operations.context(context), context.begin_transaction():
+            yield
+
+
+def hits(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT hits, count(*) FROM items GROUP BY 1"))
+        return dict(rows.all())
+
+
+# ─── Backfill ────────────────────────────────────────────
+
+
+def test_backfill_covers_every_row_once(engine):
+    with migration(engine):
+        rows = online_migrations.backfill(
+            "items_hits", "items", INCREMENT, batch_size=64, pause=0
+        )
+
+    assert rows == 1000
+    assert hits(engine) == {1: 1000}
+    with engine.connect() as conn:
+        progress = conn.execute(text("SELECT count(*) FROM migration_progress"))
+        assert progress.scalar() == 0
+
+
+def test_backfill_resumes_after_a_failure(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TRIGGER fail BEFORE UPDATE ON items WHEN NEW.id = 700 "
+                "BEGIN SELECT RAISE(ABORT, 'interrupted'); END"
+            )
+        )
+    with pytest.raises(IntegrityError), migration(engine):
+        online_migrations.backfill(
+            "items_hits", "items", INCREMENT, batch_size=100, pause=0
+        )
+    # the batches before the failure were committed, the failed one was not
+    with engine.connect() as conn:
+        next_key = conn.execute(text("SELECT next_key FROM migration_progress"))
+        next_key = next_key.scalar()
+    assert next_key <= 700
+    assert hits(engine) == {1: next_key - 1, None: 1001 - next_key}
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER fail"))
+    with migration(engine):
+        rows = online_migrations.backfill(
+            "items_hits", "items", INCREMENT, batch_size=100, pause=0
+        )
+
+    assert rows == 1000
+    assert hits(engine) == {1: 1000}
+
+
+def test_backfill_of_an_empty_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM items"))
+    with migration(engine):
+        assert online_migrations.backfill("items_hits", "items", INCREMENT) == 0
+
+
+# ─── Lock timeouts ───────────────────────────────────────
+
+
+def lock_timeout_error():
+    return OperationalError("UPDATE", {}, SimpleNamespace(pgcode="55P03"))
+
+
+def test_lock_timeouts_are_retried():
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) < 3:
+            raise lock_timeout_error()
+        return "done"
+
+    with patch.object(online_migrations.time, "sleep") as sleep:
+        assert online_migrations.with_lock_retries(work, 5, "work") == "done"
+
+    assert len(calls) == 3
+    assert [call.args[0] for call in sleep.call_args_list] == [2, 4]
+
+
+def test_lock_timeouts_give_up_after_the_last_attempt():
+    def work():
+        raise lock_timeout_error()
+
+    with patch.object(online_migrations.time, "sleep"):
+        with pytest.raises(OperationalError):
+            online_migrations.with_lock_retries(work, 2, "work")
+
+
+# ─── DDL ─────────────────────────────────────────────────
+
+
+def test_ddl_and_indexes_outside_postgres(engine):
+    with migration(engine):
+        online_migrations.run_ddl("ALTER TABLE items ADD COLUMN note TEXT")
+        online_migrations.create_index_concurrently("ix_items_hits", "items", ["hits"])
+
+    inspector = inspect(engine)
+    assert "note" in [column["name"] for column in inspector.get_columns("items")]
+    assert [index["name"] for index in inspector.get_indexes("items")] == [
+        "ix_items_hits"
+    ]
+
+    with migration(engine):
+        online_migrations.drop_index_concurrently("ix_items_hits", "items")
+    assert inspect(engine).get_indexes("items") == []
+
+
+def test_partial_index_outside_postgres(engine):
+    with migration(engine):
+        online_migrations.create_index_concurrently(
+            "ix_items_hits", "items", ["hits"], where="hits IS NOT NULL"
+        )
+        with pytest.raises(ValueError):
+            online_migrations.create_index_concurrently(
+                "ix_items_id", "items", ["id"], using="brin"
+            )
+
+    with engine.connect() as conn:
+        sql = conn.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'index'"))
+    assert sql.endswith("WHERE hits IS NOT NULL")
+
+
+class FakePostgres:
+    """Just enough of a Postgres connection for create_index_concurrently.
+
+    The first `failed_builds` builds time out waiting for a lock and, like
+    Postgres, leave the index behind invalid.
+    """
+
+    def __init__(self, failed_builds=0, builds_valid=True, partitions=None):
+        self.failed_builds = failed_builds
+        self.builds_valid = builds_valid
+        # table or index name -> its partitions, attached as ALTER INDEX runs
+        self.partitions = partitions or {}
+        self.valid = {}
+        self.statements = []
+
+    def execution_options(self, **options):
+        return self
+
+    def exec_driver_sql(self, sql):
+        self.statements.append(sql)
+        if sql.startswith("CREATE"):
+            name = sql.split(" IF NOT EXISTS ")[1].split()[0]
+            if self.failed_builds:
+                self.failed_builds -= 1
+                self.valid[name] = False
+                raise lock_timeout_error()
+            self.valid.setdefault(name, self.builds_valid)
+        elif sql.startswith("DROP INDEX"):
+            self.valid.pop(sql.split()[-1])
+        elif sql.startswith("ALTER INDEX"):
+            parent, child = sql.split()[2], sql.split()[-1]
+            self.partitions.setdefault(parent, []).append(child)
+
+    def scalar(self, statement, params):
+        return self.valid.get(params["name"])
+
+    def scalars(self, statement, params):
+        children = self.partitions.get(params["table"], [])
+        return SimpleNamespace(all=lambda: list(children))
+
+
+@contextmanager
+def postgres(conn):
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    with (
+        patch.object(online_migrations.op, "get_bind", return_value=bind),
+        patch.object(online_migrations, "own_connection", lambda: nullcontext(conn)),
+        patch.object(online_migrations.time, "sleep"),
+    ):
+        yield
+
+
+def test_invalid_index_from_a_timed_out_build_is_rebuilt():
+    conn = FakePostgres(failed_builds=1)
+    with postgres(conn):
+        online_migrations.create_index_concurrently("ix_items_hits", "items", ["hits"])
+
+    builds = [sql for sql in conn.statements if sql.startswith(("CREATE", "DROP"))]
+    assert builds == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_hits ON items (hits)",
+        "DROP INDEX CONCURRENTLY ix_items_hits",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_hits ON items (hits)",
+    ]
+    assert conn.valid == {"ix_items_hits": True}
+
+
+def test_index_left_invalid_is_an_error():
+    with postgres(FakePostgres(builds_valid=False)):
+        with pytest.raises(RuntimeError):
+            online_migrations.create_index_concurrently(
+                "ix_items_hits", "items", ["hits"]
+            )
+
+
+def test_index_on_a_partitioned_table_is_built_per_partition():
+    conn = FakePostgres(partitions={"posts": ["posts_p0", "posts_p1"]})
+    with postgres(conn):
+        online_migrations.create_index_concurrently(
+            "ix_posts_tags", "posts", ["tags"], using="gin"
+        )
+
+    assert [sql for sql in conn.statements if "SET" not in sql] == [
+        "CREATE INDEX IF NOT EXISTS ix_posts_tags ON ONLY posts USING gin (tags)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_p0_tags "
+        "ON posts_p0 USING gin (tags)",
+        "ALTER INDEX ix_posts_tags ATTACH PARTITION posts_p0_tags",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_p1_tags "
+        "ON posts_p1 USING gin (tags)",
+        "ALTER INDEX ix_posts_tags ATTACH PARTITION posts_p1_tags",
+    ]
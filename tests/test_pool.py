@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from src.models.databases import Base, make_sessionmaker, release_connection
+from src.models.pool_metrics import PoolMonitor
+from src.models.post import Post
+from src.models.user import User
+from src.schemas.post_schemas import PostCreate
+from src.services import auth_service, post_services
+
+# ─── Fixtures ────────────────────────────────────────────
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def monitor(engine):
+    return PoolMonitor(engine)
+
+
+@pytest.fixture
+def db(engine):
+    SessionLocal = make_sessionmaker(engine)
+    with SessionLocal() as seed:
+        seed.add(User(name="Alice", email="alice@example.com", password="hash"))
+        seed.commit()
+    with SessionLocal() as db:
+        yield db
+
+
+# ─── Connection hold ─────────────────────────────────────
+
+
+def test_session_checks_out_only_on_first_query(engine, monitor):
+    SessionLocal = make_sessionmaker(engine)
+    db = SessionLocal()
+
+    assert monitor.checked_out == 0
+    db.scalars(auth_service.USER_BY_EMAIL, {"email": "x"}).first()
+    assert monitor.checked_out == 1
+    db.close()
+    assert monitor.checked_out == 0
+
+
+def test_read_service_returns_connection_before_response(db, monitor):
+    user = auth_service.get_user_by_email("alice@example.com", db)
+
+    assert monitor.checked_out == 0
+    assert monitor.checkouts == 1
+    # the object is still usable after its connection went back to the pool
+    assert user.email == "alice@example.com"
+
+
+def test_posts_serialisable_after_write_without_reload(db, monitor):
+    post = post_services.create_post_for_user(
+        "alice@example.com", PostCreate(title="Title", content="Body"), db
+    )
+    posts = post_services.get_all_posts("alice@example.com", db)
+
+    assert monitor.checked_out == 0
+    assert post.content == "Body"
+    assert [p.id for p in posts] == [post.id]
+
+
+def test_release_keeps_pending_writes(db, monitor):
+    db.add(Post(title="Draft", content="Body", owner_id=1))
+    release_connection(db)
+
+    assert db.new
+    db.rollback()
+
+
+def test_snapshot_reports_hold_times(db, monitor):
+    auth_service.get_user_by_email("alice@example.com", db)
+    snapshot = monitor.snapshot()
+
+    assert snapshot["checked_out"] == 0
+    assert snapshot["peak_checked_out"] == 1
+    assert snapshot["max_hold_ms"] >= snapshot["avg_hold_ms"] > 0
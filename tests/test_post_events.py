@@ -0,0 +1,172 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.core.pubsub import InMemoryPubSub, PubSub
+from src.main import app
+from src.models.databases import make_sessionmaker
+from src.services import auth_service, post_events
+from src.services.post_events import PostEventBroker
+
+client = TestClient(app)
+
+# ─── Mock Data ───────────────────────────────────────────
+
+created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+mock_post = SimpleNamespace(id=1, title="Title", owner_id=7, created_at=created_at)
+
+
+@pytest.fixture
+def broker():
+    broker = PostEventBroker(InMemoryPubSub(), queue_size=2)
+    with patch.object(post_events, "broker", broker):
+        yield broker
+
+
+async def next_event(subscription):
+    return await asyncio.wait_for(subscription.queue.get(), 1)
+
+
+# ─── Broker ──────────────────────────────────────────────
+
+
+def test_events_reach_only_the_owner(broker):
+    async def scenario():
+        alice = broker.subscribe("alice@example.com")
+        bob = broker.subscribe("bob@example.com")
+        broker.publish(None, "alice@example.com", "created", mock_post)
+        event = await next_event(alice)
+        return event, bob.queue.empty()
+
+    event, bob_empty = asyncio.run(scenario())
+
+    assert event == {
+        "type": "created",
+        "post": {
+            "id": 1,
+            "title": "Title",
+            "owner_id": 7,
+            "created_at": "2026-01-01T00:00:00+00:00",
+        },
+    }
+    assert bob_empty
+
+
+def test_events_delivered_on_commit_not_rollback(broker):
+    SessionLocal = make_sessionmaker(create_engine("sqlite://"))
+
+    async def scenario():
+        subscription = broker.subscribe("alice@example.com")
+        with SessionLocal() as db:
+            db.execute(text("SELECT 1"))
+            broker.publish(db, "alice@example.com", "updated", mock_post)
+            db.rollback()
+            db.execute(text("SELECT 1"))
+            broker.publish(db, "alice@example.com", "deleted", mock_post)
+            await asyncio.sleep(0)
+            assert subscription.queue.empty()
+            db.commit()
+        return await next_event(subscription)
+
+    assert asyncio.run(scenario())["type"] == "deleted"
+
+
+def test_slow_subscriber_is_told_to_resync(broker):
+    async def scenario():
+        subscription = broker.subscribe("alice@example.com")
+        for _ in range(5):
+            broker.publish(None, "alice@example.com", "created", mock_post)
+        await asyncio.sleep(0)
+        return [event async for event in subscription.events()]
+
+    assert asyncio.run(scenario()) == [{"type": "resync"}]
+    assert broker.stats()["overflowed"] == 1
+
+
+def test_unsubscribe_stops_delivery(broker):
+    async def scenario():
+        subscription = broker.subscribe("alice@example.com")
+        broker.unsubscribe(subscription)
+        broker.publish(None, "alice@example.com", "created", mock_post)
+        await asyncio.sleep(0)
+        return subscription.queue.empty()
+
+    assert asyncio.run(scenario())
+    assert broker.stats()["subscribers"] == 0
+
+
+def test_backend_without_publish_cannot_be_created():
+    class NoPublish(PubSub):
+        pass
+
+    with pytest.raises(TypeError):
+        NoPublish()
+
+
+# ─── WS /posts/ws ────────────────────────────────────────
+
+
+def test_websocket_streams_owner_events(broker):
+    with patch(
+        "src.services.auth_service.decode_jwt", return_value="alice@example.com"
+    ):
+        with client.websocket_connect("/api/v1/posts/ws?token=valid") as ws:
+            # wait until the endpoint has registered its subscription
+            for _ in range(100):
+                if broker.stats()["subscribers"]:
+                    break
+                time.sleep(0.01)
+            broker.publish(None, "alice@example.com", "created", mock_post)
+
+            assert ws.receive_json()["type"] == "created"
+
+
+def test_websocket_rejects_bad_token():
+    from fastapi import HTTPException
+    from starlette.websockets import WebSocketDisconnect
+
+    with patch("src.services.auth_service.decode_jwt") as mock_decode:
+        mock_decode.side_effect = HTTPException(status_code=401, detail="Invalid")
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/api/v1/posts/ws?token=bad") as ws:
+                ws.receive_json()
+
+
+# ─── GET /posts/events ───────────────────────────────────
+
+
+def test_events_stream_unauthenticated():
+    from fastapi import HTTPException
+
+    def raise_401():
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    app.dependency_overrides[auth_service.getCurrentUser] = raise_401
+
+    res = client.get("/api/v1/posts/events")
+    assert res.status_code == 401
+
+    app.dependency_overrides.clear()
+
+
+def test_events_stream_is_server_sent_events(broker):
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+
+    async def resync_immediately(self, heartbeat=None):
+        yield {"type": "resync"}
+
+    with patch.object(post_events.Subscription, "events", resync_immediately):
+        res = client.get("/api/v1/posts/events", headers={"Authorization": "Bearer t"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert "event: resync" in res.text
+
+    app.dependency_overrides.clear()
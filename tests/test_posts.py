@@ -80,6 +80,52 @@ def test_create_post_missing_fields():
     app.dependency_overrides.clear()
 
 
+def test_create_post_title_too_long():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+
+    res = client.post(
+        "/api/v1/posts", json={"title": "x" * 1000, "content": "Test Content"}
+    )
+
+    assert res.status_code == 422
+
+    app.dependency_overrides.clear()
+
+
+def test_create_post_body_too_large():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+
+    with patch("src.services.post_services.create_post_for_user") as mock_create:
+        res = client.post(
+            "/api/v1/posts", json={"title": "Big", "content": "x" * (1024 * 1024)}
+        )
+
+        assert res.status_code == 413
+        mock_create.assert_not_called()
+
+    app.dependency_overrides.clear()
+
+
+def test_create_post_chunked_body_too_large():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+
+    def chunks():
+        yield b'{"title": "Big", "content": "'
+        for _ in range(100):
+            yield b"x" * 10000
+        yield b'"}'
+
+    res = client.post(
+        "/api/v1/posts",
+        content=chunks(),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert res.status_code == 413
+
+    app.dependency_overrides.clear()
+
+
 # ─── GET /posts ──────────────────────────────────────────
 
 
@@ -124,6 +170,36 @@ def test_get_all_posts_unauthenticated():
     app.dependency_overrides.clear()
 
 
+def test_get_all_posts_with_fields():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    slim_posts = [{"id": 1, "title": "Post One"}, {"id": 2, "title": "Post Two"}]
+
+    with patch(
+        "src.services.post_services.get_all_posts", return_value=slim_posts
+    ) as mock_get:
+        res = client.get("/api/v1/posts?fields=title")
+
+        assert res.status_code == 200
+        assert res.json()["posts"] == slim_posts
+        assert mock_get.call_args.kwargs["fields"] == ("id", "title")
+
+    app.dependency_overrides.clear()
+
+
+def test_get_all_posts_unknown_field():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    res = client.get("/api/v1/posts?fields=title,secret")
+
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Unknown fields: secret"
+
+    app.dependency_overrides.clear()
+
+
 # ─── GET /posts/{post_id} ────────────────────────────────
 
 
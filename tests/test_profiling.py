@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.middleware.access_log import RouteStats
+from src.services import admin_services, profiling_services
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def as_admin():
+    app.dependency_overrides[admin_services.getCurrentAdmin] = lambda: "admin@x.com"
+    yield
+    app.dependency_overrides.pop(admin_services.getCurrentAdmin)
+
+
+def spin_until(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin_until, args=(stop,), name="busy")
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+# ─── CPU ─────────────────────────────────────────────────
+
+
+def test_samples_show_busy_code(busy_thread):
+    stacks = profiling_services.sample_stacks(0.1, 0.005)
+
+    busy = [stack for stack in stacks if stack.startswith("busy;")]
+    assert busy
+    assert all("spin_until (test_profiling.py:" in stack for stack in busy)
+    line = profiling_services.collapsed(stacks).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_one_profile_at_a_time():
+    with profiling_services._profile_lock:
+        with pytest.raises(HTTPException) as exc:
+            profiling_services.sample_stacks(0.01, 0.005)
+    assert exc.value.status_code == 409
+
+
+def test_cpu_profile_endpoint(as_admin, busy_thread):
+    res = client.get("/api/v1/admin/profile/cpu?seconds=0.05&interval_ms=5")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert "spin_until" in res.text
+
+    res = client.get("/api/v1/admin/profile/cpu?seconds=0.05&format=json")
+    assert res.json()["samples"] == sum(s["count"] for s in res.json()["stacks"])
+
+
+def test_profile_endpoints_need_admin():
+    res = client.get("/api/v1/admin/profile/cpu")
+    assert res.status_code in (401, 403)
+
+
+# ─── Memory ──────────────────────────────────────────────
+
+
+def test_memory_snapshots_and_diff(as_admin):
+    assert client.get("/api/v1/admin/profile/memory").status_code == 409
+
+    res = client.post("/api/v1/admin/profile/memory/start")
+    assert res.json()["memory"]["tracing"] is True
+    try:
+        first = client.get("/api/v1/admin/profile/memory?limit=5").json()["memory"]
+        assert first["diff"] is False
+        assert len(first["top"]) <= 5
+
+        kept = [bytearray(1024) for _ in range(1000)]
+        second = client.get("/api/v1/admin/profile/memory?diff=true").json()
+        top = second["memory"]["top"]
+        assert second["memory"]["diff"] is True
+        assert any("test_profiling.py" in site["site"] for site in top[:3])
+        assert top[0]["size_diff_bytes"] > 0
+        del kept
+    finally:
+        res = client.post("/api/v1/admin/profile/memory/stop")
+    assert res.json()["memory"] == {"tracing": False}
+
+
+# ─── Slow requests ───────────────────────────────────────
+
+
+def test_slowest_requests_kept_per_route():
+    stats = RouteStats(slowest=2)
+    for ms in (5, 50, 1, 20):
+        stats.record("GET", "/posts/{id}", 200, ms / 1000, f"/posts/{ms}")
+
+    samples = stats.slowest_requests()["GET /posts/{id}"]
+
+    assert [sample["path"] for sample in samples] == ["/posts/50", "/posts/20"]
+    assert samples[0]["duration_ms"] == 50
+
+
+def test_slow_requests_endpoint(as_admin):
+    client.get("/api/v1/posts/123")
+
+    res = client.get("/api/v1/admin/profile/slow")
+
+    assert res.status_code == 200
+    assert "GET /api/v1/posts/{id}" in res.json()["routes"]
@@ -0,0 +1,176 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.middleware.read_your_writes import ReadYourWritesMiddleware, RecentWriters
+from src.middleware.response_cache import caller_of
+from src.models.databases import (
+    STICKY_PRIMARY_COOKIE,
+    make_sessionmaker,
+    sticky_to_primary,
+)
+from src.models.routing import ReplicaSet
+
+# ─── Fixtures ────────────────────────────────────────────
+
+
+def make_engine(path, name):
+    engine = create_engine(f"sqlite:///{path / name}.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE origin (name TEXT)"))
+        conn.execute(text("INSERT INTO origin VALUES (:name)"), {"name": name})
+    return engine
+
+
+def origin(db):
+    return db.execute(text("SELECT name FROM origin")).scalar()
+
+
+@pytest.fixture
+def engines(tmp_path):
+    return make_engine(tmp_path, "primary"), make_engine(tmp_path, "replica")
+
+
+# ─── Routing ─────────────────────────────────────────────
+
+
+def test_read_only_session_uses_replica(engines):
+    primary, replica = engines
+    SessionLocal = make_sessionmaker(primary, ReplicaSet([replica]))
+
+    with SessionLocal(info={"read_only": True}) as db:
+        assert origin(db) == "replica"
+
+    with SessionLocal() as db:
+        assert origin(db) == "primary"
+
+
+def test_no_replicas_configured_uses_primary(engines):
+    primary, _ = engines
+    SessionLocal = make_sessionmaker(primary, ReplicaSet([]))
+
+    with SessionLocal(info={"read_only": True}) as db:
+        assert origin(db) == "primary"
+
+
+def test_unreachable_replica_falls_back_to_primary(engines, tmp_path):
+    primary, _ = engines
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/dir/replica.db")
+    SessionLocal = make_sessionmaker(primary, ReplicaSet([broken]))
+
+    with SessionLocal(info={"read_only": True}) as db:
+        assert origin(db) == "primary"
+
+
+def test_lagging_replica_falls_back_to_primary(engines):
+    primary, replica = engines
+    replica_set = ReplicaSet([replica], max_lag=1.0)
+    replica_set.measure_lag = lambda engine: 30.0
+    SessionLocal = make_sessionmaker(primary, replica_set)
+
+    with SessionLocal(info={"read_only": True}) as db:
+        assert origin(db) == "primary"
+    assert replica_set.healthy == []
+
+
+def test_health_is_rechecked_after_interval(engines):
+    primary, replica = engines
+    replica_set = ReplicaSet([replica], max_lag=1.0, check_interval=0)
+    lags = iter([30.0, 0.0])
+    replica_set.measure_lag = lambda engine: next(lags)
+
+    assert replica_set.pick() is None
+    assert replica_set.pick() is replica
+
+
+# ─── Read-your-writes ────────────────────────────────────
+
+
+def test_flush_records_write_on_request_state(tmp_path):
+    from src.models.user import User
+
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    User.__table__.create(primary)
+    SessionLocal = make_sessionmaker(primary)
+    state = SimpleNamespace()
+
+    with SessionLocal(info={"request_state": state}) as db:
+        db.add(User(name="Alice", email="alice@example.com", password="hash"))
+        db.commit()
+
+    assert state.db_wrote_at <= time.time()
+
+
+def test_sticky_cookie_set_after_write_and_honoured():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window=5)
+
+    @app.post("/write")
+    def write():
+        return {}
+
+    @app.post("/write-db")
+    def write_db(request: Request):
+        request.state.db_wrote_at = time.time()
+        return {}
+
+    @app.get("/read")
+    def read(request: Request):
+        return {"sticky": sticky_to_primary(request)}
+
+    client = TestClient(app)
+
+    assert STICKY_PRIMARY_COOKIE not in client.post("/write").cookies
+    assert client.get("/read").json()["sticky"] is False
+
+    res = client.post("/write-db")
+    assert STICKY_PRIMARY_COOKIE in res.headers["set-cookie"]
+
+    client.cookies.set(STICKY_PRIMARY_COOKIE, res.cookies[STICKY_PRIMARY_COOKIE])
+    assert client.get("/read").json()["sticky"] is True
+
+
+def test_bearer_clients_are_pinned_without_the_cookie():
+    published = []
+    app = FastAPI()
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        window=5,
+        publish=lambda caller, until: published.append((caller, until)),
+    )
+
+    @app.post("/write-db")
+    def write_db(request: Request):
+        request.state.db_wrote_at = time.time()
+        return {}
+
+    @app.get("/read")
+    def read(request: Request):
+        return {"sticky": sticky_to_primary(request)}
+
+    client = TestClient(app)
+    alice = {"Authorization": "Bearer alice"}
+    bob = {"Authorization": "Bearer bob"}
+
+    client.post("/write-db", headers=alice)
+    client.cookies.clear()
+
+    assert client.get("/read", headers=alice).json()["sticky"] is True
+    assert client.get("/read", headers=bob).json()["sticky"] is False
+    assert [caller for caller, _ in published] == [caller_of("Bearer alice")]
+
+
+def test_recent_writers_keep_the_latest_end_and_are_bounded():
+    writers = RecentWriters(max_entries=2)
+    writers.mark("a", 10.0)
+    writers.mark("a", 5.0)
+    assert writers.until("a") == 10.0
+
+    writers.mark("b", 1.0)
+    writers.mark("c", 1.0)
+    assert writers.until("a") == 0
+    assert writers.until("b") == writers.until("c") == 1.0
@@ -0,0 +1,120 @@
+import random
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.models.post import Post
+from src.schemas.post_schemas import PostCreate, PostUpdate
+from src.services import post_services, revision_services
+
+WORDS = "the quick brown fox jumps over a lazy dog\n".split(" ")
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def edit(rng, content):
+    start = rng.randrange(len(content))
+    end = min(len(content), start + rng.randrange(50))
+    return content[:start] + text(rng, rng.randrange(10)) + content[end:]
+
+
+# ─── Deltas ──────────────────────────────────────────────
+
+
+def test_delta_round_trips_random_edits():
+    rng = random.Random(7)
+    old = text(rng, 500)
+    for _ in range(50):
+        new = edit(rng, old)
+        delta = revision_services.encode_delta(old, new)
+        assert revision_services.apply_delta(old, delta) == new
+        old = new
+
+
+def test_small_edit_is_stored_as_a_small_delta():
+    rng = random.Random(1)
+    old = text(rng, 5000)
+    new = old[:1000] + "an inserted sentence. " + old[1000:]
+
+    delta = revision_services.encode_delta(old, new)
+
+    assert len(delta) < 100 < len(revision_services.zlib.compress(new.encode()))
+
+
+# ─── History ─────────────────────────────────────────────
+
+
+def test_every_version_is_reconstructed(Session):
+    rng = random.Random(3)
+    versions = [text(rng, 300)]
+    with Session() as db:
+        post = post_services.create_post_for_user(
+            "alice@example.com", PostCreate(title="v1", content=versions[0]), db
+        )
+    for number in range(2, 14):
+        versions.append(edit(rng, versions[-1]))
+        update = PostUpdate(title=f"v{number}", content=versions[-1])
+        with Session() as db:
+            post_services.update_post("alice@example.com", post.id, update, db)
+
+    with Session() as db:
+        history = post_services.get_revisions("alice@example.com", post.id, db)
+        assert [rev["version"] for rev in history] == list(range(13, 0, -1))
+        # the post as created, then a snapshot every REVISION_SNAPSHOT_INTERVAL
+        snapshots = [rev["version"] for rev in history if rev["snapshot"]]
+        assert snapshots == [11, 1]
+
+        for number, content in enumerate(versions, start=1):
+            del Session.statements[:]
+            revision = post_services.get_revision(
+                "alice@example.com", post.id, number, db
+            )
+            assert revision["title"] == f"v{number}"
+            assert revision["content"] == content
+            assert len([s for s in Session.statements if "post_revisions" in s]) == 1
+
+        with pytest.raises(post_services.HTTPException):
+            post_services.get_revision("alice@example.com", post.id, 14, db)
+        with pytest.raises(post_services.HTTPException):
+            post_services.get_revision("bob@example.com", post.id, 2, db)
+
+
+def test_unedited_and_deleted_posts(Session):
+    with Session() as db:
+        post = post_services.create_post_for_user(
+            "alice@example.com", PostCreate(title="T", content="Body"), db
+        )
+        assert post_services.get_revisions("alice@example.com", post.id, db) == []
+
+        update = PostUpdate(title="T", content="Body, edited")
+        post_services.update_post("alice@example.com", post.id, update, db)
+        post_services.delete_post("alice@example.com", post.id, db)
+
+        with pytest.raises(post_services.HTTPException):
+            post_services.get_revisions("alice@example.com", post.id, db)
+
+
+def test_update_and_revision_share_one_statement_on_postgres():
+    db = MagicMock()
+    post = Post(id=1, owner_id=2, title="T", content="Body")
+    values = {"title": "T2", "content": "Body, edited"}
+    with patch.object(revision_services, "dialect_of", return_value="postgresql"):
+        revision_services.write_update(db, post, values, 3, 1)
+
+    assert db.execute.call_count == 1
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH updated AS \n(UPDATE posts SET")
+    assert "INSERT INTO post_revisions" in sql
+    assert post.content == "Body, edited"
+
+
+def test_statement_writes_keep_the_client_on_the_primary(Session):
+    state = SimpleNamespace()
+    with Session(info={"request_state": state}) as db:
+        revision_services.delete_revisions(db, SimpleNamespace(id=1, owner_id=1))
+
+    assert state.db_wrote_at > 0
@@ -0,0 +1,44 @@
+from argon2 import PasswordHasher
+from sqlalchemy import create_engine, func, select
+
+from src.cli import seed
+from src.models.databases import Base
+from src.models.post import Post
+from src.models.user import User
+
+
+def seeded(seed_value, **kwargs):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    totals = seed.seed(engine, 30, 4, seed=seed_value, batch_size=7, **kwargs)
+    with engine.connect() as conn:
+        users = conn.execute(select(User.name, User.email, User.password)).all()
+        posts = conn.execute(
+            select(Post.title, Post.content, Post.owner_id, Post.created_at)
+        ).all()
+    return totals, users, posts
+
+
+def test_same_seed_same_data():
+    first = seeded(1)
+    assert first == seeded(1)
+    assert first[2] != seeded(2)[2]
+
+
+def test_counts_and_shared_password():
+    totals, users, posts = seeded(3, password="pw")
+
+    assert totals == {"users": 30, "posts": len(posts)}
+    assert len({user.email for user in users}) == 30
+    assert len({user.password for user in users}) == 1
+    assert PasswordHasher().verify(users[0].password, "pw")
+
+
+def test_start_appends_to_a_seeded_database():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    seed.seed(engine, 5, 1, batch_size=2)
+    seed.seed(engine, 5, 1, batch_size=2, start=5)
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(User)) == 10
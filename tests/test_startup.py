@@ -0,0 +1,64 @@
+import os
+
+from benchmarks.bench_startup import measure
+from src.core.lazy import LazyModule
+from src.core.settings import Settings
+
+# generous, so only a real regression (an eager heavy import, a connection
+# at import time) fails on a slow machine; tighten through the environment
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", 3.0))
+STARTUP_FIRST_REQUEST_BUDGET = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET", 1.0))
+
+# ─── Cold start ──────────────────────────────────────────
+
+
+def test_cold_start_within_budget():
+    # best of two, a single run can land on a busy moment
+    runs = [measure() for _ in range(2)]
+
+    assert all(run["status"] == 200 for run in runs)
+    assert min(run["import"] for run in runs) < STARTUP_IMPORT_BUDGET
+    assert min(run["first_request"] for run in runs) < STARTUP_FIRST_REQUEST_BUDGET
+
+
+def test_import_defers_engine_and_import_pipeline():
+    run = measure()
+
+    assert run["loaded_at_import"] == []
+
+
+# ─── Settings ────────────────────────────────────────────
+
+
+def test_settings_read_env_file_once(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("STARTUP_TEST_SIZE=5\nSTARTUP_TEST_NAMES=a, b,,c\n")
+    monkeypatch.delenv("STARTUP_TEST_SIZE", raising=False)
+    monkeypatch.delenv("STARTUP_TEST_NAMES", raising=False)
+    settings = Settings(env_file)
+
+    assert settings.get_int("STARTUP_TEST_SIZE") == 5
+    assert settings.get_list("STARTUP_TEST_NAMES") == ["a", "b", "c"]
+
+    env_file.write_text("STARTUP_TEST_SIZE=9\n")
+    assert settings.get_int("STARTUP_TEST_SIZE") == 5
+
+
+def test_settings_environment_wins_over_env_file(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("STARTUP_TEST_SIZE=5\n")
+    monkeypatch.setenv("STARTUP_TEST_SIZE", "7")
+    settings = Settings(env_file)
+
+    assert settings.get_int("STARTUP_TEST_SIZE") == 7
+    assert settings.get_float("STARTUP_TEST_MISSING", 1.5) == 1.5
+
+
+# ─── Lazy modules ────────────────────────────────────────
+
+
+def test_lazy_module_imports_on_first_use():
+    module = LazyModule("colorsys")
+
+    assert module.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1.0)
+    assert module.loaded
@@ -0,0 +1,168 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from src.main import app
+from src.models.post import Post
+from src.schemas.post_schemas import POST_MAX_TAGS, PostCreate, PostUpdate
+from src.services import auth_service, post_services
+
+client = TestClient(app)
+
+
+def create(db, title, tags, email="alice@example.com"):
+    post = PostCreate(title=title, content="Body", tags=tags)
+    return post_services.create_post_for_user(email, post, db)
+
+
+def titles(posts):
+    return sorted(post["title"] for post in posts)
+
+
+# ─── Schemas ─────────────────────────────────────────────
+
+
+def test_tags_are_normalized_and_deduplicated():
+    post = PostCreate(title="T", content="C", tags=[" Go", "go", "Web "])
+
+    assert post.tags == ["go", "web"]
+    assert PostUpdate(title="T", content="C").tags is None
+
+
+@pytest.mark.parametrize(
+    "tags", [[""], ["x" * 51], [f"tag{i}" for i in range(POST_MAX_TAGS + 1)]]
+)
+def test_invalid_tags_are_rejected(tags):
+    with pytest.raises(ValidationError):
+        PostCreate(title="T", content="C", tags=tags)
+
+
+def test_rows_inserted_without_tags_read_back_as_a_list(Session):
+    with Session() as db:
+        db.execute(
+            text("INSERT INTO posts (title, content, owner_id) VALUES ('T', 'C', 1)")
+        )
+        db.commit()
+        posts = post_services.get_all_posts("alice@example.com", db)
+
+    assert posts[0].tags == []
+
+
+def test_postgres_tags_default_is_an_empty_array():
+    ddl = str(CreateTable(Post.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "tags VARCHAR[] DEFAULT '{}' NOT NULL" in ddl
+
+
+# ─── Filtering ───────────────────────────────────────────
+
+
+def test_filter_all_and_any(Session):
+    with Session() as db:
+        create(db, "Both", ["go", "web"])
+        create(db, "Go", ["go"])
+        create(db, "None", [])
+        create(db, "Bob's", ["go", "web"], email="bob@example.com")
+
+    with Session() as db:
+        every = post_services.get_all_posts(
+            "alice@example.com", db, fields=("id", "title"), tags=(("go", "web"), "all")
+        )
+        some = post_services.get_all_posts(
+            "alice@example.com", db, tags=(("web", "rust"), "any")
+        )
+
+    assert titles(every) == ["Both"]
+    assert [post.title for post in some] == ["Both"]
+
+
+def test_postgres_filter_uses_array_operators():
+    dialect = postgresql.dialect()
+    every = post_services.select_tagged_posts(("id",), "all", "postgresql")
+    some = post_services.select_tagged_posts(("id",), "any", "postgresql")
+
+    assert "posts.tags @> " in str(every.compile(dialect=dialect))
+    assert "posts.tags && " in str(some.compile(dialect=dialect))
+
+
+# ─── Facet counts ────────────────────────────────────────
+
+
+def test_tag_counts_follow_creates_updates_and_deletes(Session):
+    with Session() as db:
+        first = create(db, "First", ["go", "web"])
+        create(db, "Second", ["go"])
+        create(db, "Bob's", ["rust"], email="bob@example.com")
+
+    with Session() as db:
+        assert post_services.get_tag_counts("alice@example.com", db) == [
+            {"tag": "go", "count": 2},
+            {"tag": "web", "count": 1},
+        ]
+
+        update = PostUpdate(title="First", content="Body", tags=["go", "rust"])
+        post_services.update_post("alice@example.com", first.id, update, db)
+        assert post_services.get_tag_counts("alice@example.com", db) == [
+            {"tag": "go", "count": 2},
+            {"tag": "rust", "count": 1},
+        ]
+
+        # no tags in the update, the post keeps its own
+        update = PostUpdate(title="Renamed", content="Body")
+        post_services.update_post("alice@example.com", first.id, update, db)
+        post_services.delete_post("alice@example.com", first.id, db)
+        assert post_services.get_tag_counts("alice@example.com", db) == [
+            {"tag": "go", "count": 1}
+        ]
+        assert post_services.get_tag_counts("bob@example.com", db, limit=1) == [
+            {"tag": "rust", "count": 1}
+        ]
+
+
+# ─── Endpoints ───────────────────────────────────────────
+
+
+def test_get_posts_by_tag_endpoint():
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    try:
+        with patch(
+            "src.services.post_services.get_all_posts", return_value=[]
+        ) as mock_get:
+            res = client.get("/api/v1/posts?tag=Go&tag=web&tag=go&match=any")
+    finally:
+        app.dependency_overrides.pop(auth_service.getCurrentUser)
+
+    assert res.status_code == 200
+    assert mock_get.call_args.kwargs["tags"] == (("go", "web"), "any")
+
+
+@pytest.mark.parametrize("query", ["tag=go&match=some", "tag=go&ids=1", "tag=%20"])
+def test_get_posts_rejects_bad_tag_filters(query):
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    try:
+        res = client.get(f"/api/v1/posts?{query}")
+    finally:
+        app.dependency_overrides.pop(auth_service.getCurrentUser)
+
+    assert res.status_code in (400, 422)
+
+
+def test_get_tag_counts_endpoint():
+    counts = [{"tag": "go", "count": 2}]
+    app.dependency_overrides[auth_service.getCurrentUser] = lambda: "alice@example.com"
+    try:
+        with patch(
+            "src.services.post_services.get_tag_counts", return_value=counts
+        ) as mock_get:
+            res = client.get("/api/v1/posts/tags?limit=10")
+    finally:
+        app.dependency_overrides.pop(auth_service.getCurrentUser)
+
+    assert res.status_code == 200
+    assert res.json()["tags"] == counts
+    assert mock_get.call_args.args[2] == 10